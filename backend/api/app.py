@@ -3,23 +3,29 @@
 import os
 import sys
 import json
+import time
+import logging
 from datetime import datetime
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import pandas as pd
-import time
 
 # Add the parent directory to the Python path to find modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import necessary utilities from backends
-from utils.analysis import analyze_assets, fetch_stock_data, fetch_crypto_data, analyze_data
 from utils.cache import PersistentCache
+from utils.rate_limiter import get_rate_metrics
+from utils.jobs import JobRunner
+from utils.http_cache import PreparedResponses, prepared_response
+from utils.query import ColumnarResults, QueryError, parse_query, run_query
+from utils.history import parse_time
+from utils.results import TOP_COLUMNS
 
 # Import your main analysis function
 # Update this import to use the correct module path
-from core.main import analyze_assets as main_analyze_assets
+from core.main import run_analysis as main_run_analysis, setup_logging, analysis_history, analyze_single_asset, ANALYSIS_CACHE_FILE
 
 # Load environment variables
 load_dotenv()
@@ -47,41 +53,37 @@ else:
 # Authentication (Simple API key for demonstration)
 API_KEY = os.getenv("API_KEY", "your-secret-api-key")
 
-# Storage for analysis history
-analysis_history = []
+# Serialised + gzipped bodies of the latest analysis and the history, with ETags
+prepared_responses = PreparedResponses()
 
-# Set up cache file in the appropriate location
-if os.path.exists('/app/backend/data'):
-    analysis_cache_file = "/app/backend/data/cache/analysis_cache.json"
-else:
-    analysis_cache_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cache", "analysis_cache.json")
+# Columnar forms of the latest analysis and of the last queried job result,
+# for fields= / asset_type= / min_score= / sort= / limit= / cursor= queries
+columnar_results = ColumnarResults()
 
-# Ensure directory exists
-os.makedirs(os.path.dirname(analysis_cache_file), exist_ok=True)
+# Set up cache file in the appropriate location (CACHE_DIR, see core/main.py)
+analysis_cache_file = ANALYSIS_CACHE_FILE
 
-# Load existing cache data if it exists
-if os.path.exists(analysis_cache_file):
-    try:
-        with open(analysis_cache_file, 'r') as f:
-            cached_data = json.load(f)
-            analysis_cache = PersistentCache(cache_file=analysis_cache_file, initial_data=cached_data)
-            print(f"Loaded analysis cache from {analysis_cache_file}")
-    except Exception as e:
-        print(f"Error loading cache: {e}")
-        analysis_cache = PersistentCache(cache_file=analysis_cache_file)
-else:
-    analysis_cache = PersistentCache(cache_file=analysis_cache_file)
-    print(f"Created new analysis cache at {analysis_cache_file}")
-
-# Global variables to track analysis status
-analysis_status = {
-    "is_running": False,
-    "start_time": None,
-    "current_step": 0,
-    "total_steps": 5,
-    "current_step_name": "",
-    "logs": []
-}
+# Open the cache (a legacy JSON cache file is migrated to SQLite on first use)
+analysis_cache = PersistentCache(cache_file=analysis_cache_file)
+print(f"Loaded analysis cache from {analysis_cache.store.db_file}")
+
+# Analysis runs execute on a background worker, one at a time
+job_runner = JobRunner(max_workers=1)
+
+# Server-Sent Events: a comment line keeps idle streams alive, and a stream
+# with no events for SSE_IDLE_TIMEOUT seconds is closed so it does not hold a
+# server thread; EventSource then reconnects with Last-Event-ID
+SSE_KEEPALIVE_SECONDS = 15
+SSE_IDLE_TIMEOUT = 60
+SSE_RETRY_MS = 2000
+
+# Rows returned by the per-asset history endpoints unless limit= asks for fewer/more
+HISTORY_DEFAULT_LIMIT = 10000
+HISTORY_MAX_LIMIT = 100000
+
+def record_analysis(result, expiry_seconds=None):
+    """Cache a result as the latest analysis."""
+    analysis_cache.set("latest_analysis", result, expiry_seconds=expiry_seconds)
 
 def authenticate(request):
     """Simple API key authentication."""
@@ -92,55 +94,44 @@ def authenticate(request):
     api_key = request.headers.get('X-API-Key')
     return api_key == API_KEY
 
-def add_log(message, log_type="info"):
-    """Add a log message to the status logs."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    analysis_status["logs"].append({
-        "timestamp": timestamp,
-        "message": message,
-        "type": log_type
-    })
-    # Keep only the last 100 logs
-    if len(analysis_status["logs"]) > 100:
-        analysis_status["logs"].pop(0)
-
 @app.route('/api/analysis/latest', methods=['GET'])
 def get_latest_analysis():
-    """Get the latest analysis results."""
+    """
+    Get the latest analysis results.
+
+    Optional query parameters select part of it: fields=Symbol,Score,
+    sections=best_stocks,top_cryptos, asset_type=stock|crypto, min_score=80,
+    sort=-Score, limit=10 and cursor= (the previous page's next_cursor, sent with
+    the same other parameters). Returns 404 until a first analysis has run
+    (POST /api/analysis/run starts one).
+    """
     if not authenticate(request):
         return jsonify({"error": "Unauthorized"}), 401
     
-    # Try to get cached result first
-    cached = analysis_cache.get("latest_analysis")
-    if cached:
-        return jsonify(cached)
-    
-    # Run analysis (or get from your database/cache)
     try:
-        best_stocks, top_stocks, best_cryptos, top_cryptos, wallet_stocks, wallet_cryptos = analyze_assets()
-        
-        # Convert DataFrames to dict for JSON serialization
-        result = {
-            "timestamp": datetime.now().isoformat(),
-            "best_stocks": best_stocks.to_dict(orient="records") if not best_stocks.empty else [],
-            "top_stocks": top_stocks.to_dict(orient="records") if not top_stocks.empty else [],
-            "best_cryptos": best_cryptos.to_dict(orient="records") if not best_cryptos.empty else [],
-            "top_cryptos": top_cryptos.to_dict(orient="records") if not top_cryptos.empty else [],
-            "wallet_stocks": wallet_stocks.to_dict(orient="records") if not wallet_stocks.empty else [],
-            "wallet_cryptos": wallet_cryptos.to_dict(orient="records") if not wallet_cryptos.empty else []
-        }
-        
-        # Save to cache
-        analysis_cache.set("latest_analysis", result)
-        
-        # Save to history (limited to last 10 analyses)
-        analysis_history.append(result)
-        if len(analysis_history) > 10:
-            analysis_history.pop(0)
-            
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        query = parse_query(request.args)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The cached result, else the newest stored run (e.g. after the cache expired)
+    latest = analysis_cache.get("latest_analysis")
+    if not latest:
+        # recent(10) is the same memoised list as the history endpoint's
+        recent = analysis_history.recent(10)
+        latest = recent[-1] if recent else None
+    if not latest:
+        return jsonify({
+            "error": "No analysis available yet",
+            "run_url": "/api/analysis/run"
+        }), 404
+
+    if query is not None:
+        try:
+            return jsonify(run_query(columnar_results.get("latest", latest), query))
+        except QueryError as e:
+            return jsonify({"error": str(e)}), 400
+    # Serialised and gzipped once per analysis
+    return prepared_response(prepared_responses.get("latest", latest), request)
 
 @app.route('/api/analysis/history', methods=['GET'])
 def get_analysis_history():
@@ -148,182 +139,267 @@ def get_analysis_history():
     if not authenticate(request):
         return jsonify({"error": "Unauthorized"}), 401
     
-    # Ensure analysis_history is a list
-    safe_history = analysis_history if isinstance(analysis_history, list) else []
-    
-    # Return the last 10 analyses
-    return jsonify(safe_history)
+    # Return the last 10 analyses (a new list only when a run was recorded)
+    return prepared_response(prepared_responses.get("history", analysis_history.recent(10)), request)
+
+def _split_arg(name):
+    value = request.args.get(name)
+    return [part.strip() for part in value.split(",") if part.strip()] if value else None
+
+@app.route('/api/history/runs', methods=['GET'])
+def list_history_runs():
+    """
+    List stored runs, newest first: [{"id", "timestamp", "source"}].
+
+    Query parameters: start= and end= (ISO date or datetime, inclusive) and
+    limit= (default 100).
+    """
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        start = parse_time(request.args.get("start"))
+        end = parse_time(request.args.get("end"), end_of_day=True)
+        limit = int(request.args.get("limit", 100))
+        if not 1 <= limit <= HISTORY_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {HISTORY_MAX_LIMIT}")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"runs": analysis_history.runs(start, end, limit)})
+
+@app.route('/api/history/runs/<int:run_id>', methods=['GET'])
+def get_history_run(run_id):
+    """Get the full result of a stored run."""
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+    result = analysis_history.get_run(run_id)
+    if result is None:
+        return jsonify({"error": "Run not found"}), 404
+    return jsonify(result)
+
+@app.route('/api/history/assets', methods=['GET'])
+def get_history_assets(symbol=None):
+    """
+    Per-asset scores, prices and recommendations over time, in columnar form:
+    {"columns": {"timestamp": [...], "Symbol": [...], "Score": [...], ...},
+    "count", "truncated"}, oldest first.
+
+    Query parameters: symbols=AAPL,BTC, start=, end= (ISO date or datetime,
+    inclusive), sections=top_stocks,wallet_cryptos and limit= (default 10000).
+    """
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        limit = int(request.args.get("limit", HISTORY_DEFAULT_LIMIT))
+        if not 1 <= limit <= HISTORY_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {HISTORY_MAX_LIMIT}")
+        history = analysis_history.assets(
+            symbols=[symbol.upper()] if symbol else _split_arg("symbols"),
+            start=parse_time(request.args.get("start")),
+            end=parse_time(request.args.get("end"), end_of_day=True),
+            sections=_split_arg("sections"),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(history)
+
+@app.route('/api/history/assets/<symbol>', methods=['GET'])
+def get_history_asset(symbol):
+    """One symbol's history; the same query parameters as /api/history/assets."""
+    return get_history_assets(symbol)
+
+@app.route('/api/asset/<symbol>', methods=['GET'])
+def get_asset(symbol):
+    """
+    Analyze one symbol on demand, including symbols outside TOP_ASSETS.
+
+    Served from the analysis and price caches when they are fresh; otherwise
+    only this symbol's timeframes and price are fetched. Optional query
+    parameter asset_type=stock|crypto (default: crypto for the configured
+    top cryptos, stock otherwise).
+    """
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    asset_type = request.args.get("asset_type")
+    if asset_type not in (None, "stock", "crypto"):
+        return jsonify({"error": "asset_type must be one of stock, crypto"}), 400
+
+    try:
+        started = time.time()
+        result = analyze_single_asset(symbol.upper(), {"stock": "america"}.get(asset_type, asset_type))
+        if result is None:
+            return jsonify({"error": f"No analysis available for {symbol.upper()}"}), 404
+        logging.info(f"Analyzed {result.symbol} in {(time.time() - started) * 1000:.0f} ms")
+        # Same record shape as the result lists of /api/analysis/latest
+        return jsonify({
+            "timestamp": datetime.now().isoformat(),
+            "asset": {column.replace(" ", "_"): value for column, value in result.to_record(TOP_COLUMNS).items()}
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/analysis/status', methods=['GET'])
 def get_analysis_status():
-    """Get the current status of any running analysis."""
+    """Get the status of the latest analysis run."""
     if not authenticate(request):
         return jsonify({"error": "Unauthorized"}), 401
-    
-    # Calculate elapsed time if analysis is running
-    elapsed_time = None
-    if analysis_status["is_running"] and analysis_status["start_time"]:
-        elapsed_time = (datetime.now() - analysis_status["start_time"]).total_seconds() * 1000
-    
-    return jsonify({
-        "is_running": analysis_status["is_running"],
-        "current_step": analysis_status["current_step"],
-        "total_steps": analysis_status["total_steps"],
-        "current_step_name": analysis_status["current_step_name"],
-        "elapsed_time": elapsed_time,
-        "logs": analysis_status["logs"]
-    })
+
+    job = job_runner.latest("analysis")
+    if job is None:
+        return jsonify({
+            "is_running": False,
+            "current_step": 0,
+            "total_steps": 5,
+            "current_step_name": "",
+            "elapsed_time": None,
+            "logs": []
+        })
+
+    status = job.to_dict(include_result=False)
+    # Elapsed time in milliseconds, while running
+    status["elapsed_time"] = job.elapsed_seconds() * 1000 if job.is_active and job.started_at else None
+    return jsonify(status)
+
+def analysis_job(job):
+    """Run one analysis on the job worker and publish its result."""
+    job.set_step(1, "Initializing data fetching")
+
+    # Step 2-4: Run the actual analysis from main.py
+    job.set_step(2, "Running complete analysis")
+    results, report = main_run_analysis(send_messages=True, progress=job.publish, source="api")
+    logging.info(f"Processing results - best_stocks: {len(results['best_stocks'])} rows")
+    logging.info(f"Processing results - best_cryptos: {len(results['best_cryptos'])} rows")
+
+    # Step 5: Finalizing
+    job.set_step(5, "Finalizing results")
+
+    # The report's API view already uses underscore column names for the frontend
+    result = report.to_dict()
+
+    # Set an environment variable to tell the app not to clear cache on restart
+    os.environ["PRESERVE_ANALYSIS_CACHE"] = "true"
+
+    # Cache for 24 hours (main_run_analysis already recorded it in the history)
+    record_analysis(result, expiry_seconds=86400)
+    prepared = prepared_responses.get("latest", result)
+    logging.info(f"Cached analysis results (cache size: {len(prepared.body)} bytes, {len(prepared.gzipped)} gzipped)")
+
+    logging.info(f"Analysis completed in {job.elapsed_seconds():.2f} seconds")
+    return result
 
 @app.route('/api/analysis/run', methods=['POST'])
 def run_analysis():
-    """Run a new analysis."""
+    """Start a new analysis in the background; returns its job id and event stream token."""
     if not authenticate(request):
         return jsonify({"error": "Unauthorized"}), 401
-    
-    if analysis_status["is_running"]:
+
+    job, started = job_runner.submit_once("analysis", analysis_job)
+    if not started:
         return jsonify({
-            "success": False, 
+            "success": False,
             "error": "Analysis is already running",
-            "status": analysis_status
+            "job_id": job.id,
+            "stream_token": job.stream_token,
+            "status": job.to_dict(include_result=False)
         })
-    
+
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status_url": f"/api/analysis/jobs/{job.id}",
+        "stream_token": job.stream_token,
+        "events_url": f"/api/analysis/jobs/{job.id}/events?token={job.stream_token}"
+    }), 202
+
+@app.route('/api/analysis/jobs', methods=['GET'])
+def list_analysis_jobs():
+    """List recent analysis jobs (without their results), most recent first."""
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify([job.to_dict(include_result=False) for job in job_runner.jobs()])
+
+@app.route('/api/analysis/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Get one job's progress, logs and, once it succeeded, its result."""
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    data = job.to_dict()
     try:
-        # Reset status
-        analysis_status["is_running"] = True
-        analysis_status["start_time"] = datetime.now()
-        analysis_status["current_step"] = 1
-        analysis_status["current_step_name"] = "Initializing data fetching"
-        analysis_status["logs"] = []
-        
-        add_log("Starting new analysis run")
-        
-        # Step 1: Initialize
-        add_log("Initializing data fetching")
-        time.sleep(1)  # Simulate initialization work
-        
-        # Capture all output from main.py
-        import io
-        import sys
-        old_stdout = sys.stdout
-        captured_output = io.StringIO()
-        sys.stdout = captured_output
-        
-        try:
-            # Use your actual analysis function from main.py
-            add_log("Running main analysis code...")
-            
-            # Step 2-4: Run the actual analysis from main.py
-            analysis_status["current_step"] = 2
-            analysis_status["current_step_name"] = "Running complete analysis"
-            best_stocks, top_stocks, best_cryptos, top_cryptos, wallet_stocks, wallet_cryptos = main_analyze_assets(send_messages=True)
-            
-            # Add debug logging
-            add_log(f"Processing results - best_stocks: {best_stocks.shape if not best_stocks.empty else 'empty'}")
-            add_log(f"Processing results - best_cryptos: {best_cryptos.shape if not best_cryptos.empty else 'empty'}")
-            
-            # Get output from main.py and add to logs
-            output = captured_output.getvalue()
-            for line in output.strip().split('\n'):
-                if line:
-                    add_log(f"MAIN: {line}")
-        finally:
-            # Restore stdout
-            sys.stdout = old_stdout
-        
-        # Step 5: Finalizing
-        analysis_status["current_step"] = 5
-        analysis_status["current_step_name"] = "Finalizing results"
-        add_log("Preparing final results")
-        
-        # Normalize DataFrame columns for consistent frontend handling
-        def normalize_df(df):
-            if df.empty:
-                return df
-                
-            # Replace spaces with underscores in column names
-            df.columns = [col.replace(' ', '_') for col in df.columns]
-            return df
-        
-        # Normalize all DataFrames before converting to dict
-        best_stocks = normalize_df(best_stocks)
-        top_stocks = normalize_df(top_stocks)
-        best_cryptos = normalize_df(best_cryptos)
-        top_cryptos = normalize_df(top_cryptos)
-        wallet_stocks = normalize_df(wallet_stocks)
-        wallet_cryptos = normalize_df(wallet_cryptos)
-        
-        # Create result dict
-        result = {
-            "timestamp": datetime.now().isoformat(),
-            "best_stocks": best_stocks.to_dict(orient="records") if not best_stocks.empty else [],
-            "top_stocks": top_stocks.to_dict(orient="records") if not top_stocks.empty else [],
-            "best_cryptos": best_cryptos.to_dict(orient="records") if not best_cryptos.empty else [],
-            "top_cryptos": top_cryptos.to_dict(orient="records") if not top_cryptos.empty else [],
-            "wallet_stocks": wallet_stocks.to_dict(orient="records") if not wallet_stocks.empty else [],
-            "wallet_cryptos": wallet_cryptos.to_dict(orient="records") if not wallet_cryptos.empty else []
-        }
-        
-        # Log the size of each result component
-        add_log(f"Result JSON sizes - best_stocks: {len(result['best_stocks'])}, best_cryptos: {len(result['best_cryptos'])}")
-        
-        # Calculate execution time
-        end_time = datetime.now()
-        execution_time = (end_time - analysis_status["start_time"]).total_seconds()
-        add_log(f"Analysis completed in {execution_time:.2f} seconds")
-        
-        # Set an environment variable to tell the app not to clear cache on restart
-        os.environ["PRESERVE_ANALYSIS_CACHE"] = "true"
-        
-        # Make sure to cache the results properly
-        analysis_cache.set("latest_analysis", result, expiry_seconds=86400)  # Cache for 24 hours
-        
-        # Print debug info about cache
-        add_log(f"Cached analysis results (cache size: {len(json.dumps(result))} bytes)")
-        
-        # Save to history (limited to last 10 analyses)
-        analysis_history.append(result)
-        if len(analysis_history) > 10:
-            analysis_history.pop(0)
-        
-        # Update status    
-        analysis_status["is_running"] = False
-        
-        # Debug column names
-        for df_name, df in [
-            ("best_stocks", best_stocks), 
-            ("top_stocks", top_stocks),
-            ("best_cryptos", best_cryptos),
-            ("top_cryptos", top_cryptos),
-            ("wallet_stocks", wallet_stocks),
-            ("wallet_cryptos", wallet_cryptos)
-        ]:
-            if not df.empty:
-                add_log(f"{df_name} columns: {list(df.columns)}")
-            else:
-                add_log(f"{df_name} is empty")
-        
-        return jsonify({
-            "success": True, 
-            "message": f"Analysis completed in {execution_time:.2f} seconds", 
-            "data": result,
-            "execution_time": execution_time,
-            "logs": analysis_status["logs"]
-        })
-    except Exception as e:
-        error_message = str(e)
-        add_log(f"Error during analysis: {error_message}", "error")
-        analysis_status["is_running"] = False
-        return jsonify({
-            "success": False, 
-            "error": error_message,
-            "logs": analysis_status["logs"]
-        }), 500
+        query = parse_query(request.args)
+        # The same query parameters as /api/analysis/latest apply to the result
+        if query is not None and data["result"] is not None:
+            data["result"] = run_query(columnar_results.get("job", job.result), query)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(data)
+
+def format_sse(event_id, event, data):
+    """Format one Server-Sent Event."""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_job_events(job, last_event_id):
+    """Yield the job's events after `last_event_id` until it ends or the stream idles out."""
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    idle = 0
+    while True:
+        events = job.events_since(last_event_id, timeout=SSE_KEEPALIVE_SECONDS)
+        for event_id, event, data in events:
+            yield format_sse(event_id, event, data)
+            last_event_id = event_id
+        if not job.is_active and not job.events_since(last_event_id):
+            return
+        if events:
+            idle = 0
+            continue
+        idle += SSE_KEEPALIVE_SECONDS
+        if idle >= SSE_IDLE_TIMEOUT:
+            return
+        yield ": keepalive\n\n"
+
+@app.route('/api/analysis/jobs/<job_id>/events', methods=['GET'])
+def get_analysis_job_events(job_id):
+    """
+    Stream a job's progress as Server-Sent Events: "step", "log", "asset",
+    then "result" (or "failed") and "end". Resumes after Last-Event-ID.
+
+    EventSource cannot send the X-API-Key header, so the stream also accepts
+    the job's short-lived stream token (returned by POST /api/analysis/run)
+    as ?token=.
+    """
+    job = job_runner.get(job_id)
+    if not authenticate(request) and not (job is not None and job.accepts_stream_token(request.args.get("token"))):
+        return jsonify({"error": "Unauthorized"}), 401
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0)
+    except ValueError:
+        last_event_id = 0
+
+    return Response(
+        stream_with_context(stream_job_events(job, last_event_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint for Docker."""
     return jsonify({"status": "healthy"}), 200
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Current request rate of every upstream budget (adaptive ones include AIMD counters)."""
+    if not authenticate(request):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify({"rate_limits": get_rate_metrics()})
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -352,6 +428,26 @@ def get_latest_analysis_alias():
 def get_analysis_history_alias():
     return get_analysis_history()
 
+@app.route('/asset/<symbol>', methods=['GET'])
+def get_asset_alias(symbol):
+    return get_asset(symbol)
+
+@app.route('/history/runs', methods=['GET'])
+def list_history_runs_alias():
+    return list_history_runs()
+
+@app.route('/history/runs/<int:run_id>', methods=['GET'])
+def get_history_run_alias(run_id):
+    return get_history_run(run_id)
+
+@app.route('/history/assets', methods=['GET'])
+def get_history_assets_alias():
+    return get_history_assets()
+
+@app.route('/history/assets/<symbol>', methods=['GET'])
+def get_history_asset_alias(symbol):
+    return get_history_asset(symbol)
+
 @app.route('/analysis/status', methods=['GET'])
 def get_analysis_status_alias():
     return get_analysis_status()
@@ -360,6 +456,18 @@ def get_analysis_status_alias():
 def run_analysis_alias():
     return run_analysis()
 
+@app.route('/analysis/jobs', methods=['GET'])
+def list_analysis_jobs_alias():
+    return list_analysis_jobs()
+
+@app.route('/analysis/jobs/<job_id>', methods=['GET'])
+def get_analysis_job_alias(job_id):
+    return get_analysis_job(job_id)
+
+@app.route('/analysis/jobs/<job_id>/events', methods=['GET'])
+def get_analysis_job_events_alias(job_id):
+    return get_analysis_job_events(job_id)
+
 @app.route('/api/analysis/example', methods=['GET'])
 def get_example_analysis():
     """Return example analysis data for testing."""
@@ -427,4 +535,6 @@ def get_analysis_debug():
     })
 
 if __name__ == '__main__':
+    # Job logs are captured from the root logger, which must pass INFO records
+    setup_logging()
     app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
@@ -1,52 +1,54 @@
 """Enhanced persistent cache for API data."""
 
 import os
-import json
 import time
-from datetime import datetime
+
+from utils.cache import SQLiteStore, sqlite_path
 
 class PersistentCache:
     """A cache that persists to disk with improved reliability."""
-    
+
     def __init__(self, cache_file="analysis_cache.json", initial_data=None, expiry_seconds=86400):
         self.cache_file = cache_file
         self.expiry_seconds = expiry_seconds
-        self.cache = initial_data or self._load_cache()
-        
-        # Save cache immediately if initial data was provided
+        self.store = SQLiteStore(sqlite_path(cache_file))
+
+        # One-time migration from the old whole-file JSON cache
+        if os.path.exists(cache_file) and cache_file != self.store.db_file and self.store.count() == 0:
+            migrated = self.store.migrate_json(cache_file)
+            print(f"Migrated {migrated} cache entries from {cache_file} to {self.store.db_file}")
+
         if initial_data:
-            self._save_cache()
-    
+            self.store.put_many(initial_data)
+        self.cache = self._load_cache()
+
     def _load_cache(self):
-        """Load cache from file."""
+        """Load cache from the store."""
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    data = json.load(f)
-                    print(f"Successfully loaded cache with {len(data.keys() if isinstance(data, dict) else data)} entries")
-                    return data
+            data = self.store.load_all()
+            print(f"Successfully loaded cache with {len(data)} entries")
+            return data
         except Exception as e:
             print(f"Error loading cache: {e}")
         return {}
-    
-    def _save_cache(self):
-        """Save cache to file."""
+
+    def _save_entry(self, key):
+        """Write a single entry to the store."""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
-            print(f"Successfully saved cache to {self.cache_file}")
+            self.store.put(key, self.cache[key])
+            print(f"Successfully saved {key} to {self.store.db_file}")
             return True
         except Exception as e:
             print(f"Error saving cache: {e}")
             return False
-    
+
     def get(self, key):
         """Get value from cache."""
         if key in self.cache and isinstance(self.cache[key], dict):
             entry = self.cache[key]
             # Check if entry has timestamp and is not expired
             if 'timestamp' in entry and 'data' in entry:
-                if time.time() - entry['timestamp'] < self.expiry_seconds:
+                if time.time() - entry['timestamp'] < entry.get('expiry', self.expiry_seconds):
                     print(f"Cache hit for {key} (age: {(time.time() - entry['timestamp'])/60:.1f} minutes)")
                     return entry['data']
                 else:
@@ -56,7 +58,7 @@ class PersistentCache:
                 print(f"Cache hit for {key} (legacy format)")
                 return entry
         return None
-    
+
     def set(self, key, value, expiry_seconds=None):
         """Set value in cache."""
         expiry = expiry_seconds if expiry_seconds is not None else self.expiry_seconds
@@ -66,10 +68,26 @@ class PersistentCache:
             'expiry': expiry
         }
         print(f"Added {key} to cache with expiry {expiry} seconds")
-        # Save immediately for reliability
-        return self._save_cache()
-    
+        # Save immediately for reliability (only this entry is written)
+        return self._save_entry(key)
+
+    def clear_expired(self):
+        """Remove expired entries from cache."""
+        now = time.time()
+        expired_keys = [
+            key for key, entry in self.cache.items()
+            if isinstance(entry, dict) and 'timestamp' in entry
+            and now - entry['timestamp'] > entry.get('expiry', self.expiry_seconds)
+        ]
+        for key in expired_keys:
+            del self.cache[key]
+        if expired_keys:
+            self.store.delete_many(expired_keys)
+            self.store.compact()
+            print(f"Cleared {len(expired_keys)} expired cache entries")
+
     def clear(self):
         """Clear cache."""
         self.cache = {}
-        return self._save_cache() 
\ No newline at end of file
+        self.store.clear()
+        return True
@@ -1,11 +1,12 @@
 import os
 import logging
-import pandas as pd
-import asyncio
+import numpy as np
 import time
 import json
 import sys
 import concurrent.futures
+import itertools
+import threading
 import logging.handlers
 import signal
 
@@ -16,20 +17,26 @@ from dotenv import load_dotenv
 import yfinance as yf
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from telegram.error import TimedOut
-from telegram import Bot
-from tradingview_ta import TA_Handler, Interval
+from tradingview_ta import Interval
 
-from utils.analysis import analyze_assets, get_tradingview_analysis
-from utils.price import get_current_price
-from utils.telegram import send_message_to_telegram, delete_previous_messages
+from utils.price import get_current_price, get_current_prices
+from utils.notifications import NotificationService
+from utils.outbox import NotificationOutbox
+from utils.history import AnalysisHistory
+from utils.jobs import in_job_context
 from utils.config import (
     TOP_STOCKS, TOP_CRYPTOS, TOP_ASSETS, WALLET_STOCKS, WALLET_CRYPTOS,
     DEFAULT_STOP_LOSS, DEFAULT_RISK_REWARD_RATIO, SCHEDULED_TIMES
 )
-from utils.rate_limiter import rate_limited
 from utils.cache import PersistentCache
-from utils.email import send_email
+from utils.rate_limiter import get_rate_metrics
+from utils.tradingview import make_key, interval_ttl, fetch_analysis, fetch_multi_interval_batch, TIMEFRAMES
+from utils.resolver import ExchangeResolver
+from utils.indicators import fetch_local_analysis, fetch_local_multi_interval_batch
+from utils.scoring import evaluate_asset, score_assets, unscorable_intervals
+from utils.results import AssetResult, IndicatorMatrix, WALLET_COLUMNS, to_frame
+from utils.report import build_report
+from utils.email import queue_email, get_email_outbox
 
 # -----------------------------------------------------------------------------
 # Load environment variables from .env file
@@ -43,7 +50,7 @@ load_dotenv(ENV_FILE)
 # -----------------------------------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
-CACHE_DIR = os.path.join(BASE_DIR, 'data', 'cache')
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, 'data', 'cache')
 
 # Create directories if they don't exist
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -52,7 +59,10 @@ os.makedirs(CACHE_DIR, exist_ok=True)
 # File paths
 LOG_FILE = os.path.join(LOG_DIR, 'trading_bot.log')
 TELEGRAM_MESSAGES_FILE = os.path.join(CACHE_DIR, 'telegram_messages.json')
+NOTIFICATION_OUTBOX_FILE = os.path.join(CACHE_DIR, 'notification_outbox.sqlite')
+ANALYSIS_HISTORY_FILE = os.path.join(CACHE_DIR, 'analysis_history.sqlite')
 ANALYSIS_CACHE_FILE = os.path.join(CACHE_DIR, 'analysis_cache.json')
+EXCHANGE_INDEX_FILE = os.path.join(CACHE_DIR, 'exchange_index.json')
 
 # -----------------------------------------------------------------------------
 # Logging Configuration
@@ -142,7 +152,24 @@ WALLET_CRYPTOS = ["BTC", "DEGEN","JUP", "PEPE", "WIF", "XRP"]
 # -----------------------------------------------------------------------------
 # Global Cache for TradingView Analysis (for improved performance)
 # -----------------------------------------------------------------------------
-analysis_cache = PersistentCache(cache_file="analysis_cache.json", expiry_seconds=3600)
+# Entries expire per interval (see INTERVAL_TTLS). With ANALYSIS_STALE_SECONDS > 0,
+# expired entries younger than that are served while being refreshed in the background.
+analysis_cache = PersistentCache(cache_file="analysis_cache.json", expiry_seconds=3600, ttl_policy=interval_ttl)
+ANALYSIS_STALE_SECONDS = int(os.getenv("ANALYSIS_STALE_SECONDS", "0"))
+
+# Where analyses come from: "tradingview" (scanner requests) or "local"
+# (indicators computed from the local OHLCV store, see utils/indicators.py)
+ANALYSIS_SOURCE = os.getenv("ANALYSIS_SOURCE", "tradingview").lower()
+
+def analysis_key(symbol: str, exchange: str, screener: str, interval=Interval.INTERVAL_1_DAY) -> tuple:
+    """Cache key of an analysis from the configured ANALYSIS_SOURCE."""
+    return make_key(symbol, exchange, screener, interval, source="local" if ANALYSIS_SOURCE == "local" else "tradingview")
+
+# Persistent symbol -> (ticker, exchange, screener) index used instead of per-symbol probing
+exchange_index = ExchangeResolver(cache_file=EXCHANGE_INDEX_FILE)
+
+# Every run's results, shared by scheduled and API-triggered runs (see utils/history.py)
+analysis_history = AnalysisHistory(ANALYSIS_HISTORY_FILE)
 
 # -----------------------------------------------------------------------------
 # Helper: Recommendation Priority (for secondary sorting)
@@ -171,6 +198,18 @@ def calculate_take_profit_atr(entry_price, atr_value, atr_stop_loss_multiplier=1
     risk_amount = atr_stop_loss_multiplier * atr_value
     return entry_price + (risk_reward_ratio * risk_amount)
 
+def calculate_take_profits(entry_prices, atr_values, stop_loss_percent=DEFAULT_STOP_LOSS, risk_reward_ratio=DEFAULT_RISK_REWARD_RATIO,
+                           atr_stop_loss_multiplier=1.5, atr_risk_reward_ratio=2.0):
+    """
+    Column-wise take profit: calculate_take_profit_atr where the ATR is known,
+    calculate_take_profit otherwise. None entries are NaN in the result.
+    """
+    entry_prices = np.array(entry_prices, dtype=float)
+    atr_values = np.array(atr_values, dtype=float)
+    atr_take_profit = entry_prices + (atr_risk_reward_ratio * (atr_stop_loss_multiplier * atr_values))
+    percent_take_profit = entry_prices * (1 + abs(stop_loss_percent) * risk_reward_ratio)
+    return np.where(np.isnan(atr_values), percent_take_profit, atr_take_profit)
+
 # -----------------------------------------------------------------------------
 # Utility Functions for Technical Analysis
 # -----------------------------------------------------------------------------
@@ -178,125 +217,116 @@ def detect_asset_type(symbol: str) -> str:
     return "crypto" if symbol in TOP_CRYPTOS else "america"
 
 def detect_crypto_exchange(symbol: str):
-    exchanges = ["BINANCE", "COINBASE", "KRAKEN"]
-    for exchange in exchanges:
-        try:
-            test_symbol = symbol.upper() + "USDT"
-            test_analysis = get_tradingview_analysis(test_symbol, exchange, "crypto", interval=Interval.INTERVAL_1_DAY)
-            if "error" not in test_analysis:
-                return test_symbol, exchange
-        except Exception as e:
-            logging.debug(f"Exchange {exchange} test failed for {symbol}: {e}")
-    return None, None
+    """Return (ticker, exchange) for a crypto symbol from the exchange index."""
+    return exchange_index.resolve(symbol, "crypto")
 
 def detect_stock_exchange(symbol: str):
-    exchanges = ["NASDAQ", "NYSE", "AMEX"]
-    for exchange in exchanges:
-        try:
-            test_analysis = get_tradingview_analysis(symbol, exchange, "america", interval=Interval.INTERVAL_1_DAY)
-            if "error" not in test_analysis:
-                return symbol, exchange
-        except Exception as e:
-            logging.debug(f"Exchange {exchange} test failed for {symbol}: {e}")
-    return None, None
+    """Return (ticker, exchange) for a stock symbol from the exchange index."""
+    return exchange_index.resolve(symbol, "america")
 
-@rate_limited(calls_per_second=2)  # Limit to 2 calls per second
 def get_tradingview_analysis(symbol: str, exchange: str, screener: str, interval=Interval.INTERVAL_1_DAY) -> dict:
     """
     Retrieve TradingView analysis for the specified asset.
     Uses a persistent cache to reduce repeated API calls.
+    With ANALYSIS_SOURCE=local the analysis is computed from stored bars instead.
     """
-    key = (symbol.upper(), exchange, screener, interval)
+    key = analysis_key(symbol, exchange, screener, interval)
+    fetch = fetch_local_analysis if ANALYSIS_SOURCE == "local" else fetch_analysis
     
-    # Check cache first
-    cached_result = analysis_cache.get(key)
-    if cached_result:
-        return cached_result
-    
-    try:
-        handler = TA_Handler(
-            symbol=symbol.upper(),
-            screener=screener,
-            exchange=exchange,
-            interval=interval
-        )
-        analysis = handler.get_analysis()
-        result = {
-            "symbol": symbol.upper(),
-            "exchange": exchange,
-            "timeframe": interval,
-            "recommendation": analysis.summary.get("RECOMMENDATION", "N/A"),
-            "oscillators": analysis.oscillators.get("RECOMMENDATION", "N/A"),
-            "moving_averages": analysis.moving_averages.get("RECOMMENDATION", "N/A"),
-            "RSI": analysis.indicators.get("RSI", 50),
-            "MACD_hist": analysis.indicators.get("MACD.macd", 0) - analysis.indicators.get("MACD.signal", 0),
-            "indicators": analysis.indicators
-        }
-        
-        # Store in cache
-        analysis_cache.set(key, result)
-        return result
-    except Exception as e:
-        return {"symbol": symbol.upper(), "exchange": exchange, "error": str(e)}
-
-def evaluate_asset(daily_analysis: dict, weekly_analysis: dict = None) -> int:
-    """
-    Evaluate an asset and return a score from 0 to 100.
-    Uses recommendation, RSI, MACD histogram, moving averages, and ATR.
-    """
-    score = 50  # Base score
-
-    # Recommendation adjustment
-    rec = daily_analysis.get("recommendation", "NEUTRAL").upper()
-    rec_adjustment = {"STRONG_BUY": 20, "BUY": 10, "NEUTRAL": 0, "SELL": -10, "STRONG_SELL": -20}
-    score += rec_adjustment.get(rec, 0)
-
-    # RSI adjustment: best is near 50
-    rsi = daily_analysis.get("RSI", 50)
-    rsi_adjustment = 10 - abs(rsi - 50) * 0.5
-    score += rsi_adjustment
-
-    # MACD histogram adjustment
-    macd_hist = daily_analysis.get("MACD_hist", 0)
-    if macd_hist > 0:
-        score += 10
-    elif macd_hist < 0:
-        score -= 10
-
-    # Moving averages signal
-    ma_signal = daily_analysis.get("moving_averages", "NEUTRAL").upper()
-    if ma_signal in ["BUY", "STRONG_BUY"]:
-        score += 10
-    elif ma_signal in ["SELL", "STRONG_SELL"]:
-        score -= 10
-
-    # Volatility adjustment (using ATR)
-    atr = daily_analysis.get("indicators", {}).get("ATR", None)
-    if atr is not None:
-        if atr < 1:
-            score += 5
-        elif atr > 2:
-            score -= 5
-
-    # Weekly analysis adjustment (if provided)
-    if weekly_analysis and "error" not in weekly_analysis:
-        weekly_rec = weekly_analysis.get("recommendation", "NEUTRAL").upper()
-        weekly_adjustment = {"STRONG_BUY": 10, "BUY": 5, "NEUTRAL": 0, "SELL": -5, "STRONG_SELL": -10}
-        score += weekly_adjustment.get(weekly_rec, 0)
-
-    # Ensure score is between 0 and 100
-    return max(0, min(100, int(score)))
-
-def get_timeframe_scores(symbol: str, exchange: str, asset_type: str):
+    # Served from cache when possible; concurrent misses share one request
+    return analysis_cache.get_or_set(
+        key,
+        lambda: fetch(symbol, exchange, screener, interval),
+        cache_if=lambda result: "error" not in result,
+        stale_seconds=ANALYSIS_STALE_SECONDS
+    )
+
+def fetch_timeframes(keys) -> dict:
+    """
+    Fetch every timeframe in TIMEFRAMES for many (symbol, exchange, screener) keys
+    from the configured ANALYSIS_SOURCE, caching each result in analysis_cache.
+    """
+    if ANALYSIS_SOURCE == "local":
+        return fetch_local_multi_interval_batch(keys, TIMEFRAMES, cache=analysis_cache)
+    return fetch_multi_interval_batch(keys, TIMEFRAMES, cache=analysis_cache)
+
+def get_multi_timeframe_analysis(symbol: str, exchange: str, screener: str) -> dict:
+    """
+    Retrieve the analyses of every timeframe in TIMEFRAMES for one asset.
+    Missing intervals are fetched together in a single scanner request.
+    Returns a dict {interval: analysis dict}.
+    """
+    key = (symbol.upper(), exchange, screener)
+    flight_key = ("multi",) + key
+
+    def load():
+        return fetch_timeframes([key])[key]
+
+    # Stale-while-revalidate: answer from cache if every interval is usable
+    lookups = {
+        interval: analysis_cache.lookup(analysis_key(symbol, exchange, screener, interval), ANALYSIS_STALE_SECONDS)
+        for interval in TIMEFRAMES
+    }
+    if all(value is not None for value, _ in lookups.values()):
+        if not all(fresh for _, fresh in lookups.values()):
+            analysis_cache.refresh_in_background(flight_key, load)
+        return {interval: value for interval, (value, _) in lookups.items()}
+
+    return analysis_cache.single_flight(flight_key, load)
+
+def prefetch_tradingview_analysis(assets):
+    """
+    Warm the exchange index and analysis cache for many assets in bulk.
+
+    Symbols missing from the exchange index are resolved with one scanner
+    query per screener, then every timeframe of every resolved asset is
+    fetched in one scanner request per screener. detect_*_exchange and
+    analyze_single_asset are then served from the index and the cache.
+
+    Args:
+        assets: List of (asset, asset_type) tuples, asset_type being "crypto" or "america"
+    """
+    resolved = exchange_index.resolve_many(assets)
+    keys = [
+        (ticker, exchange, asset_type)
+        for (asset, asset_type), (ticker, exchange) in resolved.items()
+        if ticker
+    ]
+    fetch_timeframes(keys)
+    return resolved
+
+def prefetch_current_prices(resolved):
+    """
+    Download the current price of every resolved asset in one Yahoo request.
+    The prices are memoised, so later get_current_price calls in the run are free.
+
+    Args:
+        resolved: {(asset, asset_type): (ticker, exchange)} as returned by prefetch_tradingview_analysis
+    """
+    assets = []
+    tv_indicators = {}
+    for (asset, asset_type), (ticker, exchange) in resolved.items():
+        if not ticker:
+            continue
+        assets.append((ticker, asset_type))
+        daily = analysis_cache.get(analysis_key(ticker, exchange, asset_type, Interval.INTERVAL_1_DAY)) or {}
+        tv_indicators[ticker] = daily.get("indicators")
+    get_current_prices(assets, tv_indicators=tv_indicators)
+
+def get_timeframe_scores(symbol: str, exchange: str, asset_type: str, analyses: dict = None):
     """
     Get scores for short, mid, and long timeframes.
     Short: 15-minute interval; Mid: 1-hour interval; Long: daily (with weekly bonus).
+    `analyses` is the per-interval dict from get_multi_timeframe_analysis; it is
+    fetched when not provided.
     Returns a tuple: (short_score, mid_score, long_score)
     """
-    short_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_15_MINUTES)
-    mid_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_1_HOUR)
-    long_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_1_DAY)
-    weekly_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_1_WEEK)
+    if analyses is None:
+        analyses = get_multi_timeframe_analysis(symbol, exchange, asset_type)
+    short_analysis = analyses[Interval.INTERVAL_15_MINUTES]
+    mid_analysis = analyses[Interval.INTERVAL_1_HOUR]
+    long_analysis = analyses[Interval.INTERVAL_1_DAY]
+    weekly_analysis = analyses[Interval.INTERVAL_1_WEEK]
     
     short_score = evaluate_asset(short_analysis, None) if "error" not in short_analysis else 0
     mid_score   = evaluate_asset(mid_analysis, None) if "error" not in mid_analysis else 0
@@ -307,246 +337,182 @@ def get_timeframe_scores(symbol: str, exchange: str, asset_type: str):
 # -----------------------------------------------------------------------------
 # Main Analysis Function (includes wallet assets and multi-timeframe evaluation)
 # -----------------------------------------------------------------------------
-def analyze_assets(send_messages=False):
+def collect_results(progress=None) -> dict:
     """
-    Main analysis function used by both command line and API.
-    
+    Run the analysis of TOP_ASSETS and the wallets.
+
     Args:
-        send_messages: Whether to send Telegram/email messages (True for CLI, False for API)
-    
+        progress: Optional callable(event, data) told about each fetched asset
+            ("asset": asset, completed, total, found) as it finishes
+
     Returns:
-        Tuple of DataFrames containing analysis results
+        dict: "best_stocks", "top_stocks", "best_cryptos", "top_cryptos",
+        "wallet_stocks" and "wallet_cryptos", each a list of AssetResult
     """
-    print("Starting analysis process...")
-    stock_results = []
-    crypto_results = []
-
-    # Process assets in parallel
+    # Warm the caches with bulk scanner and price requests before the per-asset workers run
+    resolved = prefetch_tradingview_analysis(
+        [(asset, detect_asset_type(asset)) for asset in TOP_ASSETS]
+        + [(asset, "america") for asset in WALLET_STOCKS]
+        + [(asset, "crypto") for asset in WALLET_CRYPTOS]
+    )
+    prefetch_current_prices(resolved)
+
+    # Retrieve the analyses of TOP_ASSETS in parallel (served from the warmed cache)
+    fetch = fetch_asset_analyses
+    if progress is not None:
+        completed = itertools.count(1)
+        completed_lock = threading.Lock()
+
+        def fetch(asset):
+            fetched = fetch_asset_analyses(asset)
+            with completed_lock:
+                count = next(completed)
+            progress("asset", {"asset": asset, "completed": count, "total": len(TOP_ASSETS), "found": fetched is not None})
+            return fetched
+
+    # The workers log into the analysis job that runs this (if any)
     with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        # Process TOP_ASSETS
-        futures = []
-        for asset in TOP_ASSETS:
-            futures.append(executor.submit(analyze_single_asset, asset))
-        
-        # Collect results
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                if result["Asset_Type"] == "crypto":
-                    crypto_results.append(result)
-                else:
-                    stock_results.append(result)
-
-    # Build DataFrames and sort by Score (highest first)
-    df_stocks = pd.DataFrame(stock_results)
-    df_cryptos = pd.DataFrame(crypto_results)
-    df_stocks_filtered = df_stocks[df_stocks["Score"] > 0].sort_values(by="Score", ascending=False)
-    df_cryptos_filtered = df_cryptos[df_cryptos["Score"] > 0].sort_values(by="Score", ascending=False)
-
-    top_stocks = df_stocks_filtered.head(10).copy()
-    top_cryptos = df_cryptos_filtered.head(10).copy()
-    best_stocks = top_stocks.head(6)
-    best_cryptos = top_cryptos.head(6)
+        fetched_assets = [
+            (asset, fetched)
+            for asset, fetched in zip(TOP_ASSETS, executor.map(in_job_context(fetch), TOP_ASSETS))
+            if fetched
+        ]
+
+    # Score the whole universe at once; daily indicators go into one shared matrix
+    scores = score_rows([fetched for _, fetched in fetched_assets])
+    matrix = IndicatorMatrix.from_dicts([
+        fetched[3][Interval.INTERVAL_1_DAY].get("indicators") for _, fetched in fetched_assets
+    ])
+    results = [
+        build_asset_result(asset, *fetched, asset_scores, matrix=matrix, row=row)
+        for row, ((asset, fetched), asset_scores) in enumerate(zip(fetched_assets, scores))
+    ]
+
+    # Keep assets with a positive score, highest first
+    ranked = sorted((result for result in results if result.score > 0), key=lambda result: -result.score)
+    top_stocks = [result for result in ranked if result.asset_type != "crypto"][:10]
+    top_cryptos = [result for result in ranked if result.asset_type == "crypto"][:10]
 
     # Update top assets with current price and take profit calculations.
-    for idx, row in top_stocks.iterrows():
-        # Linear regression prediction removed; set as None.
-        current_price = get_current_price(row["Symbol"], row["Asset_Type"], tv_indicators=row["Indicators"])
-        top_stocks.at[idx, "Current Price"] = current_price
-        if current_price is not None:
-            if row.get("ATR") is not None:
-                tp = calculate_take_profit_atr(current_price, row["ATR"], atr_stop_loss_multiplier=1.5, risk_reward_ratio=2.0)
-            else:
-                tp = calculate_take_profit(current_price, DEFAULT_STOP_LOSS, DEFAULT_RISK_REWARD_RATIO)
-            top_stocks.at[idx, "Take Profit"] = tp
-
-    for idx, row in top_cryptos.iterrows():
-        current_price = get_current_price(row["Symbol"], row["Asset_Type"], tv_indicators=row["Indicators"])
-        top_cryptos.at[idx, "Current Price"] = current_price
-        if current_price is not None:
-            if row.get("ATR") is not None:
-                tp = calculate_take_profit_atr(current_price, row["ATR"], atr_stop_loss_multiplier=1.5, risk_reward_ratio=2.0)
-            else:
-                tp = calculate_take_profit(current_price, DEFAULT_STOP_LOSS, DEFAULT_RISK_REWARD_RATIO)
-            top_cryptos.at[idx, "Take Profit"] = tp
-
-    # Process Wallet Assets (separately)
-    wallet_stocks_list = []
-    wallet_cryptos_list = []
-    for asset in WALLET_STOCKS:
-        symbol, exchange = detect_stock_exchange(asset)
-        if not symbol or not exchange:
-            logging.warning(f"Skipping wallet stock {asset}: Could not determine exchange/screener.")
-            continue
-        daily_analysis = get_tradingview_analysis(symbol, exchange, "america", interval=Interval.INTERVAL_1_DAY)
-        if "error" in daily_analysis:
-            logging.warning(f"Skipping wallet stock {symbol}: {daily_analysis['error']}")
-            continue
-        current_price = get_current_price(symbol, "america", tv_indicators=daily_analysis.get("indicators"))
-        rec = daily_analysis.get("recommendation", "N/A")
-        wallet_stocks_list.append({
-            "Symbol": symbol,
-            "Exchange": exchange,
-            "Daily Recommendation": rec,
-            "RSI": daily_analysis.get("RSI", 50),
-            "MACD_Hist": daily_analysis.get("MACD_hist", 0),
-            "Current Price": current_price,
-            "RecPriority": rec_priority(rec),
-            "Source": "Wallet"
-        })
-
-    for asset in WALLET_CRYPTOS:
-        symbol, exchange = detect_crypto_exchange(asset)
+    apply_prices_and_take_profits(top_stocks + top_cryptos)
+
+    return {
+        "best_stocks": top_stocks[:6],
+        "top_stocks": top_stocks,
+        "best_cryptos": top_cryptos[:6],
+        "top_cryptos": top_cryptos,
+        "wallet_stocks": collect_wallet_results(WALLET_STOCKS, "america"),
+        "wallet_cryptos": collect_wallet_results(WALLET_CRYPTOS, "crypto"),
+    }
+
+def collect_wallet_results(assets, asset_type) -> list:
+    """Build the wallet rows of one asset type, sorted by recommendation priority."""
+    label = "crypto" if asset_type == "crypto" else "stock"
+    detect = detect_crypto_exchange if asset_type == "crypto" else detect_stock_exchange
+    wallet = []
+    for asset in assets:
+        symbol, exchange = detect(asset)
         if not symbol or not exchange:
-            logging.warning(f"Skipping wallet crypto {asset}: Could not determine exchange/screener.")
+            logging.warning(f"Skipping wallet {label} {asset}: Could not determine exchange/screener.")
             continue
-        daily_analysis = get_tradingview_analysis(symbol, exchange, "crypto", interval=Interval.INTERVAL_1_DAY)
+        daily_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_1_DAY)
         if "error" in daily_analysis:
-            logging.warning(f"Skipping wallet crypto {symbol}: {daily_analysis['error']}")
+            logging.warning(f"Skipping wallet {label} {symbol}: {daily_analysis['error']}")
             continue
-        current_price = get_current_price(symbol, "crypto", tv_indicators=daily_analysis.get("indicators"))
         rec = daily_analysis.get("recommendation", "N/A")
-        wallet_cryptos_list.append({
-            "Symbol": symbol,
-            "Exchange": exchange,
-            "Daily Recommendation": rec,
-            "RSI": daily_analysis.get("RSI", 50),
-            "MACD_Hist": daily_analysis.get("MACD_hist", 0),
-            "Current Price": current_price,
-            "RecPriority": rec_priority(rec),
-            "Source": "Wallet"
-        })
-
-    wallet_stocks_df = pd.DataFrame(wallet_stocks_list).sort_values(by="RecPriority", ascending=True)
-    wallet_cryptos_df = pd.DataFrame(wallet_cryptos_list).sort_values(by="RecPriority", ascending=True)
-
-    # Create result DataFrames (ensure they're not empty)
-    best_stocks_df = pd.DataFrame(best_stocks) if not best_stocks.empty else pd.DataFrame()
-    top_stocks_df = pd.DataFrame(top_stocks)
-    best_cryptos_df = pd.DataFrame(best_cryptos) if not best_cryptos.empty else pd.DataFrame()
-    top_cryptos_df = pd.DataFrame(top_cryptos)
-    
-    # Format messages for Telegram and email
-    main_lines = []
-    main_lines.append("📊 Market Analysis Report")
-    main_lines.append("")
-
-    # Add best stocks
-    main_lines.append("🔥 Best Stock Picks (Top 6) 🔥")
-    main_lines.append("")
-    if not best_stocks_df.empty:
-        for _, row in best_stocks_df.iterrows():
-            try:
-                line = format_asset_line(row)
-                main_lines.append(line)
-                main_lines.append("")
-            except Exception as e:
-                print(f"Error formatting stock {row.get('Symbol', 'unknown')}: {e}")
-                main_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                main_lines.append("")
-    else:
-        main_lines.append("No bullish stocks found. 😔")
-        main_lines.append("")
-
-    # Add best cryptos
-    main_lines.append("🔥 Best Crypto Picks (Top 6) 🔥")
-    main_lines.append("")
-    if not best_cryptos_df.empty:
-        for _, row in best_cryptos_df.iterrows():
-            try:
-                line = format_asset_line(row)
-                main_lines.append(line)
-                main_lines.append("")
-            except Exception as e:
-                print(f"Error formatting crypto {row.get('Symbol', 'unknown')}: {e}")
-                main_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                main_lines.append("")
-    else:
-        main_lines.append("No bullish cryptos found. 😔")
-        main_lines.append("")
-
-    main_message = "\n".join(main_lines)
-
-    wallet_lines = []
-    wallet_lines.append("👜 My Stocks Wallet")
-    wallet_lines.append("")
-    if not wallet_stocks_df.empty:
-        for _, row in wallet_stocks_df.iterrows():
-            try:
-                line = format_asset_line(row)
-                wallet_lines.append(line)
-                wallet_lines.append("")
-            except Exception as e:
-                print(f"Error formatting wallet stock {row.get('Symbol', 'unknown')}: {e}")
-                wallet_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                wallet_lines.append("")
-    else:
-        wallet_lines.append("No wallet stocks data available. 😔")
-        wallet_lines.append("")
-
-    wallet_lines.append("👜 My Cryptos Wallet")
-    wallet_lines.append("")
-    if not wallet_cryptos_df.empty:
-        for _, row in wallet_cryptos_df.iterrows():
-            try:
-                line = format_asset_line(row)
-                wallet_lines.append(line)
-                wallet_lines.append("")
-            except Exception as e:
-                print(f"Error formatting wallet crypto {row.get('Symbol', 'unknown')}: {e}")
-                wallet_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                wallet_lines.append("")
+        wallet.append(AssetResult(
+            symbol, exchange, asset_type,
+            source="Wallet",
+            daily_recommendation=rec,
+            rsi=daily_analysis.get("RSI", 50),
+            macd_hist=daily_analysis.get("MACD_hist", 0),
+            current_price=get_current_price(symbol, asset_type, tv_indicators=daily_analysis.get("indicators")),
+            rec_priority=rec_priority(rec)
+        ))
+    return sorted(wallet, key=lambda result: result.rec_priority)
+
+def dispatch_report(report):
+    """
+    Send each view of a rendered report exactly once: the Telegram messages
+    (updating the previous run's) and, when enabled, the email.
+    """
+    logging.info(f"Attempting to send Telegram message, TELEGRAM_BOT_TOKEN: {BOT_TOKEN[:4]}..., CHAT_ID: {CHAT_ID}")
+    # Stored in the durable outbox and delivered in the background; the run
+    # keys each view by its creation time, so dispatching twice sends once
+    notification_outbox.enqueue(
+        "telegram_report", {"messages": list(report.telegram_messages)}, f"telegram_report:{report.created_at}"
+    )
+    logging.info("Telegram messages queued")
+
+    if os.getenv("EMAIL_ENABLED", "false").lower() == "true":
+        logging.info(f"Email enabled, attempting to send to: {os.getenv('EMAIL_RECIPIENT')}")
+        notification_outbox.enqueue(
+            "email", {"subject": report.subject, "text": report.email_text, "html": report.email_html},
+            f"email:{report.created_at}"
+        )
+        logging.info("Email queued")
     else:
-        wallet_lines.append("No wallet cryptos data available. 😔")
-        wallet_lines.append("")
+        logging.info("Email sending is disabled in environment variables")
 
-    wallet_message = "\n".join(wallet_lines)
+def run_analysis(send_messages=False, progress=None, source="scheduler"):
+    """
+    Run one analysis: collect the results, render the report once, record it
+    in the analysis history under `source` and, with `send_messages`,
+    dispatch it. `progress` is passed to collect_results().
+
+    Returns:
+        tuple: (results dict of AssetResult lists, Report)
+    """
+    logging.info("Starting analysis process...")
+    results = collect_results(progress)
+    report = build_report(results)
+
+    try:
+        analysis_history.record(report.to_dict(), source)
+    except Exception as e:
+        # A history write must not cost the run its notifications
+        logging.error(f"Error recording analysis history: {e}", exc_info=True)
 
     # Only send messages if requested (CLI mode)
     if send_messages:
         try:
-            # Format messages
-            main_lines = []
-            main_lines.append("📊 Market Analysis Report")
-            
-            print(f"Attempting to send Telegram message, TELEGRAM_BOT_TOKEN: {BOT_TOKEN[:4]}..., CHAT_ID: {CHAT_ID}")
-            
-            # Send to Telegram
-            asyncio.run(send_message_to_telegram(main_message, delete_old=True))
-            asyncio.run(send_message_to_telegram(wallet_message, delete_old=False))
-            
-            print("Telegram messages sent successfully")
-            
-            # Send to email
-            if os.getenv("EMAIL_ENABLED", "false").lower() == "true":
-                print(f"Email enabled, attempting to send to: {os.getenv('EMAIL_RECIPIENT')}")
-                # Extract subject from first line
-                first_line = main_lines[0] if main_lines else "Trading Bot Update"
-                subject = first_line[:50] + "..." if len(first_line) > 50 else first_line
-                
-                # Combine messages for email
-                full_content = main_message + "\n\n" + wallet_message
-                
-                # Send email directly
-                send_email(subject, full_content)
-                print("Email sent successfully")
-            else:
-                print("Email sending is disabled in environment variables")
+            dispatch_report(report)
         except Exception as e:
-            print(f"Error sending messages: {e}")
-            # Print a more detailed stack trace for debugging
-            import traceback
-            traceback.print_exc()
-    
+            # Log with the stack trace for debugging
+            logging.error(f"Error sending messages: {e}", exc_info=True)
+
     # Debug logging before returning
-    logging.info(f"Analysis completed. Found {len(best_stocks_df)} best stocks, {len(best_cryptos_df)} best cryptos")
-    logging.info(f"DataFrame shapes - best_stocks: {best_stocks_df.shape}, best_cryptos: {best_cryptos_df.shape}")
+    logging.info(f"Analysis completed. Found {len(results['best_stocks'])} best stocks, {len(results['best_cryptos'])} best cryptos")
+    logging.info(f"Upstream rate limits: {get_rate_metrics()}")
+    return results, report
+
+def analyze_assets(send_messages=False):
+    """
+    Main analysis function used by both command line and API.
     
-    # Return all DataFrames for web UI
-    return best_stocks_df, top_stocks_df, best_cryptos_df, top_cryptos_df, wallet_stocks_df, wallet_cryptos_df
+    Args:
+        send_messages: Whether to send Telegram/email messages (True for CLI, False for API)
+    
+    Returns:
+        Tuple of DataFrames containing analysis results
+    """
+    results, _ = run_analysis(send_messages)
 
-def analyze_single_asset(asset):
-    asset_type = detect_asset_type(asset)
+    # Return all DataFrames for web UI (built only here, at the presentation edge)
+    return (
+        to_frame(results["best_stocks"]), to_frame(results["top_stocks"]),
+        to_frame(results["best_cryptos"]), to_frame(results["top_cryptos"]),
+        to_frame(results["wallet_stocks"], WALLET_COLUMNS), to_frame(results["wallet_cryptos"], WALLET_COLUMNS)
+    )
+
+def fetch_asset_analyses(asset, asset_type=None):
+    """
+    Resolve an asset and retrieve its analyses for every timeframe.
+    `asset_type` ("crypto" or "america") defaults to detect_asset_type(asset).
+    Returns (symbol, exchange, asset_type, analyses), or None when the asset
+    cannot be resolved, has no daily analysis or cannot be scored.
+    """
+    asset_type = asset_type or detect_asset_type(asset)
     if asset_type == "crypto":
         symbol, exchange = detect_crypto_exchange(asset)
         if not symbol:
@@ -558,131 +524,154 @@ def analyze_single_asset(asset):
             logging.warning(f"Skipping {asset}: Not found on supported stock exchanges.")
             return None
 
-    # Get daily and weekly analysis
-    daily_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_1_DAY)
+    # Get every timeframe in one request; daily and weekly come from the same result
+    analyses = get_multi_timeframe_analysis(symbol, exchange, asset_type)
+    daily_analysis = analyses[Interval.INTERVAL_1_DAY]
     if "error" in daily_analysis:
         logging.error(f"Error fetching daily analysis for {asset}: {daily_analysis['error']}")
         return None
+    unscorable = unscorable_intervals(analyses)
+    if unscorable:
+        logging.error(f"Error scoring {asset}: no RSI or MACD value for {', '.join(unscorable)}")
+        return None
+    if "error" in analyses[Interval.INTERVAL_1_WEEK]:
+        logging.warning(f"Weekly analysis not available for {asset}. Using daily analysis only.")
+    return symbol, exchange, asset_type, analyses
 
-    weekly_analysis = get_tradingview_analysis(symbol, exchange, asset_type, interval=Interval.INTERVAL_1_WEEK)
+def build_asset_result(asset, symbol, exchange, asset_type, analyses, scores, matrix=None, row=0):
+    """
+    Build the AssetResult of one asset from its analyses and its scores
+    (one entry of score_assets output, see utils/scoring.py). Its daily
+    indicators are read from row `row` of `matrix`, which is built from the
+    analyses when not given.
+    """
+    daily_analysis = analyses[Interval.INTERVAL_1_DAY]
+    weekly_analysis = analyses[Interval.INTERVAL_1_WEEK]
     if "error" in weekly_analysis:
-        logging.warning(f"Weekly analysis not available for {asset}. Using daily analysis only.")
         weekly_analysis = None
+    if matrix is None:
+        matrix, row = IndicatorMatrix.from_dicts([daily_analysis.get("indicators")]), 0
 
-    # Compute overall score
-    score = evaluate_asset(daily_analysis, weekly_analysis)
+    score = scores["Score"]
     rec = daily_analysis.get("recommendation", "N/A")
-    rec_prio = rec_priority(rec)
     logging.info(f"Asset {asset}: Daily Recommendation: {rec}, Score: {score}")
 
-    # Get multi-timeframe scores
-    short_prob, mid_prob, long_prob = get_timeframe_scores(symbol, exchange, asset_type)
-    horizons = {"Short": short_prob, "Mid": mid_prob, "Long": long_prob}
-    recommended_horizon = max(horizons, key=horizons.get)
-
-    # Prepare asset data dictionary.
-    # Note: 'Indicators' are saved to be used as fallback for price fetching.
-    data = {
-        "Symbol": daily_analysis["symbol"],
-        "Exchange": daily_analysis["exchange"],
-        "Daily Recommendation": rec,
-        "Weekly Recommendation": weekly_analysis["recommendation"] if weekly_analysis else "N/A",
-        "RSI": daily_analysis["RSI"],
-        "MACD_Hist": daily_analysis["MACD_hist"],
-        "Score": score,
-        "RecPriority": rec_prio,
-        "Predicted Price": None,    # Removed linear regression prediction.
-        "Current Price": None,
-        "Model Accuracy": None,     # Removed model metrics.
-        "Take Profit": None,
-        "ATR": daily_analysis.get("indicators", {}).get("ATR", None),
-        "Asset_Type": asset_type,
-        "Source": "Top",
-        "Short Probability": short_prob,
-        "Mid Probability": mid_prob,
-        "Long Probability": long_prob,
-        "Recommended Horizon": recommended_horizon,
-        "Indicators": daily_analysis.get("indicators")
-    }
-    if asset_type == "crypto":
-        data["Exchange"], data["Symbol"] = symbol, symbol.upper()
-    else:
-        data["Exchange"], data["Symbol"] = exchange, symbol
-
-    # Update current price and take profit
-    current_price = get_current_price(symbol, asset_type, tv_indicators=data["Indicators"])
-    data["Current Price"] = current_price
-    if current_price is not None:
-        if data.get("ATR") is not None:
-            tp = calculate_take_profit_atr(current_price, data["ATR"], atr_stop_loss_multiplier=1.5, risk_reward_ratio=2.0)
-        else:
-            tp = calculate_take_profit(current_price, DEFAULT_STOP_LOSS, DEFAULT_RISK_REWARD_RATIO)
-        data["Take Profit"] = tp
+    result = AssetResult(
+        symbol.upper() if asset_type == "crypto" else symbol,
+        exchange,
+        asset_type,
+        source="Top",
+        daily_recommendation=rec,
+        weekly_recommendation=weekly_analysis["recommendation"] if weekly_analysis else "N/A",
+        rsi=daily_analysis["RSI"],
+        macd_hist=daily_analysis["MACD_hist"],
+        score=score,
+        rec_priority=rec_priority(rec),
+        atr=matrix.get(row, "ATR"),
+        short_probability=scores["Short Probability"],
+        mid_probability=scores["Mid Probability"],
+        long_probability=scores["Long Probability"],
+        recommended_horizon=scores["Recommended Horizon"],
+        matrix=matrix,
+        row=row
+    )
+    return result
 
-    return data
+def apply_prices_and_take_profits(results):
+    """
+    Set the current price and take profit of many AssetResults: prices come
+    from one get_current_prices call, take profits are computed column-wise.
+    """
+    if not results:
+        return
+    # Daily indicators are the fallback when Yahoo Finance has no price
+    prices = get_current_prices(
+        [(result.symbol, result.asset_type) for result in results],
+        tv_indicators={result.symbol: result.indicators for result in results}
+    )
+    current_prices = [prices.get(result.symbol) for result in results]
+    take_profits = calculate_take_profits(current_prices, [result.atr for result in results])
+    for result, current_price, take_profit in zip(results, current_prices, take_profits):
+        if current_price is None:
+            logging.warning(f"No current price found for {result.symbol}.")
+        result.current_price = current_price
+        result.take_profit = None if current_price is None else float(take_profit)
+
+def score_rows(fetched) -> list:
+    """
+    Score many fetched assets (fetch_asset_analyses results) in one vectorised pass.
+    Returns one {"Score", "<Horizon> Probability", "Recommended Horizon"} dict per asset.
+    """
+    scores = score_assets([analyses for _, _, _, analyses in fetched])
+    return [
+        {column: values[i].item() if hasattr(values[i], "item") else values[i] for column, values in scores.items()}
+        for i in range(len(fetched))
+    ]
+
+def analyze_single_asset(asset, asset_type=None):
+    """
+    Analyze one asset (resolution, multi-timeframe scoring, price and take
+    profit). Cached analyses and prices are reused; otherwise its timeframes
+    are fetched in one scanner request. Returns an AssetResult, or None.
+    """
+    fetched = fetch_asset_analyses(asset, asset_type)
+    if fetched is None:
+        return None
+    result = build_asset_result(asset, *fetched, score_rows([fetched])[0])
+    apply_prices_and_take_profits([result])
+    return result
 
 # -----------------------------------------------------------------------------
-# Telegram Messaging Function
+# Telegram Messaging
 # -----------------------------------------------------------------------------
 MESSAGE_LOG_FILE = "telegram_messages.json"
 
-def save_message_id(message_id):
-    """Save the Telegram message ID to a JSON file."""
-    message_ids = load_message_ids()
-    message_ids.append(message_id)
-    
-    with open(TELEGRAM_MESSAGES_FILE, 'w') as f:
-        json.dump(message_ids, f)
+# How a report replaces the previous one: "edit" (edit changed messages in
+# place, resend only when the message count changes) or "resend"
+TELEGRAM_UPDATE_MODE = os.getenv("TELEGRAM_UPDATE_MODE", "edit").lower()
 
-def load_message_ids():
-    """Load the saved Telegram message IDs from a JSON file."""
-    try:
-        with open(TELEGRAM_MESSAGES_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-async def delete_previous_messages():
-    bot = Bot(token=BOT_TOKEN)
-    message_ids = load_message_ids()
-    for msg_id in message_ids:
-        try:
-            await bot.delete_message(chat_id=CHAT_ID, message_id=msg_id)
-            await asyncio.sleep(0.5)
-        except Exception as e:
-            logging.warning(f"Could not delete message {msg_id}: {e}")
-    with open(TELEGRAM_MESSAGES_FILE, "w") as f:
-        json.dump([], f)
-
-async def send_message_to_telegram(text: str, delete_old: bool = False):
-    bot = Bot(token=BOT_TOKEN)
-    if delete_old:
-        await delete_previous_messages()
-    max_length = 4096
-    messages = [text[i:i+max_length] for i in range(0, len(text), max_length)]
-    sent_message_ids = []
-    try:
-        for msg in messages:
-            sent_message = await bot.send_message(chat_id=CHAT_ID, text=msg)
-            sent_message_ids.append(sent_message.message_id)
-            save_message_id(sent_message.message_id)
-            await asyncio.sleep(1)
-        logging.info(f"Successfully sent {len(messages)} message(s) to Telegram")
-        return sent_message_ids
-    except TimedOut:
-        logging.error("Telegram API request timed out. Retrying in 10 seconds...")
-        await asyncio.sleep(10)
-        sent_message_ids = []
-        for msg in messages:
-            sent_message = await bot.send_message(chat_id=CHAT_ID, text=msg)
-            sent_message_ids.append(sent_message.message_id)
-            save_message_id(sent_message.message_id)
-            await asyncio.sleep(1)
-        logging.info(f"Successfully sent {len(messages)} message(s) to Telegram after retry")
-        return sent_message_ids
-    except Exception as e:
-        logging.error(f"Error sending Telegram message: {str(e)}")
-        return []
+# One event loop thread and one Bot session for the whole process
+notification_service = NotificationService(BOT_TOKEN, CHAT_ID, TELEGRAM_MESSAGES_FILE)
+
+def send_message_to_telegram(text: str, delete_old: bool = False):
+    """Queue a Telegram message without blocking; returns a Future of the sent message IDs."""
+    return notification_service.submit(text, delete_old=delete_old)
+
+# -----------------------------------------------------------------------------
+# Notification Outbox: rendered notifications are stored, then delivered with retries
+# -----------------------------------------------------------------------------
+# Seconds one delivery may take before it counts as failed (below the outbox
+# lease, utils/outbox.py LEASE_SECONDS, so a row is never delivered twice at once)
+NOTIFICATION_TIMEOUT = 300
+
+# Telegram deliveries are at-least-once. A delivery that times out is cancelled
+# before the outbox retries it (dropped while queued, interrupted before its
+# next Telegram call while running), but messages that went out before the
+# cancellation, or just before the timeout, are sent again by the retry. A
+# report replaces the previous one, so a retried report leaves no duplicate
+# behind (its sent chunks are saved and replaced); a retried text can.
+def deliver_telegram_report(payload):
+    future = notification_service.submit_report(payload["messages"], edit=TELEGRAM_UPDATE_MODE == "edit")
+    notification_service.result(future, NOTIFICATION_TIMEOUT)
+
+def deliver_telegram_text(payload):
+    notification_service.result(notification_service.submit(payload["text"]), NOTIFICATION_TIMEOUT)
+
+def deliver_email(payload):
+    future = queue_email(payload["subject"], payload["text"], html_content=payload["html"])
+    if future is not None and not future.result(NOTIFICATION_TIMEOUT):
+        raise RuntimeError("Email delivery failed")
+
+notification_outbox = NotificationOutbox(
+    NOTIFICATION_OUTBOX_FILE,
+    handlers={
+        "telegram_report": deliver_telegram_report,
+        "telegram_text": deliver_telegram_text,
+        "email": deliver_email,
+    },
+    # A newer report replaces an older one that has not gone out yet
+    supersede=["telegram_report"],
+)
 
 # -----------------------------------------------------------------------------
 # Scheduled Job: Build and Send the Message
@@ -690,151 +679,23 @@ async def send_message_to_telegram(text: str, delete_old: bool = False):
 def daily_job():
     try:
         logging.info("Starting daily analysis job...")
-        best_stocks, top_stocks, best_cryptos, top_cryptos, wallet_stocks, wallet_cryptos = analyze_assets(send_messages=True)
-
-        main_lines = [
-            "📊 Daily Market Analysis 📊",
-            "----------------------------------------",
-            ""
-        ]
-        # --- Best Picks Section ---
-        main_lines.append("🔥 Best Stock Picks (Top 6) 🔥")
-        main_lines.append("")
-        if not best_stocks.empty:
-            for _, row in best_stocks.iterrows():
-                try:
-                    line = format_asset_line(row)
-                    main_lines.append(line)
-                    main_lines.append("")
-                except Exception as e:
-                    logging.error(f"Error formatting stock {row.get('Symbol', 'unknown')}: {e}")
-                    main_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                    main_lines.append("")
-        else:
-            main_lines.append("No bullish stocks found. 😔")
-            main_lines.append("")
-
-        main_lines.append("🏢 Other Top Stocks")
-        main_lines.append("")
-        if not top_stocks.empty:
-            for _, row in top_stocks.iterrows():
-                if row["Symbol"] in best_stocks["Symbol"].values:
-                    continue
-                try:
-                    line = format_asset_line(row)
-                    main_lines.append(line)
-                    main_lines.append("")
-                except Exception as e:
-                    logging.error(f"Error formatting stock {row.get('Symbol', 'unknown')}: {e}")
-                    main_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                    main_lines.append("")
-        else:
-            main_lines.append("No additional bullish stocks found. 😔")
-            main_lines.append("")
-
-        main_lines.append("🔥 Best Crypto Picks (Top 6) 🔥")
-        main_lines.append("")
-        if not best_cryptos.empty:
-            for _, row in best_cryptos.iterrows():
-                try:
-                    line = format_asset_line(row)
-                    main_lines.append(line)
-                    main_lines.append("")
-                except Exception as e:
-                    logging.error(f"Error formatting crypto {row.get('Symbol', 'unknown')}: {e}")
-                    main_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                    main_lines.append("")
-        else:
-            main_lines.append("No bullish cryptos found. 😔")
-            main_lines.append("")
-
-        main_message = "\n".join(main_lines)
-
-        wallet_lines = []
-        wallet_lines.append("👜 My Stocks Wallet")
-        wallet_lines.append("")
-        if not wallet_stocks.empty:
-            for _, row in wallet_stocks.iterrows():
-                try:
-                    line = format_asset_line(row)
-                    wallet_lines.append(line)
-                    wallet_lines.append("")
-                except Exception as e:
-                    logging.error(f"Error formatting wallet stock {row.get('Symbol', 'unknown')}: {e}")
-                    wallet_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                    wallet_lines.append("")
-        else:
-            wallet_lines.append("No wallet stocks data available. 😔")
-            wallet_lines.append("")
-
-        wallet_lines.append("👜 My Cryptos Wallet")
-        wallet_lines.append("")
-        if not wallet_cryptos.empty:
-            for _, row in wallet_cryptos.iterrows():
-                try:
-                    line = format_asset_line(row)
-                    wallet_lines.append(line)
-                    wallet_lines.append("")
-                except Exception as e:
-                    logging.error(f"Error formatting wallet crypto {row.get('Symbol', 'unknown')}: {e}")
-                    wallet_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
-                    wallet_lines.append("")
-        else:
-            wallet_lines.append("No wallet cryptos data available. 😔")
-            wallet_lines.append("")
-
-        wallet_message = "\n".join(wallet_lines)
-
-        # Send to Telegram
-        asyncio.run(send_message_to_telegram(main_message, delete_old=True))
-        asyncio.run(send_message_to_telegram(wallet_message, delete_old=False))
-        
-        # Send directly to email
-        if os.getenv("EMAIL_ENABLED", "false").lower() == "true":
-            # Extract subject from first line
-            first_line = main_lines[0] if main_lines else "Trading Bot Update"
-            subject = first_line[:50] + "..." if len(first_line) > 50 else first_line
-            
-            # Combine messages for email
-            full_content = main_message + "\n\n" + wallet_message
-            
-            # Send email directly
-            send_email(subject, full_content)
-        
+        # Renders the report once and sends it to Telegram and email once
+        run_analysis(send_messages=True)
         logging.info("Daily analysis job completed and messages sent.")
     except Exception as e:
         error_message = f"❌ Error in daily analysis job: {str(e)}"
         logging.error(error_message, exc_info=True)
-        asyncio.run(send_message_to_telegram(error_message, delete_old=False))
-
-def format_asset_line(row):
-    """Format a single asset line for the Telegram message."""
-    symbol = row.get("Symbol", "Unknown")
-    rec = row.get("Daily Recommendation", "N/A")
-    curr = row.get("Current Price", 0) or 0
-    
-    # Basic line for all assets
-    line = f"• {symbol}: `Rec={rec}` | 📈 `Curr=${curr:,.2f}`"
-    
-    # Add take profit and score for top assets
-    if "Score" in row:
-        score = row.get("Score", "N/A")
-        tp = row.get("Take Profit", 0) or 0
-        line += f" | 🎯 `TP=${tp:,.2f}` | `Score={score}`"
-        
-        # Add probability info for top assets
-        if all(k in row for k in ["Short Probability", "Mid Probability", "Long Probability"]):
-            probabilities = f"Short: {row['Short Probability']}% | Mid: {row['Mid Probability']}% | Long: {row['Long Probability']}%"
-            rec_horizon = row.get("Recommended Horizon", "N/A")
-            line += f"\n   ➜ {probabilities} | Recommended: {rec_horizon}-term"
-    
-    return line
+        notification_outbox.enqueue("telegram_text", {"text": error_message}, f"error:{time.time()}")
 
 def signal_handler(sig, frame):
     """Handle termination signals gracefully."""
     logging.info("Received termination signal. Shutting down...")
     scheduler.shutdown()
     logging.info("Scheduler shutdown complete.")
+    # Pending outbox rows stay stored for the next start; let in-flight sends finish
+    notification_outbox.stop()
+    notification_service.stop()
+    get_email_outbox().stop()
     sys.exit(0)
 
 def reset_telegram_messages():
@@ -874,6 +735,8 @@ if __name__ == '__main__':
         )
         logging.info("Scheduled daily_job at %s", t)
     
+    # Deliver notifications left pending by a previous run
+    notification_outbox.start()
     daily_job()
     scheduler.start()
     logging.info("Scheduler started.")
@@ -2,77 +2,305 @@
 
 import json
 import os
+import sqlite3
+import threading
 import time
 import logging
+from concurrent.futures import Future
+
+class SQLiteStore:
+    """
+    Key/value storage for cache entries backed by SQLite in WAL mode.
+
+    Every set() writes a single row instead of re-serialising the whole
+    cache, so the cost of a write no longer grows with the cache size.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, data TEXT NOT NULL, timestamp REAL NOT NULL, expiry REAL)"
+        )
+        self._conn.commit()
+
+    def load_all(self):
+        """Return every stored entry as {key: {"data", "timestamp"[, "expiry"]}}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, data, timestamp, expiry FROM entries").fetchall()
+        entries = {}
+        for key, data, timestamp, expiry in rows:
+            entry = {"data": json.loads(data), "timestamp": timestamp}
+            if expiry is not None:
+                entry["expiry"] = expiry
+            entries[key] = entry
+        return entries
+
+    def count(self):
+        """Return the number of stored entries."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def put_many(self, entries):
+        """Insert or replace several entries in one transaction."""
+        rows = [
+            (key, json.dumps(entry["data"]), entry["timestamp"], entry.get("expiry"))
+            for key, entry in entries.items()
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, data, timestamp, expiry) VALUES (?, ?, ?, ?)", rows
+                )
+
+    def put(self, key, entry):
+        """Insert or replace a single entry."""
+        self.put_many({key: entry})
+
+    def delete_many(self, keys):
+        """Delete the given keys."""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self):
+        """Delete every entry."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM entries")
+
+    def compact(self):
+        """Checkpoint the WAL into the main database file and reclaim free pages."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def migrate_json(self, json_file):
+        """
+        Import entries from a legacy whole-file JSON cache.
+
+        The JSON file is renamed to `<name>.migrated` afterwards so the import
+        runs only once and the original data is kept as a backup.
+
+        Returns:
+            int: Number of imported entries
+        """
+        try:
+            with open(json_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.error(f"Error reading legacy cache {json_file}: {e}")
+            return 0
+
+        entries = {}
+        for key, entry in data.items():
+            if isinstance(entry, dict) and "data" in entry and "timestamp" in entry:
+                entries[key] = entry
+            else:
+                # Legacy entries without metadata are imported as fresh
+                entries[key] = {"data": entry, "timestamp": time.time()}
+        self.put_many(entries)
+        os.replace(json_file, json_file + ".migrated")
+        logging.info(f"Migrated {len(entries)} cache entries from {json_file} to {self.db_file}")
+        return len(entries)
+
+
+def sqlite_path(cache_file):
+    """Return the SQLite database path used for a (legacy JSON) cache file name."""
+    root, ext = os.path.splitext(cache_file)
+    return root + ".sqlite" if ext == ".json" else cache_file
+
 
 class PersistentCache:
-    """A simple cache that persists to disk."""
-    
-    def __init__(self, cache_file="cache.json", initial_data=None, expiry_seconds=3600):
+    """
+    A simple cache that persists to disk.
+
+    Safe to share between threads: the in-memory dict is guarded by a lock
+    that is only held for dict operations, so readers never wait on disk
+    writes. Writes to the same key are serialised by a per-key lock and
+    concurrent misses on a key can be coalesced with get_or_set().
+
+    Each entry keeps its own expiry, taken from the `expiry_seconds` given to
+    set(), else from `ttl_policy(key)`, else from the cache-wide default.
+    """
+
+    def __init__(self, cache_file="cache.json", initial_data=None, expiry_seconds=3600, ttl_policy=None):
         self.cache_file = cache_file
         self.expiry_seconds = expiry_seconds
-        self.cache = initial_data or self._load_cache()
-        
-        # Save cache immediately if initial data was provided
+        self.ttl_policy = ttl_policy
+        self.store = SQLiteStore(sqlite_path(cache_file))
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._inflight = {}
+
+        # One-time migration from the old whole-file JSON cache
+        if os.path.exists(cache_file) and cache_file != self.store.db_file and self.store.count() == 0:
+            self.store.migrate_json(cache_file)
+
         if initial_data:
-            self._save_cache()
-    
+            self.store.put_many(initial_data)
+        self.cache = self._load_cache()
+
     def _load_cache(self):
-        """Load cache from file if it exists."""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logging.error(f"Error loading cache: {e}")
-                return {}
-        return {}
-    
-    def _save_cache(self):
-        """Save cache to file."""
+        """Load cache from the store."""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
+            return self.store.load_all()
+        except Exception as e:
+            logging.error(f"Error loading cache: {e}")
+            return {}
+
+    def _key_lock(self, str_key):
+        """Return the lock serialising writes of one key."""
+        with self._lock:
+            return self._key_locks.setdefault(str_key, threading.Lock())
+
+    def _save_entry(self, str_key, entry):
+        """Write a single entry to the store."""
+        try:
+            self.store.put(str_key, entry)
             return True
         except Exception as e:
             logging.error(f"Error saving cache: {e}")
             return False
-    
+
+    def _expiry(self, entry):
+        """Return the lifetime in seconds of an entry."""
+        return entry.get("expiry", self.expiry_seconds)
+
+    def lookup(self, key, stale_seconds=0):
+        """
+        Return (value, fresh) for a key.
+
+        Entries that expired less than `stale_seconds` ago are still returned,
+        with fresh=False. Returns (None, False) when nothing usable is cached.
+        """
+        str_key = str(key)  # Convert tuple to string for storage
+        with self._lock:
+            entry = self.cache.get(str_key)
+        if entry is None:
+            return None, False
+        age = time.time() - entry["timestamp"]
+        expiry = self._expiry(entry)
+        if age < expiry:
+            return entry["data"], True
+        if age < expiry + stale_seconds:
+            return entry["data"], False
+        return None, False
+
     def get(self, key):
         """Get value from cache if it exists and is not expired."""
-        str_key = str(key)  # Convert tuple to string for JSON
-        if str_key in self.cache:
-            entry = self.cache[str_key]
-            if time.time() - entry["timestamp"] < self.expiry_seconds:
-                return entry["data"]
-        return None
-    
+        value, fresh = self.lookup(key)
+        return value if fresh else None
+
     def set(self, key, value, expiry_seconds=None):
         """Set value in cache with current timestamp."""
-        str_key = str(key)  # Convert tuple to string for JSON
-        self.cache[str_key] = {
+        str_key = str(key)  # Convert tuple to string for storage
+        if expiry_seconds is None and self.ttl_policy is not None:
+            expiry_seconds = self.ttl_policy(key)
+        entry = {
             "data": value,
             "timestamp": time.time()
         }
-        self._save_cache()
-    
+        if expiry_seconds is not None:
+            entry["expiry"] = expiry_seconds
+        with self._key_lock(str_key):
+            with self._lock:
+                self.cache[str_key] = entry
+            self._save_entry(str_key, entry)
+
+    def single_flight(self, key, loader):
+        """
+        Run `loader` for a key at most once at a time.
+
+        Callers arriving while a load of the same key is in flight wait for it
+        and receive its result (or its exception) instead of loading again.
+        """
+        str_key = str(key)
+        with self._lock:
+            future = self._inflight.get(str_key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[str_key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(loader())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[str_key]
+        return future.result()
+
+    def refresh_in_background(self, key, loader):
+        """Run `loader` for a key on a daemon thread unless a load is already in flight."""
+        with self._lock:
+            if str(key) in self._inflight:
+                return
+
+        def run():
+            try:
+                self.single_flight(key, loader)
+            except Exception as e:
+                logging.warning(f"Background refresh failed for {key}: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_or_set(self, key, loader, expiry_seconds=None, cache_if=None, stale_seconds=0):
+        """
+        Return the cached value for a key, loading and caching it on a miss.
+
+        Concurrent misses on the same key share one call to `loader`.
+        `cache_if` can reject results (e.g. error dicts) from being stored.
+        With `stale_seconds`, a value that expired less than that long ago is
+        returned immediately while it is refreshed in the background
+        (stale-while-revalidate).
+        """
+        value, fresh = self.lookup(key, stale_seconds)
+        if fresh:
+            return value
+
+        def load():
+            # Another caller may have filled the key while we waited
+            value = self.get(key)
+            if value is not None:
+                return value
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.set(key, value, expiry_seconds)
+            return value
+
+        if value is not None:
+            self.refresh_in_background(key, load)
+            return value
+        return self.single_flight(key, load)
+
     def clear_expired(self):
         """Remove expired entries from cache."""
         current_time = time.time()
-        expired_keys = []
-        
-        for key, entry in self.cache.items():
-            if current_time - entry["timestamp"] > self.expiry_seconds:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.cache[key]
-        
+
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self.cache.items()
+                if current_time - entry["timestamp"] > self._expiry(entry)
+            ]
+            for key in expired_keys:
+                del self.cache[key]
+
         if expired_keys:
-            self._save_cache()
+            self.store.delete_many(expired_keys)
+            self.store.compact()
             logging.info(f"Cleared {len(expired_keys)} expired cache entries")
 
     def clear(self):
         """Clear the cache."""
-        self.cache = {}
-        self._save_cache() 
\ No newline at end of file
+        with self._lock:
+            self.cache = {}
+        self.store.clear()
@@ -1,46 +1,154 @@
 """Email sending utilities."""
 
 import os
+import queue
 import logging
 import smtplib
+import threading
+import concurrent.futures
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
-def send_email(subject, content, recipient=None):
+from utils.rate_limiter import get_limiter
+
+DEFAULT_SMTP_SERVER = "smtp.gmail.com"
+DEFAULT_SMTP_PORT = 587
+SMTP_IDLE_SECONDS = 60  # close the pooled connection after this long without mail
+
+# Errors after which the pooled connection is dropped and the send retried once
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class EmailOutbox:
     """
-    Send an email using SMTP.
-    
-    Args:
-        subject: Email subject
-        content: Email body content (can be HTML)
-        recipient: Override recipient email (optional)
-    
-    Returns:
-        bool: True if successful, False otherwise
+    Queued email delivery over one reused SMTP connection.
+
+    A daemon worker thread takes messages off a queue and sends them over a
+    single authenticated connection, which it opens on first use, reopens
+    after a connection error and closes after SMTP_IDLE_SECONDS idle. Each
+    message goes to all of its recipients in one SMTP transaction. Callers
+    get a concurrent.futures.Future resolving to True/False and never wait.
     """
-    # Check if email is enabled
-    if os.getenv("EMAIL_ENABLED", "false").lower() != "true":
-        logging.info("Email forwarding is disabled. Set EMAIL_ENABLED=true to enable.")
-        return False
-        
-    email_address = os.getenv("EMAIL_ADDRESS")
-    email_password = os.getenv("EMAIL_PASSWORD")
-    email_recipient = recipient or os.getenv("EMAIL_RECIPIENT")
-    
-    if not all([email_address, email_password, email_recipient]):
-        logging.error("Email configuration is incomplete. Check your .env file.")
-        return False
-    
-    try:
-        # Create message
-        msg = MIMEMultipart()
-        msg["From"] = email_address
-        msg["To"] = email_recipient
-        msg["Subject"] = subject
-        
-        # Convert plain text to simple HTML for better formatting
-        html_content = f"""
+
+    def __init__(self, host=DEFAULT_SMTP_SERVER, port=DEFAULT_SMTP_PORT, username=None, password=None,
+                 starttls=True, idle_seconds=SMTP_IDLE_SECONDS, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.connections = 0  # connections opened so far
+        self._server = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread (no-op when already running)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=30):
+        """Send the queued messages, close the connection and stop the worker."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join(timeout)
+
+    def submit(self, msg, recipients) -> concurrent.futures.Future:
+        """Queue a message for `recipients`; the Future resolves to True when it was sent."""
+        self.start()
+        future = concurrent.futures.Future()
+        self._queue.put((msg, list(recipients), future))
+        return future
+
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                self._disconnect()
+                continue
+            if job is None:
+                break
+            msg, recipients, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._deliver(msg, recipients)
+                logging.info(f"Email sent successfully to {', '.join(recipients)}")
+                future.set_result(True)
+            except Exception as e:
+                logging.error(f"Failed to send email: {str(e)}")
+                future.set_result(False)
+        self._disconnect()
+
+    def _connect(self):
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+            self._server = server
+            self.connections += 1
+        return self._server
+
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+    def _deliver(self, msg, recipients):
+        for attempt in range(2):
+            try:
+                server = self._connect()
+                get_limiter("smtp").wait_if_needed()
+                server.send_message(msg, to_addrs=recipients)
+                return
+            except CONNECTION_ERRORS as e:
+                self._disconnect()
+                if attempt:
+                    raise
+                logging.warning(f"SMTP connection lost ({e}); reconnecting")
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_email_outbox() -> EmailOutbox:
+    """Return the process-wide outbox, configured from the environment."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = EmailOutbox(
+                host=os.getenv("SMTP_SERVER", DEFAULT_SMTP_SERVER),
+                port=int(os.getenv("SMTP_PORT", str(DEFAULT_SMTP_PORT))),
+                username=os.getenv("EMAIL_ADDRESS"),
+                password=os.getenv("EMAIL_PASSWORD"),
+                starttls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+            )
+        return _outbox
+
+
+def build_message(subject, content, sender, recipients, html_content=None):
+    """Build the MIME message of a report email (`content` wrapped in simple HTML unless `html_content` is given)."""
+    msg = MIMEMultipart()
+    msg["From"] = sender
+    msg["To"] = ", ".join(recipients)
+    msg["Subject"] = subject
+
+    # Convert plain text to simple HTML for better formatting
+    html_content = html_content or f"""
         <html>
             <head></head>
             <body>
@@ -54,18 +162,55 @@ def send_email(subject, content, recipient=None):
             </body>
         </html>
         """
-        
-        msg.attach(MIMEText(html_content, "html"))
-        
-        # Connect to Gmail SMTP server
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(email_address, email_password)
-            server.send_message(msg)
-            
-        logging.info(f"Email sent successfully to {email_recipient}")
-        return True
-        
-    except Exception as e:
-        logging.error(f"Failed to send email: {str(e)}")
-        return False 
\ No newline at end of file
+
+    msg.attach(MIMEText(html_content, "html"))
+    return msg
+
+
+def queue_email(subject, content, recipient=None, html_content=None):
+    """
+    Queue an email on the outbox without waiting for it.
+
+    Args:
+        subject: Email subject
+        content: Email body content (can be HTML)
+        recipient: Override recipient(s), comma-separated (optional)
+        html_content: Complete HTML document to send instead of wrapping `content` (optional)
+
+    Returns:
+        Future resolving to True/False, or None when email is disabled or not configured
+    """
+    # Check if email is enabled
+    if os.getenv("EMAIL_ENABLED", "false").lower() != "true":
+        logging.info("Email forwarding is disabled. Set EMAIL_ENABLED=true to enable.")
+        return None
+
+    email_address = os.getenv("EMAIL_ADDRESS")
+    email_password = os.getenv("EMAIL_PASSWORD")
+    email_recipient = recipient or os.getenv("EMAIL_RECIPIENT")
+
+    if not all([email_address, email_password, email_recipient]):
+        logging.error("Email configuration is incomplete. Check your .env file.")
+        return None
+
+    # All recipients share one message and one SMTP transaction
+    recipients = [address.strip() for address in email_recipient.split(",") if address.strip()]
+    msg = build_message(subject, content, email_address, recipients, html_content)
+    return get_email_outbox().submit(msg, recipients)
+
+
+def send_email(subject, content, recipient=None, html_content=None):
+    """
+    Send an email using SMTP and wait for the result.
+
+    Args:
+        subject: Email subject
+        content: Email body content (can be HTML)
+        recipient: Override recipient email(s), comma-separated (optional)
+        html_content: Complete HTML document to send instead of wrapping `content` (optional)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    future = queue_email(subject, content, recipient, html_content)
+    return bool(future is not None and future.result())
@@ -0,0 +1,234 @@
+"""Durable analysis history (SQLite): every run's results, queryable by time range and symbol."""
+
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+# Result lists stored per asset; best_stocks / best_cryptos are the first 6
+# rows (rank 0-5) of top_stocks / top_cryptos, so they are not stored twice
+HISTORY_SECTIONS = ("top_stocks", "top_cryptos", "wallet_stocks", "wallet_cryptos")
+CRYPTO_SECTIONS = ("top_cryptos", "wallet_cryptos")
+
+# Crypto rows are stored under their TradingView pair (BTCUSDT); queries for
+# the base symbol (BTC), as used by the rest of the API, match them too
+CRYPTO_QUOTE = "USDT"
+
+# Stored asset columns: {API column name: SQLite column}
+HISTORY_COLUMNS = {
+    "Symbol": "symbol",
+    "Asset_Type": "asset_type",
+    "Exchange": "exchange",
+    "Score": "score",
+    "Current_Price": "current_price",
+    "Take_Profit": "take_profit",
+    "Daily_Recommendation": "daily_recommendation",
+    "Weekly_Recommendation": "weekly_recommendation",
+    "RSI": "rsi",
+    "RecPriority": "rec_priority",
+    "Recommended_Horizon": "recommended_horizon",
+}
+
+COLUMN_TYPES = {
+    "score": "REAL",
+    "current_price": "REAL",
+    "take_profit": "REAL",
+    "rsi": "REAL",
+    "rec_priority": "INTEGER",
+}
+
+MAX_ROWS = 100000
+
+
+def parse_time(value, end_of_day=False):
+    """
+    Epoch seconds of an ISO date or datetime string (None stays None).
+
+    With `end_of_day`, a plain date means the end of that day, so that
+    end=2025-01-31 includes the runs of the 31st.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value} (expected ISO format, e.g. 2025-01-31 or 2025-01-31T08:00)")
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed.timestamp()
+
+
+class AnalysisHistory:
+    """
+    Every analysis run, stored twice: the full API result (zlib-compressed
+    JSON, for replaying a run) and one row per asset and section with its
+    score, price and recommendations, indexed by (symbol, time) and by time.
+
+    Runs are keyed by their timestamp, so recording the same result twice
+    stores it once. Several processes may share the file (WAL mode); the
+    scheduler and the API both write to it.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._recent = (None, None, [])  # (last run id, limit, payloads)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp TEXT NOT NULL UNIQUE, "
+            "ts REAL NOT NULL, "
+            "source TEXT NOT NULL, "
+            "payload BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS assets ("
+            "run_id INTEGER NOT NULL REFERENCES runs (id), "
+            "ts REAL NOT NULL, "
+            "section TEXT NOT NULL, "
+            "rank INTEGER NOT NULL, "
+            + ", ".join(f"{column} {COLUMN_TYPES.get(column, 'TEXT')}" for column in HISTORY_COLUMNS.values())
+            + ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS assets_symbol_ts ON assets (symbol, ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS assets_ts ON assets (ts)")
+        self._conn.commit()
+
+    def record(self, result, source) -> bool:
+        """
+        Store an analysis result ({"timestamp", section: [API records]}).
+
+        Args:
+            result: The API view of a run (Report.to_dict())
+            source: What triggered the run, e.g. "scheduler" or "api"
+
+        Returns:
+            bool: False when a run with this timestamp is already stored
+        """
+        timestamp = result.get("timestamp") or datetime.now().isoformat()
+        ts = parse_time(timestamp)
+        payload = zlib.compress(json.dumps(result, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO runs (timestamp, ts, source, payload) VALUES (?, ?, ?, ?)",
+                    (timestamp, ts, source, payload)
+                )
+                if cursor.rowcount != 1:
+                    return False
+                run_id = cursor.lastrowid
+                self._conn.executemany(
+                    f"INSERT INTO assets (run_id, ts, section, rank, {', '.join(HISTORY_COLUMNS.values())}) "
+                    f"VALUES ({', '.join('?' * (4 + len(HISTORY_COLUMNS)))})",
+                    [
+                        (run_id, ts, section, rank, *(record.get(name) for name in HISTORY_COLUMNS))
+                        for section in HISTORY_SECTIONS
+                        for rank, record in enumerate(result.get(section) or [])
+                    ]
+                )
+        return True
+
+    def runs(self, start=None, end=None, limit=100) -> list:
+        """Return [{"id", "timestamp", "source"}] of runs in [start, end] (epoch seconds), newest first."""
+        where, params = self._time_range("ts", start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, timestamp, source FROM runs {where} ORDER BY ts DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [{"id": run_id, "timestamp": timestamp, "source": source} for run_id, timestamp, source in rows]
+
+    def get_run(self, run_id):
+        """Return the full result of a stored run, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def recent(self, limit=10) -> list:
+        """
+        Return the full results of the last `limit` runs, oldest first.
+
+        The list is rebuilt only when a run was recorded since the last call
+        (by any process), so callers can use its identity as a version.
+        """
+        with self._lock:
+            last_id = self._conn.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+            cached_id, cached_limit, payloads = self._recent
+            if cached_id == last_id and cached_limit == limit:
+                return payloads
+            rows = self._conn.execute(
+                "SELECT payload FROM runs ORDER BY ts DESC LIMIT ?", (limit,)
+            ).fetchall()
+            payloads = [json.loads(zlib.decompress(payload)) for payload, in reversed(rows)]
+            self._recent = (last_id, limit, payloads)
+        return payloads
+
+    def assets(self, symbols=None, start=None, end=None, sections=None, limit=MAX_ROWS) -> dict:
+        """
+        Per-asset history in columnar form, oldest first.
+
+        Args:
+            symbols: Only these symbols (uses the (symbol, time) index); a crypto
+                base symbol also matches its stored pair (BTC -> BTCUSDT)
+            start, end: Time range in epoch seconds (inclusive, either may be None)
+            sections: Only these HISTORY_SECTIONS
+            limit: Maximum number of rows
+
+        Returns:
+            dict: {"columns": {"timestamp", "section", "rank", *HISTORY_COLUMNS: list},
+            "count": rows returned, "truncated": whether `limit` cut the result}
+        """
+        where, params = self._time_range("a.ts", start, end)
+        conditions = [where[len("WHERE "):]] if where else []
+        if symbols:
+            pairs = [symbol + CRYPTO_QUOTE for symbol in symbols if not symbol.endswith(CRYPTO_QUOTE)]
+            placeholders = ', '.join('?' * len(symbols))
+            if pairs:
+                conditions.append(
+                    f"(a.symbol IN ({placeholders}) OR (a.symbol IN ({', '.join('?' * len(pairs))}) "
+                    f"AND a.section IN ({', '.join('?' * len(CRYPTO_SECTIONS))})))"
+                )
+                params += list(symbols) + pairs + list(CRYPTO_SECTIONS)
+            else:
+                conditions.append(f"a.symbol IN ({placeholders})")
+                params += list(symbols)
+        if sections:
+            unknown = [section for section in sections if section not in HISTORY_SECTIONS]
+            if unknown:
+                raise ValueError(f"Unknown sections: {', '.join(unknown)} (expected {', '.join(HISTORY_SECTIONS)})")
+            conditions.append(f"a.section IN ({', '.join('?' * len(sections))})")
+            params += list(sections)
+
+        names = ["timestamp", "section", "rank"] + list(HISTORY_COLUMNS)
+        query = (
+            f"SELECT r.timestamp, a.section, a.rank, {', '.join('a.' + column for column in HISTORY_COLUMNS.values())} "
+            f"FROM assets a JOIN runs r ON r.id = a.run_id "
+            f"{'WHERE ' + ' AND '.join(conditions) if conditions else ''} "
+            f"ORDER BY a.ts, a.section, a.rank LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit + 1)).fetchall()
+        truncated = len(rows) > limit
+        rows = rows[:limit]
+        columns = {name: list(values) for name, values in zip(names, zip(*rows))} if rows else {name: [] for name in names}
+        return {"columns": columns, "count": len(rows), "truncated": truncated}
+
+    def count(self) -> int:
+        """Return the number of stored runs."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    @staticmethod
+    def _time_range(column, start, end):
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(end)
+        return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
@@ -0,0 +1,69 @@
+"""Pre-serialised, pre-compressed JSON responses with ETags and conditional GET."""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from flask import Response
+
+GZIP_LEVEL = 6
+
+
+class PreparedJSON:
+    """
+    A JSON body serialised and gzipped once, with a content-hash ETag.
+
+    `source` is the object the body was built from; PreparedResponses
+    rebuilds the body only when a different object is passed in.
+    """
+
+    __slots__ = ("source", "body", "gzipped", "etag")
+
+    def __init__(self, data, source=None):
+        self.source = source
+        self.body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+
+class PreparedResponses:
+    """Named PreparedJSON bodies, rebuilt when their source object changes."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, source, build=None) -> PreparedJSON:
+        """
+        Return the prepared body of `source` (serialised as `build(source)` when given).
+
+        The cached analysis and the history are replaced, never mutated, when
+        a new run is stored, so an identity check is enough to invalidate.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry.source is not source:
+            entry = PreparedJSON(build(source) if build else source, source)
+            with self._lock:
+                self._entries[name] = entry
+        return entry
+
+
+def prepared_response(prepared: PreparedJSON, request) -> Response:
+    """
+    Serve a prepared body: 304 when If-None-Match matches its ETag, else the
+    gzipped body to clients that accept gzip and the plain body otherwise.
+    """
+    if request.if_none_match.contains_weak(prepared.etag):
+        response = Response(status=304)
+    elif "gzip" in request.accept_encodings:
+        response = Response(prepared.gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(prepared.body, mimetype="application/json")
+    response.set_etag(prepared.etag)
+    # Clients may reuse their copy, but must revalidate it first
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
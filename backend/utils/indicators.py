@@ -0,0 +1,327 @@
+"""Local technical indicator engine (NumPy, vectorised across symbols)."""
+
+import logging
+from collections import defaultdict
+
+import numpy as np
+from tradingview_ta import Interval
+from tradingview_ta.technicals import Recommendation
+
+from utils.price import ohlcv_store, refresh_history, to_yahoo_symbol
+from utils.tradingview import TIMEFRAMES, INTERVAL_TTLS, make_key, error_result
+
+# Moving averages voted on by TradingView's "Recommend.MA" rating
+MA_LENGTHS = [10, 20, 30, 50, 100, 200]
+
+# Bars of history used per symbol: enough for SMA200 plus warm-up of the recursive averages
+HISTORY_BARS = 500
+
+# Intervals that are derived from stored daily bars instead of being stored themselves
+DERIVED_INTERVALS = {Interval.INTERVAL_1_WEEK: Interval.INTERVAL_1_DAY}
+
+
+# -----------------------------------------------------------------------------
+# Moving averages
+#
+# Every function takes a 2-D float array of shape (symbols, bars), oldest bar
+# first. Symbols with a shorter history are left-padded with NaN; values that
+# need more bars than a symbol has are NaN as well.
+# -----------------------------------------------------------------------------
+def sma(values: np.ndarray, length: int) -> np.ndarray:
+    """Simple moving average (TradingView ta.sma)."""
+    valid = ~np.isnan(values)
+    zero_padded = np.zeros((values.shape[0], 1))
+    sums = np.concatenate([zero_padded, np.cumsum(np.where(valid, values, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zero_padded, np.cumsum(valid, axis=1)], axis=1)
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= length:
+        window_sums = sums[:, length:] - sums[:, :-length]
+        window_counts = counts[:, length:] - counts[:, :-length]
+        out[:, length - 1:] = np.where(window_counts == length, window_sums / length, np.nan)
+    return out
+
+
+def _recursive_average(values: np.ndarray, length: int, alpha: float) -> np.ndarray:
+    """
+    Exponential average seeded with the SMA of the first `length` values, like
+    TradingView's ta.ema / ta.rma. The recursion runs over bars; every step
+    updates all symbols at once.
+    """
+    seed = sma(values, length)
+    out = np.full(values.shape, np.nan)
+    previous = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        previous = np.where(np.isnan(previous), seed[:, t], alpha * values[:, t] + (1 - alpha) * previous)
+        out[:, t] = previous
+    return out
+
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """Exponential moving average (TradingView ta.ema)."""
+    return _recursive_average(values, length, 2.0 / (length + 1))
+
+
+def rma(values: np.ndarray, length: int) -> np.ndarray:
+    """Wilder's moving average (TradingView ta.rma), used by RSI and ATR."""
+    return _recursive_average(values, length, 1.0 / length)
+
+
+# -----------------------------------------------------------------------------
+# Indicators
+# -----------------------------------------------------------------------------
+def rsi(close: np.ndarray, length=14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing (TradingView ta.rsi)."""
+    change = np.diff(close, axis=1, prepend=np.nan)
+    up = rma(np.where(np.isnan(change), np.nan, np.maximum(change, 0.0)), length)
+    down = rma(np.where(np.isnan(change), np.nan, -np.minimum(change, 0.0)), length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + up / down)
+    # As in Pine: down == 0 gives 100 even when up == 0 too (a flat series)
+    out = np.where(up == 0, 0.0, out)
+    out = np.where(down == 0, 100.0, out)
+    return np.where(np.isnan(up) | np.isnan(down), np.nan, out)
+
+
+def macd(close: np.ndarray, fast=12, slow=26, signal=9):
+    """MACD line and signal line (TradingView ta.macd). Returns (macd, signal)."""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, length=14) -> np.ndarray:
+    """Average True Range with Wilder smoothing (TradingView ta.atr)."""
+    previous_close = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return rma(true_range, length)
+
+
+def compute_indicators(close: np.ndarray, high: np.ndarray, low: np.ndarray) -> dict:
+    """
+    Compute the latest indicator values of many symbols at once.
+
+    Returns:
+        dict: {TradingView indicator name: 1-D array with one value per symbol}
+    """
+    rsi_values = rsi(close)
+    macd_line, signal_line = macd(close)
+    latest = {
+        "close": close[:, -1],
+        "RSI": rsi_values[:, -1],
+        "RSI[1]": rsi_values[:, -2] if close.shape[1] > 1 else np.full(close.shape[0], np.nan),
+        "MACD.macd": macd_line[:, -1],
+        "MACD.signal": signal_line[:, -1],
+        "ATR": atr(high, low, close)[:, -1],
+    }
+    for length in MA_LENGTHS:
+        latest[f"EMA{length}"] = ema(close, length)[:, -1]
+        latest[f"SMA{length}"] = sma(close, length)[:, -1]
+    return latest
+
+
+def _recommend(value: np.ndarray) -> np.ndarray:
+    """Vectorised Compute.Recommend: map ratings in [-1, 1] to recommendation strings."""
+    return np.select(
+        [value < -0.5, value < -0.1, value <= 0.1, value <= 0.5, value <= 1],
+        [Recommendation.strong_sell, Recommendation.sell, Recommendation.neutral,
+         Recommendation.buy, Recommendation.strong_buy],
+        default=Recommendation.error
+    )
+
+
+def _rating(votes: list) -> np.ndarray:
+    """Average of +1/-1/0 votes per symbol; votes that are NaN (not enough history) abstain."""
+    stacked = np.vstack(votes)
+    counted = (~np.isnan(stacked)).sum(axis=0)
+    return np.nansum(stacked, axis=0) / np.maximum(counted, 1)
+
+
+def rate(latest: dict) -> dict:
+    """
+    Compute TradingView-style ratings from compute_indicators() output.
+
+    The moving-average rating votes each EMA/SMA against the close like
+    Compute.MA, the oscillator rating votes RSI like Compute.RSI and MACD
+    like Compute.MACD, and the summary is the mean of both ratings (as
+    TradingView's Recommend.All). Only the indicators scoring relies on are
+    computed, so the oscillator rating uses RSI and MACD only.
+
+    Returns:
+        dict: "Recommend.MA", "Recommend.Other", "Recommend.All" as float
+        arrays and "moving_averages", "oscillators", "recommendation" as
+        string arrays
+    """
+    close = latest["close"]
+    with np.errstate(invalid="ignore"):
+        ma_votes = []
+        for length in MA_LENGTHS:
+            for name in (f"EMA{length}", f"SMA{length}"):
+                ma = latest[name]
+                ma_votes.append(np.where(np.isnan(ma), np.nan, np.sign(close - ma)))
+
+        rsi_now, rsi_prev = latest["RSI"], latest["RSI[1]"]
+        rsi_vote = np.select(
+            [(rsi_now < 30) & (rsi_prev < rsi_now), (rsi_now > 70) & (rsi_prev > rsi_now)], [1.0, -1.0], default=0.0
+        )
+        rsi_vote = np.where(np.isnan(rsi_now) | np.isnan(rsi_prev), np.nan, rsi_vote)
+        macd_vote = np.sign(latest["MACD.macd"] - latest["MACD.signal"])
+
+    ma_rating = _rating(ma_votes)
+    other_rating = _rating([rsi_vote, macd_vote])
+    all_rating = (ma_rating + other_rating) / 2
+    return {
+        "Recommend.MA": ma_rating,
+        "Recommend.Other": other_rating,
+        "Recommend.All": all_rating,
+        "moving_averages": _recommend(ma_rating),
+        "oscillators": _recommend(other_rating),
+        "recommendation": _recommend(all_rating),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Bars -> result dicts
+# -----------------------------------------------------------------------------
+def resample_weekly(bars: np.ndarray) -> np.ndarray:
+    """Aggregate daily bars into weekly bars (weeks start on Monday, like TradingView)."""
+    if len(bars) == 0:
+        return bars
+    # 1970-01-01 was a Thursday: shifting by 3 days makes weeks start on Monday
+    week = (bars["ts"] // 86400 + 3) // 7
+    starts = np.flatnonzero(np.diff(week, prepend=week[0] - 1))
+    weekly = np.empty(len(starts), dtype=bars.dtype)
+    weekly["ts"] = (week[starts] * 7 - 3) * 86400
+    weekly["open"] = bars["open"][starts]
+    weekly["high"] = np.maximum.reduceat(bars["high"], starts)
+    weekly["low"] = np.minimum.reduceat(bars["low"], starts)
+    weekly["close"] = bars["close"][np.append(starts[1:], len(bars)) - 1]
+    weekly["volume"] = np.add.reduceat(bars["volume"], starts)
+    return weekly
+
+
+def stack_bars(bar_arrays: list, field: str, length=HISTORY_BARS) -> np.ndarray:
+    """
+    Stack one field of many bar arrays into a (symbols, length) float array.
+    The last `length` bars of each symbol are right-aligned; shorter
+    histories are left-padded with NaN.
+    """
+    out = np.full((len(bar_arrays), length), np.nan)
+    for row, bars in enumerate(bar_arrays):
+        values = bars[field][-length:]
+        if len(values):
+            out[row, length - len(values):] = values
+    return out
+
+
+def analyze_bars(symbols: list, exchanges: list, interval, bar_arrays: list) -> list:
+    """
+    Build the analysis result dicts of many symbols from their bars.
+
+    Indicators and ratings are computed for every symbol in one vectorised
+    pass. The dicts have the same shape as tradingview.build_analysis_result.
+
+    Returns:
+        list: One result dict per symbol (error dict when it has no bars)
+    """
+    close = stack_bars(bar_arrays, "close")
+    latest = compute_indicators(close, stack_bars(bar_arrays, "high"), stack_bars(bar_arrays, "low"))
+    ratings = rate(latest)
+
+    results = []
+    for i, (symbol, exchange) in enumerate(zip(symbols, exchanges)):
+        if np.isnan(latest["close"][i]):
+            results.append(error_result(symbol, exchange, f"No {interval} bars stored."))
+            continue
+        indicators = {name: _to_float(values[i]) for name, values in latest.items()}
+        for name in ("Recommend.MA", "Recommend.Other", "Recommend.All"):
+            indicators[name] = float(ratings[name][i])
+        results.append({
+            "symbol": symbol.upper(),
+            "exchange": exchange,
+            "timeframe": interval,
+            "recommendation": str(ratings["recommendation"][i]),
+            "oscillators": str(ratings["oscillators"][i]),
+            "moving_averages": str(ratings["moving_averages"][i]),
+            "RSI": indicators["RSI"] if indicators["RSI"] is not None else 50,
+            "MACD_hist": (indicators["MACD.macd"] or 0) - (indicators["MACD.signal"] or 0),
+            "indicators": indicators
+        })
+    return results
+
+
+def _to_float(value):
+    """Convert a NumPy scalar to a JSON-friendly float (None for NaN)."""
+    return None if np.isnan(value) else float(value)
+
+
+def load_bars(yf_symbol: str, interval) -> np.ndarray:
+    """Read the stored bars of an interval (weekly bars are resampled from daily ones)."""
+    if interval in DERIVED_INTERVALS:
+        return resample_weekly(np.asarray(ohlcv_store.read(yf_symbol, DERIVED_INTERVALS[interval])))
+    return ohlcv_store.read(yf_symbol, interval)
+
+
+# -----------------------------------------------------------------------------
+# Local analysis source (same interface as utils.tradingview)
+# -----------------------------------------------------------------------------
+def fetch_local_multi_interval_batch(keys, intervals=None, cache=None) -> dict:
+    """
+    Compute several timeframes for many symbols from the local OHLCV store.
+
+    Drop-in replacement for tradingview.fetch_multi_interval_batch: no
+    TradingView request is made. Stored bars older than the interval's TTL
+    are brought up to date with one Yahoo download per interval, then every
+    interval is computed for all symbols in one vectorised pass.
+
+    Args:
+        keys: Iterable of (symbol, exchange, screener) tuples
+        intervals: Intervals to compute (defaults to TIMEFRAMES)
+        cache: Optional PersistentCache used for lookups and storage
+
+    Returns:
+        dict: {(symbol, exchange, screener): {interval: result dict}}
+    """
+    intervals = list(intervals or TIMEFRAMES)
+    results = {}
+    pending = {}
+    for symbol, exchange, screener in keys:
+        key = (symbol.upper(), exchange, screener)
+        if key in results or key in pending:
+            continue
+        cached = {}
+        if cache is not None:
+            for interval in intervals:
+                cached_result = cache.get(make_key(symbol, exchange, screener, interval, source="local"))
+                if cached_result:
+                    cached[interval] = cached_result
+        if len(cached) == len(intervals):
+            results[key] = cached
+        else:
+            pending[key] = to_yahoo_symbol(key[0], screener)
+
+    if not pending:
+        return results
+
+    yf_symbols = sorted(set(pending.values()))
+    stored_intervals = {DERIVED_INTERVALS.get(interval, interval) for interval in intervals}
+    for stored_interval in stored_intervals:
+        refresh_history(yf_symbols, stored_interval, max_age=INTERVAL_TTLS.get(stored_interval, 3600))
+
+    computed = defaultdict(dict)
+    pending_keys = list(pending)
+    for interval in intervals:
+        bar_arrays = [load_bars(pending[key], interval) for key in pending_keys]
+        analyses = analyze_bars([k[0] for k in pending_keys], [k[1] for k in pending_keys], interval, bar_arrays)
+        for key, result in zip(pending_keys, analyses):
+            computed[key][interval] = result
+            if cache is not None and "error" not in result:
+                cache.set(make_key(key[0], key[1], key[2], interval, source="local"), result)
+
+    logging.info(f"Computed {len(pending_keys)} local analyses ({', '.join(intervals)})")
+    results.update(computed)
+    return results
+
+
+def fetch_local_analysis(symbol: str, exchange: str, screener: str, interval=Interval.INTERVAL_1_DAY) -> dict:
+    """Compute a single analysis from the local OHLCV store (no caching)."""
+    key = (symbol.upper(), exchange, screener)
+    return fetch_local_multi_interval_batch([key], [interval])[key][interval]
@@ -0,0 +1,269 @@
+"""Background job runner for analysis runs (per-job progress, logs and results)."""
+
+import contextvars
+import hmac
+import logging
+import secrets
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+MAX_JOB_LOGS = 100  # log entries kept per job
+MAX_JOB_EVENTS = 2000  # progress events kept per job for resuming streams
+MAX_JOBS = 20  # finished jobs kept for querying
+STREAM_TOKEN_TTL = 300  # seconds a job's stream token stays valid after the job finished
+
+# Log levels as the frontend log types
+LOG_TYPES = {logging.DEBUG: "info", logging.INFO: "info", logging.WARNING: "warning",
+             logging.ERROR: "error", logging.CRITICAL: "error"}
+
+
+class Job:
+    """One background run: status, progress, captured logs and result."""
+
+    def __init__(self, name, total_steps=5):
+        self.id = uuid.uuid4().hex
+        # Authenticates this job's event stream only (EventSource cannot send headers)
+        self.stream_token = secrets.token_urlsafe(16)
+        self.name = name
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.current_step = 0
+        self.total_steps = total_steps
+        self.current_step_name = ""
+        self.logs = deque(maxlen=MAX_JOB_LOGS)
+        self.result = None
+        self.error = None
+        # Progress events as (id, event, data), ids increasing from 1
+        self.events = deque(maxlen=MAX_JOB_EVENTS)
+        self._last_event_id = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    @property
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+    def accepts_stream_token(self, token) -> bool:
+        """True for this job's stream token, until STREAM_TOKEN_TTL seconds after the job finished."""
+        with self._lock:
+            if self.finished_at is not None and (datetime.now() - self.finished_at).total_seconds() > STREAM_TOKEN_TTL:
+                return False
+        return bool(token) and hmac.compare_digest(token, self.stream_token)
+
+    def _publish(self, event, data):
+        # Caller holds self._lock
+        self._last_event_id += 1
+        self.events.append((self._last_event_id, event, data))
+        self._changed.notify_all()
+
+    def publish(self, event, data):
+        """Append a progress event (e.g. "asset") and wake the event streams."""
+        with self._lock:
+            self._publish(event, data)
+
+    def events_since(self, last_event_id, timeout=None) -> list:
+        """
+        Return the events after `last_event_id`.
+
+        While the job is active and has nothing new, waits up to `timeout`
+        seconds for the next event first.
+        """
+        with self._changed:
+            if self._last_event_id <= last_event_id and self.is_active:
+                self._changed.wait(timeout)
+            return [event for event in self.events if event[0] > last_event_id]
+
+    def set_step(self, step, name):
+        """Record progress and log the step name."""
+        with self._lock:
+            self.current_step = step
+            self.current_step_name = name
+            self._publish("step", {"step": step, "total_steps": self.total_steps, "name": name})
+        logging.info(name)
+
+    def add_log(self, message, log_type="info"):
+        with self._lock:
+            entry = {
+                "timestamp": datetime.now().strftime("%H:%M:%S"),
+                "message": message,
+                "type": log_type
+            }
+            self.logs.append(entry)
+            self._publish("log", entry)
+
+    def start(self):
+        with self._lock:
+            self.started_at = datetime.now()
+            self.status = "running"
+
+    def finish(self, result=None, error=None):
+        """Store the outcome and publish it ("result" or "failed", then "end")."""
+        with self._lock:
+            # Status last, so a finished job always has its result and end time
+            self.finished_at = datetime.now()
+            self.result, self.error = result, error
+            self.status = "failed" if error is not None else "succeeded"
+            if error is None:
+                self._publish("result", result)
+            else:
+                self._publish("failed", {"error": error})
+            self._publish("end", {
+                "status": self.status,
+                "error": error,
+                "execution_time": self.elapsed_seconds()
+            })
+
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return None
+        return ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+
+    def to_dict(self, include_result=True):
+        """JSON view of the job (logs included; the result only when asked)."""
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "is_running": self.is_active,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "current_step": self.current_step,
+                "total_steps": self.total_steps,
+                "current_step_name": self.current_step_name,
+                "execution_time": self.elapsed_seconds(),
+                "error": self.error,
+                "logs": list(self.logs),
+            }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+# The job being run in the current context; its log receives the records
+# emitted there (see JobLogHandler and in_job_context)
+current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def in_job_context(func):
+    """
+    Wrap `func` to run in a copy of the caller's context, so the records it
+    logs from worker pool threads still reach the caller's job log.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # One copy per call: a context cannot be entered by two threads at once
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+class JobLogHandler(logging.Handler):
+    """
+    Copies log records emitted while running a job into the job's log.
+
+    Attached to the root logger for the duration of a job instead of
+    redirecting sys.stdout; records are matched to the job through the
+    current_job context variable, so other threads' output is left alone.
+    """
+
+    def __init__(self, job):
+        super().__init__(level=logging.INFO)
+        self.job = job
+
+    def emit(self, record):
+        if current_job.get() is not self.job:
+            return
+        try:
+            self.job.add_log(record.getMessage(), LOG_TYPES.get(record.levelno, "info"))
+        except Exception:
+            self.handleError(record)
+
+
+class JobRunner:
+    """
+    Runs jobs on a small worker pool and keeps the recent ones queryable.
+
+    submit() returns at once with the Job; the job function receives the Job
+    as its first argument to report progress, and its return value becomes
+    the job's result.
+    """
+
+    def __init__(self, max_workers=1, max_jobs=MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, *args, total_steps=5, **kwargs) -> Job:
+        return self._submit(name, func, args, kwargs, total_steps, exclusive=False)[0]
+
+    def submit_once(self, name, func, *args, total_steps=5, **kwargs):
+        """
+        Like submit(), unless a job of `name` is already queued or running.
+
+        The check and the submission happen under one lock, so concurrent
+        callers start a single job. Returns (job, started).
+        """
+        return self._submit(name, func, args, kwargs, total_steps, exclusive=True)
+
+    def _submit(self, name, func, args, kwargs, total_steps, exclusive):
+        with self._lock:
+            if exclusive:
+                active = self._active(name)
+                if active is not None:
+                    return active, False
+            job = Job(name, total_steps=total_steps)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job, True
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.is_active]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list:
+        """Known jobs, most recent first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def active(self, name=None):
+        """Return the queued or running job (of `name`), if any."""
+        with self._lock:
+            return self._active(name)
+
+    def _active(self, name):
+        # Caller holds self._lock
+        return next((job for job in reversed(self._jobs.values()) if job.is_active and name in (None, job.name)), None)
+
+    def latest(self, name=None):
+        return next((job for job in self.jobs() if name in (None, job.name)), None)
+
+    def _run(self, job, func, args, kwargs):
+        handler = JobLogHandler(job)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(handler)
+        token = current_job.set(job)
+        job.start()
+        result, error = None, None
+        try:
+            result = func(job, *args, **kwargs)
+        except Exception as e:
+            logging.error(f"Job {job.name} ({job.id}) failed: {e}", exc_info=True)
+            error = str(e)
+        finally:
+            current_job.reset(token)
+            root_logger.removeHandler(handler)
+        job.finish(result, error)
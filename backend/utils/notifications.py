@@ -0,0 +1,343 @@
+"""Long-lived Telegram notification service (one event loop thread, one Bot session)."""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import threading
+
+from telegram import Bot
+from telegram.error import BadRequest
+
+from utils.rate_limiter import get_limiter
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+def split_message(text: str, max_length: int = MAX_MESSAGE_LENGTH) -> list:
+    """Split a message into Telegram-sized chunks."""
+    return [text[i:i + max_length] for i in range(0, len(text), max_length)]
+
+
+def chunk_hash(chunk: str) -> str:
+    """Content hash of one sent chunk, stored next to its message ID."""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+class NotificationService:
+    """
+    Sends Telegram messages from a single background event loop.
+
+    The service owns one daemon thread running an asyncio loop and one Bot
+    (and so one HTTP connection pool) for the life of the process. Other
+    threads hand it work through a thread-safe queue and get a
+    concurrent.futures.Future back, so the scheduler and the API never block
+    on Telegram. Jobs run one at a time, in submission order; a failed job's
+    Future raises (retries are left to the caller, see utils/outbox.py).
+
+    A caller that stops waiting cancels its job with result(future, timeout),
+    so the job cannot still go out after the caller gave up (and retried).
+
+    Without credentials every job is a no-op that resolves to []. With
+    credentials, a Bot that failed to initialize is retried by the next job,
+    and the job fails while it cannot be initialized.
+    """
+
+    def __init__(self, bot_token, chat_id, messages_file, bot_factory=Bot):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.messages_file = messages_file
+        self.bot_factory = bot_factory
+        self._bot = None
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._running = None  # (future, task) of the job being run
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Thread-side API
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Start the event loop thread (no-op when already running)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._run, args=(ready,), name="notification-service", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def stop(self, timeout=30):
+        """Finish the queued jobs, close the Bot session and stop the thread."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+            self._thread.join(timeout)
+
+    def submit(self, text: str, delete_old: bool = False) -> concurrent.futures.Future:
+        """
+        Queue a message without blocking.
+
+        Args:
+            text: The message text (split into 4096-character chunks)
+            delete_old: Whether to delete the previously sent messages first
+
+        Returns:
+            Future: Resolves to the list of sent message IDs
+        """
+        return self._submit(self.send_message, text, delete_old)
+
+    def submit_report(self, messages, edit: bool = True) -> concurrent.futures.Future:
+        """
+        Queue a report (a sequence of messages) that replaces the previous one.
+
+        Args:
+            messages: The report's message texts, in order
+            edit: Edit the previous report's messages in place when possible,
+                instead of deleting them and sending new ones
+
+        Returns:
+            Future: Resolves to the report's message IDs
+        """
+        return self._submit(self.send_report, tuple(messages), edit)
+
+    def send(self, text: str, delete_old: bool = False, timeout=None) -> list:
+        """Queue a message and wait for its message IDs."""
+        return self.result(self.submit(text, delete_old), timeout)
+
+    def result(self, future, timeout=None):
+        """
+        Wait for a job's result, cancelling the job when `timeout` expires.
+
+        A queued job is dropped; a running one is interrupted at its next
+        await, before any further Telegram call. What it sent until then has
+        gone out.
+
+        Raises:
+            concurrent.futures.TimeoutError: When the job did not finish in time
+        """
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.cancel(future)
+            raise
+
+    def cancel(self, future):
+        """Cancel a job: drop it if it is still queued, else interrupt it."""
+        if not future.cancel() and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancel_running, future)
+
+    def _submit(self, coroutine_function, *args) -> concurrent.futures.Future:
+        self.start()
+        future = concurrent.futures.Future()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (coroutine_function, args, future))
+        return future
+
+    # -------------------------------------------------------------------------
+    # Event loop side
+    # -------------------------------------------------------------------------
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._worker())
+        finally:
+            self._loop.close()
+
+    async def _worker(self):
+        if not self.configured:
+            logging.warning("Telegram credentials not configured; notifications are disabled")
+        try:
+            await self._ensure_bot()
+        except Exception as e:
+            # Retried by the next job
+            logging.error(f"Could not initialize Telegram bot: {e}")
+        while True:
+            job = await self._queue.get()
+            if job is None:
+                break
+            coroutine_function, args, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            task = asyncio.ensure_future(coroutine_function(*args))
+            self._running = (future, task)
+            try:
+                future.set_result(await task)
+            except asyncio.CancelledError:
+                future.set_exception(concurrent.futures.CancelledError("Cancelled after its caller stopped waiting"))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._running = None
+        await self._close_bot()
+
+    def _cancel_running(self, future):
+        if self._running is not None and self._running[0] is future:
+            self._running[1].cancel()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.bot_token and self.chat_id)
+
+    async def _ensure_bot(self) -> bool:
+        """
+        Open the Bot session if it is not open yet.
+
+        Returns:
+            bool: False when no credentials are configured (jobs are no-ops)
+
+        Raises:
+            Exception: When the configured credentials cannot produce a Bot
+        """
+        if not self.configured:
+            return False
+        if self._bot is None:
+            bot = self.bot_factory(token=self.bot_token)
+            await bot.initialize()
+            self._bot = bot
+        return True
+
+    async def _close_bot(self):
+        if self._bot is not None:
+            try:
+                await self._bot.shutdown()
+            except Exception as e:
+                logging.warning(f"Error closing Telegram bot session: {e}")
+            self._bot = None
+
+    def _load_state(self) -> dict:
+        """
+        Load the sent messages: {"report": [{"message_id", "hash"}], "messages": [message_id]}.
+
+        The report's entries are kept apart from the IDs of other messages
+        (alerts, errors), so those do not change the report's chunk count.
+        A plain list from older versions loads as the report, with no hashes.
+        """
+        try:
+            with open(self.messages_file, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"report": [], "messages": []}
+        if isinstance(data, list):
+            data = {"report": data}
+        return {
+            "report": [entry if isinstance(entry, dict) else {"message_id": entry, "hash": None}
+                       for entry in data.get("report", [])],
+            "messages": list(data.get("messages", [])),
+        }
+
+    def _save_state(self, report=None, messages=None):
+        """Replace the report entries and/or the other message IDs (one write per job)."""
+        state = self._load_state()
+        if report is not None:
+            state["report"] = report
+        if messages is not None:
+            state["messages"] = messages
+        with open(self.messages_file, "w") as f:
+            json.dump(state, f)
+
+    def load_entries(self) -> list:
+        """Load the report's sent messages as [{"message_id", "hash"}] entries."""
+        return self._load_state()["report"]
+
+    def save_entries(self, entries):
+        """Replace the report's sent message entries."""
+        self._save_state(report=entries)
+
+    def load_message_ids(self) -> list:
+        """Load every saved Telegram message ID (the report's, then the others)."""
+        state = self._load_state()
+        return [entry["message_id"] for entry in state["report"]] + state["messages"]
+
+    async def delete_previous_messages(self):
+        """Delete every saved message concurrently, within the Telegram rate budget."""
+        message_ids = self.load_message_ids()
+        if self._bot is not None and message_ids:
+            await asyncio.gather(*(self._delete_message(msg_id) for msg_id in message_ids))
+        self._save_state(report=[], messages=[])
+
+    async def _delete_message(self, msg_id):
+        try:
+            await get_limiter("telegram").async_wait_if_needed()
+            await self._bot.delete_message(chat_id=self.chat_id, message_id=msg_id)
+        except Exception as e:
+            logging.warning(f"Could not delete message {msg_id}: {e}")
+
+    async def _send_chunk(self, chunk: str):
+        await get_limiter("telegram").async_wait_if_needed()
+        return await self._bot.send_message(chat_id=self.chat_id, text=chunk)
+
+    async def _edit_chunk(self, message_id, chunk: str):
+        try:
+            await get_limiter("telegram").async_wait_if_needed()
+            await self._bot.edit_message_text(chunk, chat_id=self.chat_id, message_id=message_id)
+        except BadRequest as e:
+            # Same text as already shown (e.g. entries saved without a hash)
+            if "not modified" not in str(e).lower():
+                raise
+
+    async def send_chunks(self, chunks: list, entries: list):
+        """Send chunks in order, appending each sent message's entry to `entries`."""
+        for chunk in chunks:
+            sent_message = await self._send_chunk(chunk)
+            entries.append({"message_id": sent_message.message_id, "hash": chunk_hash(chunk)})
+        logging.info(f"Successfully sent {len(chunks)} message(s) to Telegram")
+
+    async def send_report(self, messages, edit: bool = True) -> list:
+        """
+        Replace the previous report with `messages`.
+
+        When the report still has as many chunks as the stored one, only the
+        chunks whose content hash changed are edited in place (zero calls when
+        nothing changed). Otherwise, or when an edit fails, the old messages
+        are deleted and the report is sent again.
+        """
+        if not await self._ensure_bot():
+            return []
+        chunks = [chunk for text in messages for chunk in split_message(text)]
+        entries = self.load_entries()
+
+        if edit and entries and len(entries) == len(chunks):
+            changed = [i for i, chunk in enumerate(chunks) if entries[i]["hash"] != chunk_hash(chunk)]
+            try:
+                for i in changed:
+                    await self._edit_chunk(entries[i]["message_id"], chunks[i])
+                    entries[i] = {"message_id": entries[i]["message_id"], "hash": chunk_hash(chunks[i])}
+                self.save_entries(entries)
+                logging.info(f"Updated {len(changed)} of {len(chunks)} report message(s) in place")
+                return [entry["message_id"] for entry in entries]
+            except Exception as e:
+                logging.warning(f"Could not edit the report in place, resending it: {e}")
+
+        await self.delete_previous_messages()
+        entries = []
+        try:
+            await self.send_chunks(chunks, entries)
+        finally:
+            # Keep what did go out, so a retry replaces it instead of duplicating it
+            self.save_entries(entries)
+        return [entry["message_id"] for entry in entries]
+
+    async def send_message(self, text: str, delete_old: bool = False) -> list:
+        """Send a message (in chunks), optionally deleting the previous ones first."""
+        if not await self._ensure_bot():
+            return []
+        if delete_old:
+            await self.delete_previous_messages()
+
+        entries = []
+        try:
+            await self.send_chunks(split_message(text), entries)
+        finally:
+            if entries:
+                # Not part of the report: deleted with it when it is resent
+                message_ids = [entry["message_id"] for entry in entries]
+                self._save_state(messages=self._load_state()["messages"] + message_ids)
+        return [entry["message_id"] for entry in entries]
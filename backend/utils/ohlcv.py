@@ -0,0 +1,111 @@
+"""Local columnar OHLCV store (one memory-mapped file per symbol and interval)."""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+# Fixed record layout: bar open time (epoch seconds) and float64 prices/volume
+OHLCV_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ohlcv")
+
+
+def frame_to_bars(frame) -> np.ndarray:
+    """
+    Convert a single-ticker yfinance DataFrame (Open/High/Low/Close/Volume) to bars.
+    Rows without a close are dropped.
+    """
+    frame = frame.dropna(subset=["Close"])
+    bars = np.empty(len(frame), dtype=OHLCV_DTYPE)
+    index = frame.index
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    bars["ts"] = index.values.astype("datetime64[s]").astype("int64")
+    for field, column in (("open", "Open"), ("high", "High"), ("low", "Low"), ("close", "Close"), ("volume", "Volume")):
+        bars[field] = frame[column].to_numpy(dtype="float64") if column in frame else np.nan
+    return bars
+
+
+class OHLCVStore:
+    """
+    Append-only bar history stored as raw fixed-dtype records.
+
+    Each (symbol, interval) lives in `<root>/<interval>/<SYMBOL>.bin`. Reads are
+    np.memmap views, so slicing a date range copies nothing. append() only
+    writes bars newer than the last stored one; a bar with the same timestamp
+    as the last one (the still-open bar) overwrites it in place.
+    """
+
+    def __init__(self, root=DEFAULT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, symbol.upper().replace("/", "_") + ".bin")
+
+    def read(self, symbol: str, interval="1d", start=None, end=None) -> np.ndarray:
+        """
+        Return the stored bars of a symbol, optionally limited to start <= ts < end
+        (epoch seconds). The result is a read-only memmap view (zero-copy).
+        """
+        path = self._path(symbol, interval)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=OHLCV_DTYPE)
+        bars = np.memmap(path, dtype=OHLCV_DTYPE, mode="r")
+        lo = 0 if start is None else int(np.searchsorted(bars["ts"], start, side="left"))
+        hi = len(bars) if end is None else int(np.searchsorted(bars["ts"], end, side="left"))
+        return bars[lo:hi]
+
+    def last_bar(self, symbol: str, interval="1d"):
+        """Return the most recent stored bar, or None."""
+        bars = self.read(symbol, interval)
+        return bars[-1] if len(bars) else None
+
+    def last_timestamp(self, symbol: str, interval="1d"):
+        """Return the open time of the most recent stored bar, or None."""
+        bar = self.last_bar(symbol, interval)
+        return int(bar["ts"]) if bar is not None else None
+
+    def updated_at(self, symbol: str, interval="1d"):
+        """Return when the symbol was last refreshed from upstream (epoch seconds), or None."""
+        path = self._path(symbol, interval)
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def is_fresh(self, symbol: str, interval="1d", max_age=300) -> bool:
+        """Tell whether the symbol was refreshed less than `max_age` seconds ago."""
+        updated_at = self.updated_at(symbol, interval)
+        return updated_at is not None and time.time() - updated_at < max_age
+
+    def append(self, symbol: str, bars: np.ndarray, interval="1d") -> int:
+        """
+        Store the bars that are not held yet and mark the symbol as refreshed.
+
+        Returns:
+            int: Number of bars written (including an overwritten open bar)
+        """
+        path = self._path(symbol, interval)
+        bars = np.sort(np.asarray(bars, dtype=OHLCV_DTYPE), order="ts")
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            last_ts = self.last_timestamp(symbol, interval)
+            if last_ts is not None:
+                bars = bars[bars["ts"] >= last_ts]
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                if last_ts is not None and len(bars) and bars["ts"][0] == last_ts:
+                    # Replace the still-open last bar with its newer version
+                    f.seek(-OHLCV_DTYPE.itemsize, os.SEEK_END)
+                else:
+                    f.seek(0, os.SEEK_END)
+                f.write(bars.tobytes())
+            # The file mtime records the last refresh, even when nothing was new
+            os.utime(path)
+        return len(bars)
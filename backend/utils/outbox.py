@@ -0,0 +1,239 @@
+"""Durable notification outbox (SQLite) with a background dispatcher."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# Retry schedule: BASE_DELAY * 2**(attempt - 1), capped at MAX_DELAY
+BASE_DELAY = 30  # seconds
+MAX_DELAY = 3600  # seconds
+MAX_ATTEMPTS = 8  # then the notification is dead-lettered
+POLL_SECONDS = 30  # upper bound on the dispatcher's sleep
+LEASE_SECONDS = 600  # a claimed row returns to pending if not settled by then
+
+
+def backoff_delay(attempts, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Seconds to wait before retrying after `attempts` failed deliveries."""
+    return min(max_delay, base_delay * 2 ** (attempts - 1))
+
+
+class NotificationOutbox:
+    """
+    Persistent queue of rendered notifications, delivered by a background thread.
+
+    Producers enqueue a payload for a channel under an idempotency key and
+    return immediately; enqueueing the same key twice is a no-op. The
+    dispatcher thread calls the channel's handler (a blocking callable that
+    raises on failure), retries failures with exponential backoff and moves a
+    notification to the "dead" status after `max_attempts`. Rows live in
+    SQLite, so pending notifications survive a restart and are delivered by
+    the next process; a row is marked sent right after its handler returns,
+    so delivery is at least once with a window of one in-flight notification.
+
+    A dispatcher claims a row (pending -> sending, with a lease) before
+    calling its handler, so several dispatchers on the same file (processes
+    or outbox instances) never deliver the same row concurrently. A row whose
+    lease expired, because its dispatcher died mid-delivery, goes back to
+    pending.
+
+    Statuses: pending -> sending -> sent | dead (or back to pending for a
+    retry), or superseded when a newer notification of a `supersede` channel
+    (e.g. a report that replaces the previous one) is enqueued before it went out.
+    """
+
+    def __init__(self, db_file, handlers, supersede=(), max_attempts=MAX_ATTEMPTS,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY, poll_seconds=POLL_SECONDS,
+                 lease_seconds=LEASE_SECONDS):
+        self.db_file = db_file
+        self.handlers = handlers
+        self.supersede = set(supersede)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "idempotency_key TEXT NOT NULL UNIQUE, "
+            "channel TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt REAL NOT NULL, "
+            "last_error TEXT, "
+            "lease_until REAL, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        if "lease_until" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN lease_until REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+        self._conn.commit()
+        self._release_expired_leases()
+
+    # -------------------------------------------------------------------------
+    # Producer side
+    # -------------------------------------------------------------------------
+    def enqueue(self, channel, payload, idempotency_key) -> bool:
+        """
+        Store a notification for delivery and wake the dispatcher.
+
+        Returns:
+            bool: False when a notification with this key already exists
+        """
+        if channel not in self.handlers:
+            raise ValueError(f"Unknown notification channel: {channel}")
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO outbox (idempotency_key, channel, payload, next_attempt, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (idempotency_key, channel, json.dumps(payload), now, now, now)
+                ).rowcount == 1
+                if inserted and channel in self.supersede:
+                    self._conn.execute(
+                        "UPDATE outbox SET status = 'superseded', updated_at = ? "
+                        "WHERE channel = ? AND status = 'pending' AND idempotency_key != ?",
+                        (now, channel, idempotency_key)
+                    )
+        if not inserted:
+            logging.info(f"Notification {idempotency_key} already queued, skipping")
+        self.start()
+        self._wake.set()
+        return inserted
+
+    def counts(self) -> dict:
+        """Return {status: number of notifications}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def dead_letters(self, limit=50) -> list:
+        """Return the most recent dead-lettered notifications."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idempotency_key, channel, attempts, last_error, created_at FROM outbox "
+                "WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"idempotency_key": key, "channel": channel, "attempts": attempts,
+             "last_error": last_error, "created_at": created_at}
+            for key, channel, attempts, last_error, created_at in rows
+        ]
+
+    # -------------------------------------------------------------------------
+    # Dispatcher
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Start the dispatcher thread (no-op when already running)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=30):
+        """Stop the dispatcher after its current delivery; pending rows stay stored."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _release_expired_leases(self):
+        """Return rows claimed by a dispatcher that never settled them to pending."""
+        with self._lock:
+            with self._conn:
+                released = self._conn.execute(
+                    "UPDATE outbox SET status = 'pending', lease_until = NULL "
+                    "WHERE status = 'sending' AND lease_until < ?", (time.time(),)
+                ).rowcount
+        if released:
+            logging.warning(f"Released {released} notification(s) whose delivery lease expired")
+
+    def _claim(self, row_id) -> bool:
+        """Atomically take a pending row for delivery; False when another dispatcher has it."""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(
+                    "UPDATE outbox SET status = 'sending', lease_until = ?, updated_at = ? "
+                    "WHERE id = ? AND status = 'pending'",
+                    (now + self.lease_seconds, now, row_id)
+                ).rowcount == 1
+
+    def _next_due(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, idempotency_key, channel, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt <= ? ORDER BY id LIMIT 1", (time.time(),)
+            ).fetchone()
+            wait = self.poll_seconds
+            if row is None:
+                next_attempt = self._conn.execute(
+                    "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'"
+                ).fetchone()[0]
+                if next_attempt is not None:
+                    wait = max(0.0, min(wait, next_attempt - time.time()))
+        return row, wait
+
+    def _update(self, row_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(f"UPDATE outbox SET {assignments} WHERE id = ?", (*fields.values(), row_id))
+
+    def deliver_due(self) -> int:
+        """Deliver every notification that is due now; returns how many were attempted."""
+        attempted = 0
+        while not self._stopping:
+            row, _ = self._next_due()
+            if row is None:
+                break
+            if not self._claim(row[0]):
+                # Delivered (or being delivered) by another dispatcher
+                continue
+            self._deliver(*row)
+            attempted += 1
+        return attempted
+
+    def _deliver(self, row_id, key, channel, payload, attempts):
+        try:
+            self.handlers[channel](json.loads(payload))
+        except Exception as e:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                logging.error(f"Notification {key} failed {attempts} times, dead-lettered: {e}")
+                self._update(row_id, status="dead", attempts=attempts, last_error=str(e), lease_until=None)
+            else:
+                delay = backoff_delay(attempts, self.base_delay, self.max_delay)
+                logging.warning(f"Notification {key} failed (attempt {attempts}), retrying in {delay}s: {e}")
+                self._update(row_id, status="pending", attempts=attempts, last_error=str(e),
+                             next_attempt=time.time() + delay, lease_until=None)
+            return
+        self._update(row_id, status="sent", attempts=attempts + 1, last_error=None, lease_until=None)
+        logging.info(f"Notification {key} delivered")
+
+    def _run(self):
+        while not self._stopping:
+            # Cleared before looking for work so an enqueue during delivery is not missed
+            self._wake.clear()
+            try:
+                self._release_expired_leases()
+                self.deliver_due()
+                _, wait = self._next_due()
+            except Exception as e:
+                logging.error(f"Notification outbox dispatcher error: {e}")
+                wait = self.poll_seconds
+            self._wake.wait(wait)
@@ -1,32 +1,191 @@
 """Price fetching utilities."""
 
 import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pandas as pd
 import yfinance as yf
 
+from utils.ohlcv import OHLCVStore, frame_to_bars
+from utils.rate_limiter import rate_limited
+
+# How long (seconds) a downloaded price is reused within and across runs
+PRICE_TTL = 300
+
+# How long (seconds) a failed or empty download is remembered, so an outage
+# does not turn every later lookup into another single-ticker download
+MISSING_PRICE_TTL = 60
+
+# History downloaded for a symbol the store does not hold yet, per interval.
+# Daily history covers 200 weekly bars for the local indicator engine;
+# Yahoo only serves intraday bars for the last 60 days.
+#
+# This is a one-time cost per symbol, paid on the first run with an empty
+# store (backend/data/ohlcv). After that only the bars since the last stored
+# day are downloaded:
+# - 1d: the price path (get_current_prices) fetches it for every analyzed
+#   symbol. It takes as many Yahoo requests as the former period="1d"
+#   download, because yf.download fetches one ticker per request either way,
+#   but each response is about 1,260 bars (stocks) or 1,830 (crypto) instead
+#   of one. Stored at 48 bytes a bar, that is roughly 60-90 KB per symbol.
+# - 1h and 15m: only downloaded with ANALYSIS_SOURCE=local. Per crypto symbol
+#   that is about 4,400 and 2,900 bars (200 and 140 KB); stocks, trading
+#   6.5 hours a day, need about a quarter of that.
+INITIAL_HISTORY = {"1d": "5y", "1h": "6mo", "15m": "30d"}
+
+# Memoised Yahoo prices: {yf_symbol: (price or None, fetched_at)}
+_price_memo = {}
+_memo_lock = threading.Lock()
+
+def _memo_valid(yf_symbol, now) -> bool:
+    """True when a memoised price (or miss) is still valid. Caller holds _memo_lock."""
+    if yf_symbol not in _price_memo:
+        return False
+    price, fetched_at = _price_memo[yf_symbol]
+    return now - fetched_at < (PRICE_TTL if price is not None else MISSING_PRICE_TTL)
+
+# Local daily bar history, read before going to Yahoo
+ohlcv_store = OHLCVStore()
+
+@rate_limited(budget="yahoo")
+def _download(tickers, **kwargs):
+    """Download price data from Yahoo Finance (charged to the Yahoo rate limit budget)."""
+    return yf.download(tickers, progress=False, **kwargs)
+
+def to_yahoo_symbol(symbol: str, asset_type: str) -> str:
+    """Map a TradingView symbol to its Yahoo Finance ticker (BTCUSDT -> BTC-USD)."""
+    if asset_type == "crypto":
+        return symbol.replace("USDT", "-USD")
+    return symbol
+
+def _ticker_frame(data, yf_symbol):
+    """Extract one ticker's OHLCV columns from a (multi-ticker) yf.download frame."""
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        if yf_symbol not in data.columns.get_level_values(1):
+            return None
+        return data.xs(yf_symbol, axis=1, level=1)
+    return data
+
+def update_history(yf_symbols, interval="1d") -> dict:
+    """
+    Bring the local bar history of many tickers up to date.
+
+    Only bars from the last stored day onwards are requested (that day is
+    refetched because its bar may still have been open). Tickers are grouped
+    by start date so each group is one multi-ticker yf.download; tickers the
+    store does not know get INITIAL_HISTORY of bars.
+
+    Returns:
+        dict: {yf_symbol: latest close or None}
+    """
+    groups = defaultdict(list)
+    for yf_symbol in yf_symbols:
+        last_ts = ohlcv_store.last_timestamp(yf_symbol, interval)
+        start = None if last_ts is None else datetime.fromtimestamp(last_ts, tz=timezone.utc).strftime("%Y-%m-%d")
+        groups[start].append(yf_symbol)
+
+    closes = {}
+    for start, symbols in groups.items():
+        kwargs = {"period": INITIAL_HISTORY[interval]} if start is None else {"start": start}
+        try:
+            data = _download(symbols, interval=interval, group_by="column", **kwargs)
+            logging.info(f"Downloaded {len(symbols)} price histories from Yahoo Finance in one request")
+        except Exception as e:
+            logging.error(f"Error fetching current prices for {len(symbols)} symbols: {e}")
+            continue
+        for yf_symbol in symbols:
+            frame = _ticker_frame(data, yf_symbol)
+            bars = frame_to_bars(frame) if frame is not None else None
+            if bars is None or len(bars) == 0:
+                closes[yf_symbol] = None
+                continue
+            ohlcv_store.append(yf_symbol, bars, interval)
+            closes[yf_symbol] = float(ohlcv_store.last_bar(yf_symbol, interval)["close"])
+    return closes
+
+def refresh_history(yf_symbols, interval="1d", max_age=PRICE_TTL) -> int:
+    """
+    Update the stored bars of the tickers not refreshed in the last `max_age` seconds.
+
+    Returns:
+        int: Number of tickers that were downloaded
+    """
+    stale = [yf_symbol for yf_symbol in yf_symbols if not ohlcv_store.is_fresh(yf_symbol, interval, max_age=max_age)]
+    if stale:
+        update_history(stale, interval)
+    return len(stale)
+
+def get_current_prices(assets, tv_indicators=None) -> dict:
+    """
+    Fetch the latest daily closing prices of many assets with one Yahoo request.
+
+    Prices already fetched in the last PRICE_TTL seconds are reused, from
+    memory or from the local OHLCV store; tickers whose download failed or
+    came back empty are not requested again for MISSING_PRICE_TTL seconds. All other tickers get their missing
+    bars appended to the store with one multi-ticker yf.download. Assets Yahoo
+    has no price for fall back to TradingView's "close" from `tv_indicators`.
+
+    Args:
+        assets: Iterable of (symbol, asset_type) tuples
+        tv_indicators: Optional {symbol: TradingView indicators dict} for the fallback
+
+    Returns:
+        dict: {symbol: price or None}
+    """
+    tv_indicators = tv_indicators or {}
+    yf_symbols = {symbol: to_yahoo_symbol(symbol, asset_type) for symbol, asset_type in assets}
+
+    now = time.time()
+    with _memo_lock:
+        missing = sorted({yf_symbol for yf_symbol in yf_symbols.values() if not _memo_valid(yf_symbol, now)})
+
+    # Warm start: prices the store refreshed recently need no I/O
+    stored = {}
+    for yf_symbol in missing:
+        if ohlcv_store.is_fresh(yf_symbol, max_age=PRICE_TTL):
+            stored[yf_symbol] = float(ohlcv_store.last_bar(yf_symbol)["close"])
+    with _memo_lock:
+        for yf_symbol, price in stored.items():
+            _price_memo[yf_symbol] = (price, now)
+    missing = [yf_symbol for yf_symbol in missing if yf_symbol not in stored]
+
+    if missing:
+        fetched = update_history(missing)
+        with _memo_lock:
+            # Failed downloads are remembered as None for MISSING_PRICE_TTL
+            for yf_symbol in missing:
+                _price_memo[yf_symbol] = (fetched.get(yf_symbol), now)
+
+    prices = {}
+    fallbacks = []
+    with _memo_lock:
+        for symbol, yf_symbol in yf_symbols.items():
+            prices[symbol] = _price_memo.get(yf_symbol, (None, 0))[0]
+
+    # Fallback: use TradingView's close where Yahoo had nothing
+    for symbol, price in prices.items():
+        if price is None:
+            tv_close = (tv_indicators.get(symbol) or {}).get("close")
+            if tv_close is not None:
+                prices[symbol] = float(tv_close)
+                fallbacks.append(symbol)
+    if fallbacks:
+        logging.info(f"Using TradingView close price as fallback for {', '.join(fallbacks)}.")
+
+    return prices
+
 def get_current_price(symbol: str, asset_type: str, tv_indicators=None):
     """
     Fetch the latest closing price from Yahoo Finance using a daily interval.
     If no data is returned, fall back to TradingView's "close" price from tv_indicators.
+    Served from the per-run price memo when get_current_prices already fetched it.
     """
-    try:
-        # Determine the Yahoo Finance symbol.
-        if asset_type == "crypto":
-            yf_symbol = symbol.replace("USDT", "-USD")
-        else:
-            yf_symbol = symbol
-        # Always use daily data.
-        data = yf.download(yf_symbol, period="1d", interval="1d", progress=False)
-        if not data.empty and 'Close' in data.columns:
-            price = float(data['Close'].iloc[-1])
-            return price
-        logging.warning(f"No current price found for {yf_symbol} on Yahoo Finance.")
-        # Fallback: use TradingView's close if available.
-        if tv_indicators:
-            tv_close = tv_indicators.get("close")
-            if tv_close is not None:
-                logging.info(f"Using TradingView close price as fallback for {yf_symbol}.")
-                return float(tv_close)
-        return None
-    except Exception as e:
-        logging.error(f"Error fetching current price for {yf_symbol}: {e}")
-        return None 
\ No newline at end of file
+    price = get_current_prices([(symbol, asset_type)], {symbol: tv_indicators})[symbol]
+    if price is None:
+        logging.warning(f"No current price found for {to_yahoo_symbol(symbol, asset_type)} on Yahoo Finance.")
+    return price
@@ -0,0 +1,214 @@
+"""Field projection, filtering, sorting and cursor pagination over an analysis result."""
+
+import base64
+import json
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+# Query string parameters understood by parse_query()
+QUERY_PARAMS = ("fields", "sections", "asset_type", "min_score", "sort", "limit", "cursor")
+ASSET_TYPES = ("stock", "crypto")
+MAX_LIMIT = 500
+
+
+class QueryError(ValueError):
+    """Invalid query parameter (reported to the client as 400)."""
+
+
+class Section:
+    """One result list (e.g. "top_stocks") stored column by column."""
+
+    __slots__ = ("columns", "length", "is_crypto", "_numeric")
+
+    def __init__(self, name, rows):
+        names = list(dict.fromkeys(column for row in rows for column in row))
+        self.columns = {column: [row.get(column) for row in rows] for column in names}
+        self.length = len(rows)
+        asset_types = self.columns.get("Asset_Type")
+        if asset_types is not None:
+            self.is_crypto = np.array([asset_type == "crypto" for asset_type in asset_types], dtype=bool)
+        else:
+            # Wallet sections have no Asset_Type column; their name tells
+            self.is_crypto = np.full(self.length, "crypto" in name, dtype=bool)
+        self._numeric = {}
+
+    def numeric(self, column) -> np.ndarray:
+        """The column as floats (NaN where missing or not a number), built once."""
+        if column not in self._numeric:
+            values = self.columns.get(column, [None] * self.length)
+            self._numeric[column] = np.array(
+                [value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                 for value in values],
+                dtype=float
+            )
+        return self._numeric[column]
+
+
+class ColumnarResult:
+    """An analysis result ({"timestamp", section: [records]}) in columnar form."""
+
+    __slots__ = ("source", "timestamp", "sections")
+
+    def __init__(self, result):
+        self.source = result
+        self.timestamp = result.get("timestamp")
+        self.sections = {name: Section(name, rows) for name, rows in result.items() if isinstance(rows, list)}
+
+    def has_column(self, column):
+        return any(column in section.columns for section in self.sections.values())
+
+
+class ColumnarResults:
+    """Columnar forms of named results, rebuilt only when the result object changes."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, result) -> ColumnarResult:
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry.source is not result:
+            entry = ColumnarResult(result)
+            with self._lock:
+                self._entries[name] = entry
+        return entry
+
+
+@dataclass(frozen=True)
+class AnalysisQuery:
+    fields: tuple = None
+    sections: tuple = None
+    asset_type: str = None
+    min_score: float = None
+    sort: str = None
+    descending: bool = False
+    limit: int = None
+    offset: int = 0
+    cursor_timestamp: str = None
+
+
+def encode_cursor(offset, timestamp) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset, "t": timestamp}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(data["o"]), data["t"]
+    except Exception:
+        raise QueryError("Invalid cursor")
+
+
+def _split(value):
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+def parse_query(args):
+    """
+    Parse the query parameters of an analysis endpoint.
+
+    Returns:
+        AnalysisQuery, or None when none of QUERY_PARAMS is present
+
+    Raises:
+        QueryError: On a malformed parameter
+    """
+    if not any(name in args for name in QUERY_PARAMS):
+        return None
+
+    asset_type = args.get("asset_type")
+    if asset_type is not None and asset_type not in ASSET_TYPES:
+        raise QueryError(f"asset_type must be one of {', '.join(ASSET_TYPES)}")
+
+    try:
+        min_score = float(args["min_score"]) if "min_score" in args else None
+        limit = int(args["limit"]) if "limit" in args else None
+    except ValueError:
+        raise QueryError("min_score must be a number and limit an integer")
+    if limit is not None and not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    sort = args.get("sort") or None
+    descending = bool(sort) and sort.startswith("-")
+    offset, cursor_timestamp = decode_cursor(args["cursor"]) if args.get("cursor") else (0, None)
+
+    return AnalysisQuery(
+        fields=_split(args["fields"]) if args.get("fields") else None,
+        sections=_split(args["sections"]) if args.get("sections") else None,
+        asset_type=asset_type,
+        min_score=min_score,
+        sort=sort.lstrip("-") if sort else None,
+        descending=descending,
+        limit=limit,
+        offset=offset,
+        cursor_timestamp=cursor_timestamp,
+    )
+
+
+def _sorted_indices(section, indices, column, descending):
+    """Order row indices by a column (stable, missing values last)."""
+    values = section.columns.get(column)
+    if values is None:
+        return indices
+    present = [i for i in indices if values[i] is not None]
+    missing = [i for i in indices if values[i] is None]
+    try:
+        present.sort(key=lambda i: values[i], reverse=descending)
+    except TypeError:
+        present.sort(key=lambda i: str(values[i]), reverse=descending)
+    return present + missing
+
+
+def run_query(columnar: ColumnarResult, query: AnalysisQuery) -> dict:
+    """
+    Evaluate a query on a columnar result.
+
+    Filters (asset_type, min_score) are boolean masks over the columns; rows
+    without a Score do not pass min_score. `limit` and the cursor page every
+    selected section at the same offset; "next_cursor" is set while any
+    section has more rows, and "counts" gives each section's matching rows.
+
+    Raises:
+        QueryError: On unknown fields, sections or sort column, or a cursor
+            from an older analysis
+    """
+    if query.cursor_timestamp is not None and query.cursor_timestamp != columnar.timestamp:
+        raise QueryError("Cursor belongs to an older analysis; start again without it")
+    names = query.sections or tuple(columnar.sections)
+    unknown = [name for name in names if name not in columnar.sections]
+    unknown += [field for field in query.fields or () if not columnar.has_column(field)]
+    if query.sort and not columnar.has_column(query.sort):
+        unknown.append(query.sort)
+    if unknown:
+        raise QueryError(f"Unknown fields or sections: {', '.join(unknown)}")
+
+    payload = {"timestamp": columnar.timestamp}
+    counts = {}
+    has_more = False
+    for name in names:
+        section = columnar.sections[name]
+        mask = np.ones(section.length, dtype=bool)
+        if query.asset_type is not None:
+            mask &= section.is_crypto == (query.asset_type == "crypto")
+        if query.min_score is not None:
+            with np.errstate(invalid="ignore"):
+                mask &= section.numeric("Score") >= query.min_score
+        indices = np.flatnonzero(mask).tolist()
+        if query.sort:
+            indices = _sorted_indices(section, indices, query.sort, query.descending)
+
+        counts[name] = len(indices)
+        end = len(indices) if query.limit is None else query.offset + query.limit
+        has_more = has_more or end < len(indices)
+        fields = [field for field in query.fields or section.columns if field in section.columns]
+        payload[name] = [
+            {field: section.columns[field][i] for field in fields}
+            for i in indices[query.offset:end]
+        ]
+
+    payload["counts"] = counts
+    payload["next_cursor"] = encode_cursor(query.offset + query.limit, columnar.timestamp) if has_more else None
+    return payload
@@ -1,32 +1,161 @@
 """Rate limiting utilities to prevent API abuse."""
 
+import asyncio
+import logging
+import threading
 import time
 from functools import wraps
 
 class RateLimiter:
-    def __init__(self, calls_per_second=1):
+    """
+    Thread-safe token bucket.
+
+    Tokens refill at `calls_per_second` up to `burst`. Each call takes one
+    token, waiting (outside the lock) until one is available, so concurrent
+    callers never exceed the budget and are served in turn.
+    """
+
+    def __init__(self, calls_per_second=1, burst=1):
         self.calls_per_second = calls_per_second
-        self.last_call_time = 0
+        self.burst = burst
         self.min_interval = 1.0 / calls_per_second
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.calls_per_second)
+            self._last_refill = now
+            # Tokens may go negative: that is the queue of callers already waiting
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.calls_per_second
 
     def wait_if_needed(self):
-        current_time = time.time()
-        elapsed = current_time - self.last_call_time
-        
-        if elapsed < self.min_interval:
-            sleep_time = self.min_interval - elapsed
-            time.sleep(sleep_time)
-            
-        self.last_call_time = time.time()
-
-def rate_limited(calls_per_second=1):
-    """Decorator to rate limit function calls."""
-    limiter = RateLimiter(calls_per_second)
-    
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def async_wait_if_needed(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Token bucket whose rate follows an AIMD (additive increase, multiplicative
+    decrease) controller.
+
+    Every successful call raises the rate by `increase` calls/second up to
+    `max_rate`; a throttling signal (HTTP 429, timeout, empty response)
+    multiplies it by `decrease`, down to `min_rate`. The rate converges on
+    what the upstream tolerates instead of a fixed guess.
+    """
+
+    def __init__(self, calls_per_second=2, burst=1, min_rate=0.2, max_rate=10, increase=0.05, decrease=0.5):
+        super().__init__(calls_per_second, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.successes = 0
+        self.throttles = 0
+
+    def _set_rate(self, rate):
+        self.calls_per_second = rate
+        self.min_interval = 1.0 / rate
+
+    @property
+    def current_rate(self):
+        return self.calls_per_second
+
+    def record_success(self):
+        """Additive increase after a call the upstream answered normally."""
+        with self._lock:
+            self.successes += 1
+            self._set_rate(min(self.max_rate, self.calls_per_second + self.increase))
+
+    def record_throttle(self, reason=""):
+        """Multiplicative decrease after a 429, timeout or empty response."""
+        with self._lock:
+            self.throttles += 1
+            self._set_rate(max(self.min_rate, self.calls_per_second * self.decrease))
+            # Drop saved-up burst so the lower rate applies immediately
+            self._tokens = min(self._tokens, 0)
+            rate = self.calls_per_second
+        logging.warning(f"Upstream throttling detected ({reason}); rate lowered to {rate:.2f} calls/s")
+
+    def metrics(self):
+        return {
+            "rate": round(self.calls_per_second, 3),
+            "successes": self.successes,
+            "throttles": self.throttles,
+        }
+
+
+# Named budgets, one per upstream service: (calls per second, burst)
+BUDGETS = {
+    "tradingview": (2, 2),
+    "yahoo": (2, 4),
+    "telegram": (1, 3),
+    "smtp": (1, 1),
+}
+
+# Budgets whose rate adapts to upstream throttling (AdaptiveRateLimiter kwargs)
+ADAPTIVE_BUDGETS = {
+    "tradingview": {"min_rate": 0.2, "max_rate": 10},
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(name):
+    """Return the shared limiter for a named budget (created on first use)."""
+    with _limiters_lock:
+        if name not in _limiters:
+            calls_per_second, burst = BUDGETS.get(name, (1, 1))
+            if name in ADAPTIVE_BUDGETS:
+                _limiters[name] = AdaptiveRateLimiter(calls_per_second, burst, **ADAPTIVE_BUDGETS[name])
+            else:
+                _limiters[name] = RateLimiter(calls_per_second, burst)
+        return _limiters[name]
+
+def get_rate_metrics():
+    """Return the current rate (and AIMD counters where adaptive) of every named budget."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {
+        name: limiter.metrics() if isinstance(limiter, AdaptiveRateLimiter) else {"rate": limiter.calls_per_second}
+        for name, limiter in limiters.items()
+    }
+
+def rate_limited(calls_per_second=1, budget=None):
+    """
+    Decorator to rate limit function calls.
+
+    With `budget`, the call is charged to the shared limiter of that upstream
+    (see BUDGETS) so every function talking to it shares one budget.
+    Works for both regular and async functions. Only decorate the function
+    that performs the network request, never a cache lookup.
+    """
     def decorator(func):
+        limiter = get_limiter(budget) if budget else RateLimiter(calls_per_second)
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                await limiter.async_wait_if_needed()
+                return await func(*args, **kwargs)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             limiter.wait_if_needed()
             return func(*args, **kwargs)
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,197 @@
+"""Report rendering utilities (Telegram text, email HTML and API JSON views)."""
+
+import html
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from utils.results import TOP_COLUMNS, WALLET_COLUMNS, to_columns, to_records
+
+# Result lists of a run, in API order, with the presentation columns of each
+REPORT_SECTIONS = {
+    "best_stocks": TOP_COLUMNS,
+    "top_stocks": TOP_COLUMNS,
+    "best_cryptos": TOP_COLUMNS,
+    "top_cryptos": TOP_COLUMNS,
+    "wallet_stocks": WALLET_COLUMNS,
+    "wallet_cryptos": WALLET_COLUMNS,
+}
+
+PROBABILITY_COLUMNS = ["Short Probability", "Mid Probability", "Long Probability"]
+
+
+def _length(columns: dict) -> int:
+    return len(next(iter(columns.values()), []))
+
+
+def _column(columns: dict, name: str, default, length: int) -> list:
+    return list(columns[name]) if name in columns else [default] * length
+
+
+def format_asset_lines(columns: dict) -> list:
+    """
+    Format the message lines of many assets in one pass over their columns.
+
+    Args:
+        columns: {column name: list of values}, e.g. from results.to_columns()
+
+    Returns:
+        list: One line per asset, as format_asset_line would render each row
+    """
+    length = _length(columns)
+    symbols = _column(columns, "Symbol", "Unknown", length)
+    recs = _column(columns, "Daily Recommendation", "N/A", length)
+    prices = _column(columns, "Current Price", 0, length)
+    lines = [
+        f"• {symbol}: `Rec={rec}` | 📈 `Curr=${(curr or 0):,.2f}`"
+        for symbol, rec, curr in zip(symbols, recs, prices)
+    ]
+
+    # Add take profit and score for top assets
+    if "Score" in columns:
+        take_profits = _column(columns, "Take Profit", 0, length)
+        lines = [
+            f"{line} | 🎯 `TP=${(tp or 0):,.2f}` | `Score={score}`"
+            for line, tp, score in zip(lines, take_profits, columns["Score"])
+        ]
+
+        # Add probability info for top assets
+        if all(name in columns for name in PROBABILITY_COLUMNS):
+            horizons = _column(columns, "Recommended Horizon", "N/A", length)
+            lines = [
+                f"{line}\n   ➜ Short: {short}% | Mid: {mid}% | Long: {long}% | Recommended: {horizon}-term"
+                for line, short, mid, long, horizon in zip(
+                    lines, *(columns[name] for name in PROBABILITY_COLUMNS), horizons
+                )
+            ]
+    return lines
+
+
+def format_asset_line(row) -> str:
+    """Format a single asset line for the Telegram message."""
+    return format_asset_lines({name: [value] for name, value in row.items()})[0]
+
+
+def render_section(title: str, columns: dict, empty_text: str) -> list:
+    """
+    Render one report section: a title, one line per asset (each followed by a
+    blank line) or `empty_text` when there are no assets.
+    """
+    lines = [title, ""]
+    length = _length(columns)
+    if not length:
+        return lines + [empty_text, ""]
+
+    try:
+        asset_lines = format_asset_lines(columns)
+    except Exception:
+        # Fall back to row by row so one bad value only hides its own asset
+        asset_lines = []
+        for i in range(length):
+            row = {name: values[i] for name, values in columns.items()}
+            try:
+                asset_lines.append(format_asset_line(row))
+            except Exception as e:
+                logging.error(f"Error formatting {row.get('Symbol', 'unknown')}: {e}")
+                asset_lines.append(f"• {row.get('Symbol', 'unknown')}: Error displaying data")
+
+    for line in asset_lines:
+        lines += [line, ""]
+    return lines
+
+
+def exclude_symbols(columns: dict, symbols) -> dict:
+    """Drop the rows whose Symbol is in `symbols` (a set lookup per row)."""
+    excluded = set(symbols)
+    keep = [symbol not in excluded for symbol in columns.get("Symbol", [])]
+    return {name: [value for value, kept in zip(values, keep) if kept] for name, values in columns.items()}
+
+
+@dataclass(frozen=True)
+class Report:
+    """
+    The rendered output of one analysis run, built once by build_report().
+
+    Every channel reads its own view: `telegram_messages` (main report and
+    wallets), `email_html` under `subject`, and `api_json` for the API. The JSON
+    view is kept serialised so the report stays immutable; to_dict() decodes it.
+    """
+
+    subject: str
+    telegram_messages: tuple
+    email_text: str
+    email_html: str
+    api_json: str
+    created_at: str
+
+    def to_dict(self) -> dict:
+        """Return the API view as a fresh dict."""
+        return json.loads(self.api_json)
+
+
+def _email_html(subject: str, text: str, created_at: datetime) -> str:
+    return f"""
+        <html>
+            <head></head>
+            <body>
+                <div style="font-family: Arial, sans-serif; line-height: 1.5;">
+                    <h2 style="color: #333;">{html.escape(subject)}</h2>
+                    <div style="white-space: pre-wrap;">{html.escape(text)}</div>
+                    <p style="color: #777; margin-top: 20px; font-size: 12px;">
+                        Sent by Trading Bot on {created_at.strftime('%Y-%m-%d %H:%M:%S')}
+                    </p>
+                </div>
+            </body>
+        </html>
+        """
+
+
+def build_report(results: dict, created_at=None) -> Report:
+    """
+    Render every view of a run's results once.
+
+    Args:
+        results: {section name: list of AssetResult} for every REPORT_SECTIONS key
+        created_at: Run time (defaults to now)
+    """
+    created_at = created_at or datetime.now()
+    columns = {name: to_columns(results[name], REPORT_SECTIONS[name]) for name in REPORT_SECTIONS}
+
+    main_lines = [
+        "📊 Daily Market Analysis 📊",
+        "----------------------------------------",
+        ""
+    ]
+    main_lines += render_section("🔥 Best Stock Picks (Top 6) 🔥", columns["best_stocks"], "No bullish stocks found. 😔")
+    main_lines += render_section(
+        "🏢 Other Top Stocks", exclude_symbols(columns["top_stocks"], columns["best_stocks"]["Symbol"]),
+        "No additional bullish stocks found. 😔"
+    )
+    main_lines += render_section("🔥 Best Crypto Picks (Top 6) 🔥", columns["best_cryptos"], "No bullish cryptos found. 😔")
+    main_message = "\n".join(main_lines)
+
+    wallet_lines = render_section("👜 My Stocks Wallet", columns["wallet_stocks"], "No wallet stocks data available. 😔")
+    wallet_lines += render_section("👜 My Cryptos Wallet", columns["wallet_cryptos"], "No wallet cryptos data available. 😔")
+    wallet_message = "\n".join(wallet_lines)
+
+    first_line = main_lines[0]
+    subject = first_line[:50] + "..." if len(first_line) > 50 else first_line
+    email_text = main_message + "\n\n" + wallet_message
+
+    # API view: column names use underscores for the frontend
+    payload = {"timestamp": created_at.isoformat()}
+    for name, section_columns in REPORT_SECTIONS.items():
+        payload[name] = [
+            {column.replace(" ", "_"): value for column, value in record.items()}
+            for record in to_records(results[name], section_columns)
+        ]
+
+    return Report(
+        subject=subject,
+        telegram_messages=(main_message, wallet_message),
+        email_text=email_text,
+        email_html=_email_html(subject, email_text, created_at),
+        api_json=json.dumps(payload),
+        created_at=created_at.isoformat(),
+    )
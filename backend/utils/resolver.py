@@ -0,0 +1,119 @@
+"""Persistent symbol -> exchange resolution index."""
+
+import logging
+import time
+from collections import defaultdict
+
+from utils.cache import PersistentCache
+from utils.tradingview import BATCH_SIZE, find_listings
+
+# Exchanges probed (in order of preference) when resolving a symbol
+STOCK_EXCHANGES = ["NASDAQ", "NYSE", "AMEX"]
+CRYPTO_EXCHANGES = ["BINANCE", "COINBASE", "KRAKEN"]
+
+# Listings rarely move, misses are rechecked more often (new listings)
+RESOLVED_TTL = 30 * 86400
+NOT_FOUND_TTL = 86400
+
+# After a failed listing query, a screener is not queried again for this long
+OUTAGE_BACKOFF = 300
+
+
+def candidate_listings(symbol: str, asset_type: str) -> list:
+    """Return the (ticker, exchange) pairs to probe for a raw symbol, in order of preference."""
+    if asset_type == "crypto":
+        ticker = symbol.upper() + "USDT"
+        return [(ticker, exchange) for exchange in CRYPTO_EXCHANGES]
+    return [(symbol.upper(), exchange) for exchange in STOCK_EXCHANGES]
+
+
+class ExchangeResolver:
+    """
+    Maps raw symbols (e.g. "BTC", "KO") to their (ticker, exchange, screener).
+
+    Entries are kept in a PersistentCache with a long TTL. Symbols found on no
+    supported exchange are stored as negative entries with a shorter TTL so
+    they are not probed again on every run. Unknown symbols are resolved in
+    bulk: every candidate listing of a screener's symbols goes into one
+    listing query, sent as one scanner request per BATCH_SIZE tickers.
+
+    A failed query records nothing, but the screener is backed off for
+    OUTAGE_BACKOFF seconds, so an outage does not turn into one probe per
+    later resolve() call.
+    """
+
+    def __init__(self, cache_file="exchange_index.json", resolved_ttl=RESOLVED_TTL, not_found_ttl=NOT_FOUND_TTL,
+                 outage_backoff=OUTAGE_BACKOFF):
+        self.index = PersistentCache(cache_file=cache_file, expiry_seconds=resolved_ttl)
+        self.not_found_ttl = not_found_ttl
+        self.outage_backoff = outage_backoff
+        # {screener: time until which it is not queried}
+        self._backoff_until = {}
+
+    def _lookup(self, symbol: str, asset_type: str):
+        """Return the stored entry for a symbol, or None if unknown or expired."""
+        entry = self.index.get((asset_type, symbol.upper()))
+        if entry is None:
+            return None
+        if entry["exchange"] is None and time.time() - entry["checked_at"] > self.not_found_ttl:
+            return None
+        return entry
+
+    def resolve_many(self, assets) -> dict:
+        """
+        Resolve many raw symbols at once.
+
+        Args:
+            assets: Iterable of (symbol, asset_type) tuples, asset_type being "crypto" or "america"
+
+        Returns:
+            dict: {(symbol, asset_type): (ticker, exchange)} with (None, None) for unresolved symbols
+        """
+        results = {}
+        pending = defaultdict(list)
+
+        for symbol, asset_type in assets:
+            entry = self._lookup(symbol, asset_type)
+            if entry is not None:
+                results[(symbol, asset_type)] = (entry["ticker"], entry["exchange"])
+            else:
+                pending[asset_type].append(symbol)
+
+        for screener, symbols in pending.items():
+            if time.time() < self._backoff_until.get(screener, 0):
+                for symbol in symbols:
+                    results[(symbol, screener)] = (None, None)
+                continue
+            tickers = [f"{exchange}:{ticker}" for symbol in symbols for ticker, exchange in candidate_listings(symbol, screener)]
+            try:
+                found = find_listings(screener, tickers)
+            except Exception as e:
+                # Do not record negative entries for an outage
+                self._backoff_until[screener] = time.time() + self.outage_backoff
+                logging.warning(f"Could not resolve {len(symbols)} {screener} symbols: {e}; "
+                                f"not querying {screener} again for {self.outage_backoff} s")
+                for symbol in symbols:
+                    results[(symbol, screener)] = (None, None)
+                continue
+
+            for symbol in symbols:
+                ticker, exchange = next(
+                    ((t, ex) for t, ex in candidate_listings(symbol, screener) if f"{ex}:{t}" in found),
+                    (None, None)
+                )
+                self.index.set((screener, symbol.upper()), {
+                    "ticker": ticker,
+                    "exchange": exchange,
+                    "screener": screener,
+                    "checked_at": time.time()
+                })
+                results[(symbol, screener)] = (ticker, exchange)
+            requests = (len(tickers) + BATCH_SIZE - 1) // BATCH_SIZE
+            logging.info(f"Resolved {len(symbols)} {screener} symbols ({len(tickers)} candidate listings) "
+                         f"in {requests} scanner request(s)")
+
+        return results
+
+    def resolve(self, symbol: str, asset_type: str):
+        """Resolve a single raw symbol. Returns (ticker, exchange) or (None, None)."""
+        return self.resolve_many([(symbol, asset_type)])[(symbol, asset_type)]
@@ -0,0 +1,162 @@
+"""Compact analysis result types (slotted rows and a shared indicator matrix)."""
+
+import numpy as np
+import pandas as pd
+from tradingview_ta import TradingView
+
+# Shared column index of the indicator matrix: every TradingView indicator
+# plus the ones only the local engine provides
+INDICATOR_COLUMNS = list(dict.fromkeys(TradingView.indicators + ["ATR"]))
+INDICATOR_INDEX = {name: i for i, name in enumerate(INDICATOR_COLUMNS)}
+
+
+class IndicatorMatrix:
+    """
+    Daily indicators of many assets as one float array.
+
+    Row i holds the indicators of asset i, columns follow INDICATOR_COLUMNS.
+    Missing values are NaN. This replaces one ~90-key dict per asset.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    @classmethod
+    def from_dicts(cls, indicator_dicts: list) -> "IndicatorMatrix":
+        """Pack a list of indicator dicts (None for missing) into a matrix."""
+        values = np.full((len(indicator_dicts), len(INDICATOR_COLUMNS)), np.nan)
+        for row, indicators in enumerate(indicator_dicts):
+            for name, value in (indicators or {}).items():
+                column = INDICATOR_INDEX.get(name)
+                if column is not None and isinstance(value, (int, float)):
+                    values[row, column] = value
+        return cls(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return one indicator for every asset."""
+        return self.values[:, INDICATOR_INDEX[name]]
+
+    def get(self, row: int, name: str):
+        """Return one indicator of one asset, or None when missing."""
+        value = self.values[row, INDICATOR_INDEX[name]]
+        return None if np.isnan(value) else float(value)
+
+    def row_dict(self, row: int) -> dict:
+        """Rebuild the indicator dict of one asset (only the values present)."""
+        return {
+            name: float(value)
+            for name, value in zip(INDICATOR_COLUMNS, self.values[row])
+            if not np.isnan(value)
+        }
+
+
+class AssetResult:
+    """
+    One analyzed asset.
+
+    A slotted object instead of a 20-key dict; its daily indicators live in
+    row `row` of the shared IndicatorMatrix. Use to_record() / to_frame() to
+    get the presentation columns ("Symbol", "Daily Recommendation", ...).
+    """
+
+    __slots__ = (
+        "symbol", "exchange", "asset_type", "source",
+        "daily_recommendation", "weekly_recommendation", "rsi", "macd_hist",
+        "score", "rec_priority", "atr", "current_price", "take_profit",
+        "short_probability", "mid_probability", "long_probability", "recommended_horizon",
+        "matrix", "row",
+    )
+
+    def __init__(self, symbol, exchange, asset_type, source="Top", daily_recommendation="N/A",
+                 weekly_recommendation="N/A", rsi=50, macd_hist=0, score=None, rec_priority=6,
+                 atr=None, current_price=None, take_profit=None, short_probability=None,
+                 mid_probability=None, long_probability=None, recommended_horizon=None,
+                 matrix=None, row=None):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.asset_type = asset_type
+        self.source = source
+        self.daily_recommendation = daily_recommendation
+        self.weekly_recommendation = weekly_recommendation
+        self.rsi = rsi
+        self.macd_hist = macd_hist
+        self.score = score
+        self.rec_priority = rec_priority
+        self.atr = atr
+        self.current_price = current_price
+        self.take_profit = take_profit
+        self.short_probability = short_probability
+        self.mid_probability = mid_probability
+        self.long_probability = long_probability
+        self.recommended_horizon = recommended_horizon
+        self.matrix = matrix
+        self.row = row
+
+    @property
+    def indicators(self):
+        """The asset's daily indicator dict, rebuilt from the matrix on demand."""
+        if self.matrix is None or self.row is None:
+            return None
+        return self.matrix.row_dict(self.row)
+
+    def to_record(self, columns) -> dict:
+        """Return the asset as {presentation column: value} for the given column map."""
+        return {column: getattr(self, attribute) for column, attribute in columns.items()}
+
+    def __repr__(self):
+        return f"AssetResult({self.symbol!r}, {self.exchange!r}, score={self.score!r})"
+
+
+# Presentation columns of top assets and of wallet assets: {column: attribute}
+TOP_COLUMNS = {
+    "Symbol": "symbol",
+    "Exchange": "exchange",
+    "Daily Recommendation": "daily_recommendation",
+    "Weekly Recommendation": "weekly_recommendation",
+    "RSI": "rsi",
+    "MACD_Hist": "macd_hist",
+    "Score": "score",
+    "RecPriority": "rec_priority",
+    "Current Price": "current_price",
+    "Take Profit": "take_profit",
+    "ATR": "atr",
+    "Asset_Type": "asset_type",
+    "Source": "source",
+    "Short Probability": "short_probability",
+    "Mid Probability": "mid_probability",
+    "Long Probability": "long_probability",
+    "Recommended Horizon": "recommended_horizon",
+}
+
+WALLET_COLUMNS = {
+    "Symbol": "symbol",
+    "Exchange": "exchange",
+    "Daily Recommendation": "daily_recommendation",
+    "RSI": "rsi",
+    "MACD_Hist": "macd_hist",
+    "Current Price": "current_price",
+    "RecPriority": "rec_priority",
+    "Source": "source",
+}
+
+
+def to_records(results: list, columns=TOP_COLUMNS) -> list:
+    """Convert AssetResults to presentation dicts."""
+    return [result.to_record(columns) for result in results]
+
+
+def to_columns(results: list, columns=TOP_COLUMNS) -> dict:
+    """Return AssetResults as {presentation column: list of values}."""
+    return {column: [getattr(result, attribute) for result in results] for column, attribute in columns.items()}
+
+
+def to_frame(results: list, columns=TOP_COLUMNS) -> pd.DataFrame:
+    """Build a presentation DataFrame from AssetResults (empty when there are none)."""
+    if not results:
+        return pd.DataFrame()
+    return pd.DataFrame(to_records(results, columns), columns=list(columns))
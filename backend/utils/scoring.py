@@ -0,0 +1,170 @@
+"""Asset scoring (single-asset reference and vectorised batch scorer)."""
+
+import numpy as np
+from tradingview_ta import Interval
+
+# Score adjustment per daily and weekly recommendation
+REC_ADJUSTMENT = {"STRONG_BUY": 20, "BUY": 10, "NEUTRAL": 0, "SELL": -10, "STRONG_SELL": -20}
+WEEKLY_ADJUSTMENT = {"STRONG_BUY": 10, "BUY": 5, "NEUTRAL": 0, "SELL": -5, "STRONG_SELL": -10}
+
+# Horizon names in tie-breaking order (the first best one wins)
+HORIZONS = ["Short", "Mid", "Long"]
+
+# Interval scored for each horizon
+HORIZON_INTERVALS = {
+    "Short": Interval.INTERVAL_15_MINUTES,
+    "Mid": Interval.INTERVAL_1_HOUR,
+    "Long": Interval.INTERVAL_1_DAY,
+}
+
+# Indicators evaluate_asset computes with; it raises when one is present but None
+REQUIRED_INDICATORS = ("RSI", "MACD_hist")
+
+
+def evaluate_asset(daily_analysis: dict, weekly_analysis: dict = None) -> int:
+    """
+    Evaluate an asset and return a score from 0 to 100.
+    Uses recommendation, RSI, MACD histogram, moving averages, and ATR.
+    """
+    score = 50  # Base score
+
+    # Recommendation adjustment
+    rec = daily_analysis.get("recommendation", "NEUTRAL").upper()
+    score += REC_ADJUSTMENT.get(rec, 0)
+
+    # RSI adjustment: best is near 50
+    rsi = daily_analysis.get("RSI", 50)
+    rsi_adjustment = 10 - abs(rsi - 50) * 0.5
+    score += rsi_adjustment
+
+    # MACD histogram adjustment
+    macd_hist = daily_analysis.get("MACD_hist", 0)
+    if macd_hist > 0:
+        score += 10
+    elif macd_hist < 0:
+        score -= 10
+
+    # Moving averages signal
+    ma_signal = daily_analysis.get("moving_averages", "NEUTRAL").upper()
+    if ma_signal in ["BUY", "STRONG_BUY"]:
+        score += 10
+    elif ma_signal in ["SELL", "STRONG_SELL"]:
+        score -= 10
+
+    # Volatility adjustment (using ATR)
+    atr = daily_analysis.get("indicators", {}).get("ATR", None)
+    if atr is not None:
+        if atr < 1:
+            score += 5
+        elif atr > 2:
+            score -= 5
+
+    # Weekly analysis adjustment (if provided)
+    if weekly_analysis and "error" not in weekly_analysis:
+        weekly_rec = weekly_analysis.get("recommendation", "NEUTRAL").upper()
+        score += WEEKLY_ADJUSTMENT.get(weekly_rec, 0)
+
+    # Ensure score is between 0 and 100
+    return max(0, min(100, int(score)))
+
+
+def _lookup(values: np.ndarray, mapping: dict) -> np.ndarray:
+    """Map an array of strings through a dict (unknown values map to 0), one lookup per distinct value."""
+    if len(values) == 0:
+        return np.zeros(0)
+    unique, inverse = np.unique(values, return_inverse=True)
+    return np.array([mapping.get(value, 0) for value in unique], dtype=float)[inverse]
+
+
+def _or_nan(value):
+    return np.nan if value is None else value
+
+
+def unscorable_intervals(analyses: dict) -> list:
+    """Return the horizon intervals whose analysis has a REQUIRED_INDICATORS value of None."""
+    return [
+        interval for interval in HORIZON_INTERVALS.values()
+        if "error" not in (analyses.get(interval) or {"error": "missing"})
+        and any(name in analyses[interval] and analyses[interval][name] is None for name in REQUIRED_INDICATORS)
+    ]
+
+
+def build_score_table(analyses: list, intervals=None) -> dict:
+    """
+    Extract the columns scoring uses from per-asset analysis dicts.
+
+    Args:
+        analyses: List of {interval: analysis dict}, one per asset
+        intervals: Intervals to extract (defaults to the horizon intervals plus weekly)
+
+    Returns:
+        dict: {interval: {"valid", "recommendation", "RSI", "MACD_hist",
+        "moving_averages", "ATR"}} with one array entry per asset; RSI and
+        MACD_hist values of None are NaN
+    """
+    intervals = intervals or list(HORIZON_INTERVALS.values()) + [Interval.INTERVAL_1_WEEK]
+    table = {}
+    for interval in intervals:
+        rows = [per_interval.get(interval) or {"error": "missing"} for per_interval in analyses]
+        atr = [(row.get("indicators") or {}).get("ATR") for row in rows]
+        table[interval] = {
+            "valid": np.array(["error" not in row for row in rows], dtype=bool),
+            "recommendation": np.array([str(row.get("recommendation", "NEUTRAL")).upper() for row in rows], dtype=object),
+            "RSI": np.array([_or_nan(row.get("RSI", 50)) for row in rows], dtype=float),
+            "MACD_hist": np.array([_or_nan(row.get("MACD_hist", 0)) for row in rows], dtype=float),
+            "moving_averages": np.array([str(row.get("moving_averages", "NEUTRAL")).upper() for row in rows], dtype=object),
+            "ATR": np.array([np.nan if value is None else value for value in atr], dtype=float),
+        }
+    return table
+
+
+def score_columns(columns: dict, weekly: dict = None) -> np.ndarray:
+    """
+    Vectorised evaluate_asset over one interval's columns.
+
+    The adjustments are added in the same order as evaluate_asset, so the
+    float result and its int truncation are identical. Rows that are not
+    `valid` score 0, and so do rows with a NaN RSI or MACD_hist, which
+    evaluate_asset cannot score (see unscorable_intervals). Missing ATR
+    values are NaN and add nothing.
+    """
+    score = 50 + _lookup(columns["recommendation"], REC_ADJUSTMENT)
+    score = score + (10 - np.abs(columns["RSI"] - 50) * 0.5)
+    macd_hist = columns["MACD_hist"]
+    score = score + np.where(macd_hist > 0, 10, np.where(macd_hist < 0, -10, 0))
+    ma_signal = columns["moving_averages"]
+    score = score + np.where(np.isin(ma_signal, ["BUY", "STRONG_BUY"]), 10,
+                             np.where(np.isin(ma_signal, ["SELL", "STRONG_SELL"]), -10, 0))
+    atr = columns["ATR"]
+    score = score + np.where(atr < 1, 5, np.where(atr > 2, -5, 0))
+    if weekly is not None:
+        score = score + np.where(weekly["valid"], _lookup(weekly["recommendation"], WEEKLY_ADJUSTMENT), 0)
+    valid = columns["valid"] & ~np.isnan(columns["RSI"]) & ~np.isnan(macd_hist)
+    return np.clip(np.trunc(np.where(valid, score, 0)), 0, 100).astype(int)
+
+
+def score_assets(analyses: list) -> dict:
+    """
+    Score many assets at once, identically to evaluate_asset / get_timeframe_scores.
+
+    Args:
+        analyses: List of {interval: analysis dict}, one per asset
+
+    Returns:
+        dict: "Short Probability", "Mid Probability", "Long Probability" and
+        "Score" as int arrays and "Recommended Horizon" as a string array
+    """
+    table = build_score_table(analyses)
+    probabilities = np.vstack([
+        score_columns(
+            table[HORIZON_INTERVALS[horizon]],
+            table[Interval.INTERVAL_1_WEEK] if horizon == "Long" else None
+        )
+        for horizon in HORIZONS
+    ])
+    result = {f"{horizon} Probability": probabilities[i] for i, horizon in enumerate(HORIZONS)}
+    # The overall score is the daily score with the weekly bonus, i.e. the long-term score
+    result["Score"] = probabilities[HORIZONS.index("Long")]
+    # argmax returns the first maximum, like max() over the Short/Mid/Long dict
+    result["Recommended Horizon"] = np.array(HORIZONS, dtype=object)[np.argmax(probabilities, axis=0)]
+    return result
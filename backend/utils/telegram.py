@@ -8,6 +8,7 @@ from telegram.error import TimedOut
 from telegram import Bot
 
 from utils.config import BOT_TOKEN, CHAT_ID
+from utils.rate_limiter import get_limiter
 from utils.email import send_email  # Import the email function
 
 MESSAGE_LOG_FILE = "telegram_messages.json"
@@ -40,8 +41,8 @@ async def delete_previous_messages():
     message_ids = load_message_ids()
     for msg_id in message_ids:
         try:
+            await get_limiter("telegram").async_wait_if_needed()
             await bot.delete_message(chat_id=CHAT_ID, message_id=msg_id)
-            await asyncio.sleep(0.5)
         except Exception as e:
             logging.warning(f"Could not delete message {msg_id}: {e}")
     with open(MESSAGE_LOG_FILE, "w") as f:
@@ -88,12 +89,14 @@ async def send_message_to_telegram(text: str, delete_old: bool = False):
                 logging.info(f"Attempting to delete {len(message_ids)} previous messages: {message_ids}")
                 for msg_id in message_ids:
                     try:
+                        await get_limiter("telegram").async_wait_if_needed()
                         await bot.delete_message(chat_id=chat_id, message_id=msg_id)
                         logging.info(f"Successfully deleted message ID: {msg_id}")
                     except Exception as e:
                         logging.warning(f"Could not delete message {msg_id}: {e}")
         
         # Send new message
+        await get_limiter("telegram").async_wait_if_needed()
         message = await bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
         logging.info(f"Sent telegram message with ID: {message.message_id}")
         
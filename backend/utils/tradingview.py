@@ -0,0 +1,313 @@
+"""TradingView fetching utilities (single and batched scanner requests)."""
+
+import logging
+from collections import defaultdict
+
+import requests
+from tradingview_ta import TA_Handler, Interval, TradingView, __version__ as TA_VERSION
+from tradingview_ta.main import calculate
+
+from utils.rate_limiter import rate_limited, get_limiter
+
+# Maximum number of tickers sent in one scanner request
+BATCH_SIZE = 100
+
+# Error message used when the scanner returns no row for a ticker
+NOT_FOUND_ERROR = "Exchange or symbol not found."
+
+# Cache lifetime (seconds) of a NOT_FOUND answer: long enough to absorb
+# repeated lookups within a run, short enough that a new listing shows up
+NOT_FOUND_TTL = 300
+
+# Timeout (seconds) for a single scanner request
+SCAN_TIMEOUT = 30
+
+# Scanner column suffix for each interval (daily columns have no suffix)
+INTERVAL_SUFFIXES = {
+    Interval.INTERVAL_1_MINUTE: "|1",
+    Interval.INTERVAL_5_MINUTES: "|5",
+    Interval.INTERVAL_15_MINUTES: "|15",
+    Interval.INTERVAL_30_MINUTES: "|30",
+    Interval.INTERVAL_1_HOUR: "|60",
+    Interval.INTERVAL_2_HOURS: "|120",
+    Interval.INTERVAL_4_HOURS: "|240",
+    Interval.INTERVAL_1_DAY: "",
+    Interval.INTERVAL_1_WEEK: "|1W",
+    Interval.INTERVAL_1_MONTH: "|1M",
+}
+
+# Cache lifetime (seconds) of an analysis per interval: intraday data lives
+# for one bar, daily data is refreshed hourly as the daily bar still moves
+# during the session, weekly data a few times a day
+INTERVAL_TTLS = {
+    Interval.INTERVAL_1_MINUTE: 60,
+    Interval.INTERVAL_5_MINUTES: 300,
+    Interval.INTERVAL_15_MINUTES: 900,
+    Interval.INTERVAL_30_MINUTES: 1800,
+    Interval.INTERVAL_1_HOUR: 3600,
+    Interval.INTERVAL_2_HOURS: 7200,
+    Interval.INTERVAL_4_HOURS: 14400,
+    Interval.INTERVAL_1_DAY: 3600,
+    Interval.INTERVAL_1_WEEK: 21600,
+    Interval.INTERVAL_1_MONTH: 86400,
+}
+
+# Timeframes fetched for every analyzed asset
+TIMEFRAMES = [
+    Interval.INTERVAL_15_MINUTES, Interval.INTERVAL_1_HOUR,
+    Interval.INTERVAL_1_DAY, Interval.INTERVAL_1_WEEK
+]
+
+
+def make_key(symbol: str, exchange: str, screener: str, interval=Interval.INTERVAL_1_DAY,
+             source="tradingview") -> tuple:
+    """
+    Build the cache key used for a single analysis.
+
+    Analyses from another source (e.g. "local", see utils/indicators.py) get
+    the source appended, so switching ANALYSIS_SOURCE never serves cached
+    values of the other source.
+    """
+    key = (symbol.upper(), exchange, screener, interval)
+    return key if source == "tradingview" else key + (source,)
+
+
+def interval_ttl(key):
+    """TTL policy for PersistentCache: lifetime of an analysis key based on its interval."""
+    if isinstance(key, tuple) and len(key) in (4, 5):
+        return INTERVAL_TTLS.get(key[3])
+    return None
+
+
+def build_analysis_result(symbol: str, exchange: str, interval, analysis) -> dict:
+    """Convert a tradingview_ta Analysis object into the result dict used for scoring."""
+    return {
+        "symbol": symbol.upper(),
+        "exchange": exchange,
+        "timeframe": interval,
+        "recommendation": analysis.summary.get("RECOMMENDATION", "N/A"),
+        "oscillators": analysis.oscillators.get("RECOMMENDATION", "N/A"),
+        "moving_averages": analysis.moving_averages.get("RECOMMENDATION", "N/A"),
+        "RSI": analysis.indicators.get("RSI", 50),
+        "MACD_hist": analysis.indicators.get("MACD.macd", 0) - analysis.indicators.get("MACD.signal", 0),
+        "indicators": analysis.indicators
+    }
+
+
+def error_result(symbol: str, exchange: str, error) -> dict:
+    """Build the error dict returned when an analysis could not be fetched."""
+    return {"symbol": symbol.upper(), "exchange": exchange, "error": str(error)}
+
+
+class ThrottledError(Exception):
+    """Raised when TradingView signals throttling (429, timeout or empty response)."""
+
+
+def _is_throttle(error) -> bool:
+    """Tell whether an exception from TA_Handler or requests is a throttling signal."""
+    return isinstance(error, (ThrottledError, requests.Timeout)) or "status code: 429" in str(error)
+
+
+def _report(error=None):
+    """Feed the outcome of a TradingView request into the adaptive rate limit."""
+    limiter = get_limiter("tradingview")
+    if not hasattr(limiter, "record_success"):
+        return
+    if error is not None and _is_throttle(error):
+        limiter.record_throttle(str(error) or type(error).__name__)
+    elif error is None or NOT_FOUND_ERROR in str(error):
+        # A "not found" answer still means the upstream served the request
+        limiter.record_success()
+
+
+@rate_limited(budget="tradingview")
+def fetch_analysis(symbol: str, exchange: str, screener: str, interval=Interval.INTERVAL_1_DAY) -> dict:
+    """Fetch a single analysis from TradingView (one HTTP request, no caching)."""
+    try:
+        handler = TA_Handler(
+            symbol=symbol.upper(),
+            screener=screener,
+            exchange=exchange,
+            interval=interval
+        )
+        result = build_analysis_result(symbol, exchange, interval, handler.get_analysis())
+        _report()
+        return result
+    except Exception as e:
+        _report(e)
+        return error_result(symbol, exchange, e)
+
+
+@rate_limited(budget="tradingview")
+def _post_scan(screener: str, tickers: list, columns: list) -> list:
+    """
+    POST one scanner request and return its rows.
+
+    The outcome is reported to the adaptive TradingView rate limit: 429s,
+    timeouts and empty bodies lower the rate, answered requests raise it.
+    """
+    data = {"symbols": {"tickers": [ticker.upper() for ticker in tickers], "query": {"types": []}}, "columns": columns}
+    headers = {"User-Agent": f"tradingview_ta/{TA_VERSION}"}
+    try:
+        response = requests.post(f"{TradingView.scan_url}{screener.lower()}/scan", json=data, headers=headers, timeout=SCAN_TIMEOUT)
+        if response.status_code == 429:
+            raise ThrottledError("HTTP status code: 429")
+        if response.status_code != 200:
+            raise Exception(f"Can't access TradingView's API. HTTP status code: {response.status_code}.")
+        try:
+            rows = response.json()["data"]
+        except (ValueError, KeyError, TypeError):
+            raise ThrottledError("Empty or invalid scanner response")
+    except Exception as e:
+        _report(e)
+        raise
+    _report()
+    return rows
+
+
+def _scan(screener: str, tickers: list, intervals: list) -> dict:
+    """
+    Run one scanner request for many tickers and one or more intervals.
+
+    The indicator columns of every interval are requested side by side in a
+    single POST, then split back per interval and run through tradingview_ta's
+    own `calculate` so the result matches TA_Handler.get_analysis().
+
+    Returns:
+        dict: {"EXCHANGE:SYMBOL": {interval: Analysis or None}} for every ticker
+        the scanner returned a row for
+    """
+    indicators = TradingView.indicators
+    columns = [name + INTERVAL_SUFFIXES[interval] for interval in intervals for name in indicators]
+
+    final = {}
+    for row in _post_scan(screener, tickers, columns):
+        exchange, symbol = row["s"].split(":", 1)
+        per_interval = {}
+        for i, interval in enumerate(intervals):
+            values = row["d"][i * len(indicators):(i + 1) * len(indicators)]
+            try:
+                per_interval[interval] = calculate(
+                    indicators=dict(zip(indicators, values)), indicators_key=indicators,
+                    screener=screener, symbol=symbol, exchange=exchange, interval=interval
+                )
+            except Exception as e:
+                logging.debug(f"Could not compute {interval} analysis for {row['s']}: {e}")
+                per_interval[interval] = None
+        final[row["s"]] = per_interval
+    return final
+
+
+def _scan_listings(screener: str, tickers: list) -> set:
+    """Run one lightweight scanner request and return the tickers that exist."""
+    return {row["s"] for row in _post_scan(screener, tickers, ["close"])}
+
+
+def find_listings(screener: str, tickers: list, batch_size=BATCH_SIZE) -> set:
+    """
+    Check which "EXCHANGE:SYMBOL" tickers are listed on TradingView.
+
+    Only the close column is requested, so probing many candidate exchanges
+    costs one small request per `batch_size` tickers. Raises if a request
+    fails, so callers never mistake an outage for a missing listing.
+
+    Returns:
+        set: The upper-cased tickers the scanner returned a row for
+    """
+    found = set()
+    for start in range(0, len(tickers), batch_size):
+        found |= _scan_listings(screener, tickers[start:start + batch_size])
+    return found
+
+
+def _fetch_grouped(screener: str, tickers: dict, intervals: list, cache, batch_size: int) -> dict:
+    """
+    Fetch every ticker of one screener for the given intervals in chunks.
+
+    Args:
+        tickers: {"EXCHANGE:SYMBOL": (symbol, exchange)}
+
+    Returns:
+        dict: {"EXCHANGE:SYMBOL": {interval: result dict}}
+    """
+    results = {}
+    ticker_list = list(tickers)
+    for start in range(0, len(ticker_list), batch_size):
+        chunk = ticker_list[start:start + batch_size]
+        try:
+            analyses = _scan(screener, chunk, intervals)
+        except Exception as e:
+            logging.warning(f"Batch request failed for {len(chunk)} {screener} tickers ({', '.join(intervals)}): {e}")
+            for ticker in chunk:
+                symbol, exchange = tickers[ticker]
+                results[ticker] = {interval: error_result(symbol, exchange, e) for interval in intervals}
+            continue
+
+        for ticker in chunk:
+            symbol, exchange = tickers[ticker]
+            row = analyses.get(ticker.upper())
+            results[ticker] = {}
+            for interval in intervals:
+                expiry_seconds = None  # the cache's per-interval TTL
+                if row is None:
+                    # Unknown ticker: cache the miss briefly so a run does not repeat it
+                    result = error_result(symbol, exchange, NOT_FOUND_ERROR)
+                    expiry_seconds = NOT_FOUND_TTL
+                elif row[interval] is None:
+                    results[ticker][interval] = error_result(symbol, exchange, f"No {interval} data available.")
+                    continue
+                else:
+                    result = build_analysis_result(symbol, exchange, interval, row[interval])
+                results[ticker][interval] = result
+                if cache is not None:
+                    cache.set(make_key(symbol, exchange, screener, interval), result, expiry_seconds=expiry_seconds)
+
+    logging.info(f"Fetched {len(ticker_list)} {screener} tickers ({', '.join(intervals)}) in "
+                 f"{(len(ticker_list) + batch_size - 1) // batch_size} request(s)")
+    return results
+
+
+def fetch_multi_interval_batch(keys, intervals=None, cache=None, batch_size=BATCH_SIZE) -> dict:
+    """
+    Fetch several timeframes for many symbols, one scanner request per screener.
+
+    All indicator columns of every requested interval are retrieved in the
+    same request, so a symbol costs one round trip for all its timeframes
+    instead of one per interval. Symbols whose intervals are all cached are
+    not requested at all. Every per-interval result is also stored under its
+    usual single-interval cache key.
+
+    Args:
+        keys: Iterable of (symbol, exchange, screener) tuples
+        intervals: Intervals to fetch (defaults to TIMEFRAMES)
+        cache: Optional PersistentCache used for lookups and storage
+        batch_size: Maximum number of tickers per scanner request
+
+    Returns:
+        dict: {(symbol, exchange, screener): {interval: result dict}}
+    """
+    intervals = list(intervals or TIMEFRAMES)
+    results = {}
+    pending = defaultdict(dict)
+
+    for symbol, exchange, screener in keys:
+        symbol = symbol.upper()
+        if (symbol, exchange, screener) in results:
+            continue
+        cached = {}
+        if cache is not None:
+            for interval in intervals:
+                cached_result = cache.get(make_key(symbol, exchange, screener, interval))
+                if cached_result:
+                    cached[interval] = cached_result
+        if len(cached) == len(intervals):
+            results[(symbol, exchange, screener)] = cached
+            continue
+        pending[screener][f"{exchange}:{symbol}"] = (symbol, exchange)
+
+    for screener, tickers in pending.items():
+        fetched = _fetch_grouped(screener, tickers, intervals, cache, batch_size)
+        for ticker, (symbol, exchange) in tickers.items():
+            results[(symbol, exchange, screener)] = fetched[ticker]
+
+    return results
@@ -1,9 +1,5 @@
 import React, { useState, useEffect } from "react";
-import api, {
-  getLatestAnalysis,
-  runAnalysis,
-  getAnalysisStatus,
-} from "../services/api";
+import api, { getLatestAnalysis, runAnalysis } from "../services/api";
 import AssetCard from "../components/AssetCard";
 import AssetTable from "../components/AssetTable";
 import LoadingSpinner from "../components/LoadingSpinner";
@@ -83,13 +79,45 @@ function Dashboard() {
     }
   };
 
+  // Apply one job progress event to the status panel (deltas, no polling)
+  const handleJobEvent = (name, data) => {
+    setAnalysisStatus((status) => {
+      switch (name) {
+        case "step":
+          return {
+            ...status,
+            isRunning: true,
+            currentStep: data.step,
+            totalSteps: data.total_steps,
+            currentStepName: data.name,
+          };
+        case "log":
+          return { ...status, logs: [...(status.logs || []), data].slice(-100) };
+        case "asset":
+          return {
+            ...status,
+            currentStepName: `Analyzed ${data.completed}/${data.total} assets`,
+          };
+        case "end":
+          return {
+            ...status,
+            isRunning: false,
+            elapsedTime: (data.execution_time || 0) * 1000,
+          };
+        default:
+          return status;
+      }
+    });
+  };
+
   const handleRunAnalysis = async () => {
     setAnalyzing(true);
     setError(null);
+    setAnalysisStatus((status) => ({ ...status, isRunning: true, logs: [] }));
 
     try {
-      // Start the analysis
-      const response = await runAnalysis();
+      // Start the analysis and follow its progress events
+      const response = await runAnalysis(handleJobEvent);
 
       if (response.success) {
         // Extract data from response
@@ -145,36 +173,6 @@ function Dashboard() {
     }
   };
 
-  const checkAnalysisStatus = async () => {
-    if (!analyzing) return;
-
-    try {
-      const status = await getAnalysisStatus();
-      setAnalysisStatus({
-        isRunning: status.is_running,
-        currentStep: status.current_step,
-        totalSteps: status.total_steps,
-        currentStepName: status.current_step_name,
-        elapsedTime: status.elapsed_time,
-        logs: status.logs || analysisStatus.logs,
-      });
-
-      // If analysis is still running, schedule another check
-      if (status.is_running) {
-        setTimeout(checkAnalysisStatus, 1000);
-      } else if (analyzing) {
-        // If our UI thinks it's analyzing but server says it's done,
-        // we should refresh the data
-        setAnalyzing(false);
-        fetchAnalysis();
-      }
-    } catch (err) {
-      console.error("Failed to check analysis status:", err);
-      // Still schedule another check in case of temporary error
-      setTimeout(checkAnalysisStatus, 2000);
-    }
-  };
-
   useEffect(() => {
     fetchAnalysis();
     // Set up periodic refresh (every 5 minutes)
@@ -182,13 +180,6 @@ function Dashboard() {
     return () => clearInterval(interval);
   }, []);
 
-  useEffect(() => {
-    // Start checking status when analysis begins
-    if (analyzing) {
-      checkAnalysisStatus();
-    }
-  }, [analyzing]);
-
   useEffect(() => {
     // If we were analyzing and now we're not, fetch the latest results
     if (!analyzing && analysisStatus && !analysisStatus.isRunning) {
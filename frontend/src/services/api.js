@@ -30,7 +30,11 @@ export const getLatestAnalysis = async () => {
     }
 
     // Continue with API request
-    const response = await api.get("/analysis/latest");
+    // 404 means no analysis has been run yet: handled like empty data
+    const response = await api.get("/analysis/latest").catch((error) => {
+      if (error.response?.status === 404) return { data: {} };
+      throw error;
+    });
     console.log("Latest analysis API Response:", response.data);
 
     // If we got a good response, cache it in localStorage
@@ -81,11 +85,108 @@ export const getAnalysisHistory = async () => {
   }
 };
 
-// Run new analysis
-export const runAnalysis = async () => {
+// Analyze one symbol on demand (also outside the configured top assets).
+// assetType is "stock" or "crypto"; the backend guesses when it is omitted.
+export const getAsset = async (symbol, assetType) => {
+  const response = await api.get(`/asset/${encodeURIComponent(symbol)}`, {
+    params: assetType ? { asset_type: assetType } : {},
+  });
+  return response.data;
+};
+
+const JOB_POLL_INTERVAL = 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Get one analysis job (progress, logs and, once finished, its result)
+export const getAnalysisJob = async (jobId) => {
+  const response = await api.get(`/analysis/jobs/${jobId}`);
+  return response.data;
+};
+
+const JOB_EVENTS = ["step", "log", "asset", "result", "failed", "end"];
+
+// Failed reconnects in a row after which a job's event stream is given up
+const MAX_STREAM_ERRORS = 5;
+
+// Follow an analysis job over Server-Sent Events until it ends.
+// streamToken is the job's stream token from POST /analysis/run (EventSource
+// cannot send the API key header). onEvent(name, data) receives every event;
+// resolves to the finished job. When the stream fails for good (401, unknown
+// job, server gone) the job is polled instead; rejects if that fails too.
+export const streamAnalysisJob = (jobId, streamToken, onEvent = () => {}) =>
+  new Promise((resolve, reject) => {
+    // EventSource reconnects on its own and resumes with Last-Event-ID
+    const source = new EventSource(
+      `${api.defaults.baseURL}/analysis/jobs/${jobId}/events?token=${encodeURIComponent(streamToken)}`
+    );
+    const job = { job_id: jobId, logs: [], result: null };
+    let errors = 0;
+
+    source.onopen = () => {
+      errors = 0;
+    };
+    // CLOSED means the browser will not reconnect (e.g. a 401 or 404 response)
+    source.onerror = () => {
+      errors += 1;
+      if (source.readyState !== EventSource.CLOSED && errors < MAX_STREAM_ERRORS) return;
+      source.close();
+      console.warn(`Event stream of job ${jobId} failed; polling the job instead`);
+      pollAnalysisJob(jobId).then(resolve, reject);
+    };
+
+    JOB_EVENTS.forEach((name) =>
+      source.addEventListener(name, (message) => {
+        const data = JSON.parse(message.data);
+        if (name === "log") job.logs.push(data);
+        if (name === "result") job.result = data;
+        onEvent(name, data);
+        if (name === "end") {
+          source.close();
+          resolve({ ...job, ...data });
+        }
+      })
+    );
+  });
+
+// Poll an analysis job until it finishes (fallback without EventSource)
+const pollAnalysisJob = async (jobId) => {
+  let job = await getAnalysisJob(jobId);
+  while (job.status === "queued" || job.status === "running") {
+    await sleep(JOB_POLL_INTERVAL);
+    job = await getAnalysisJob(jobId);
+  }
+  return job;
+};
+
+// Run new analysis: start a background job and follow it until it finishes.
+// onEvent(name, data) receives the job's progress events as they happen.
+export const runAnalysis = async (onEvent) => {
   try {
     console.log("Starting analysis run...");
-    const response = await api.post("/analysis/run");
+    const started = await api.post("/analysis/run");
+    console.log("Analysis job started:", started.data);
+
+    if (!started.data.success) {
+      return started.data;
+    }
+
+    const job =
+      typeof EventSource !== "undefined"
+        ? await streamAnalysisJob(started.data.job_id, started.data.stream_token, onEvent)
+        : await pollAnalysisJob(started.data.job_id);
+
+    // Same shape as the former synchronous response
+    const response = {
+      data: {
+        success: job.status === "succeeded",
+        data: job.result,
+        error: job.error,
+        message: `Analysis ${job.status} in ${(job.execution_time || 0).toFixed(2)} seconds`,
+        execution_time: job.execution_time,
+        logs: job.logs,
+      },
+    };
     console.log("Analysis run response:", response.data);
 
     // More detailed logging of the data
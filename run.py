@@ -10,18 +10,21 @@ import sys
 import threading
 import logging
 
-# Add the backend directory to the Python path
-sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+# Add the backend directory to the Python path. Backend modules import each
+# other as core.*, utils.* and api.*, so they are imported under those names
+# here too: importing them as backend.* as well would load core/main.py twice,
+# with a second notification service, outbox and history store
+sys.path.insert(0, os.path.join(os.path.abspath(os.path.dirname(__file__)), "backend"))
 
 # Import the setup_logging and daily_job functions from the core module
-from backend.core.main import setup_logging, daily_job, reset_telegram_messages
+from core.main import setup_logging, daily_job, notification_service, notification_outbox, get_email_outbox
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import time
-from backend.utils.config import SCHEDULED_TIMES
+from utils.config import SCHEDULED_TIMES
 
 # Import Flask app to run the web server
-from backend.api.app import app as flask_app
+from api.app import app as flask_app
 
 def run_flask_app():
     """Run the Flask API server in a separate thread"""
@@ -45,6 +48,9 @@ def run_trading_scheduler():
         )
         logging.info("Scheduled daily_job at %s", t)
     
+    # Deliver notifications left pending by a previous run
+    notification_outbox.start()
+
     # Run the daily job immediately (optional)
     daily_job()
     
@@ -78,4 +84,7 @@ if __name__ == "__main__":
     except (KeyboardInterrupt, SystemExit):
         logging.info("Shutting down scheduler...")
         scheduler.shutdown()
+        notification_outbox.stop()
+        notification_service.stop()
+        get_email_outbox().stop()
         logging.info("Application shut down.") 
\ No newline at end of file
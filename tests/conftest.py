@@ -0,0 +1,93 @@
+"""Shared test setup: the backend on sys.path and stand-ins for the upstream services."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import utils.tradingview as tv
+
+
+class FakeResponse:
+    def __init__(self, rows, status_code=200):
+        self.rows = rows
+        self.status_code = status_code
+
+    def json(self):
+        return {"data": self.rows}
+
+
+class FakeScanner:
+    """Answers scanner POSTs for the listed tickers; RSI is 40 + the interval's index."""
+
+    def __init__(self, listed, status_code=200):
+        self.listed = set(listed)
+        self.status_code = status_code
+        self.requests = []
+
+    def __call__(self, url, json, headers, timeout):
+        self.requests.append((url, json["symbols"]["tickers"], json["columns"]))
+        suffixes = list(tv.INTERVAL_SUFFIXES.values())
+        rows = []
+        for ticker in json["symbols"]["tickers"]:
+            if ticker not in self.listed:
+                continue
+            values = []
+            for column in json["columns"]:
+                name, _, suffix = column.partition("|")
+                values.append(40.0 + suffixes.index("|" + suffix if suffix else "") if name == "RSI" else 1.0)
+            rows.append({"s": ticker, "d": values})
+        return FakeResponse(rows, self.status_code)
+
+    def analysis_requests(self):
+        # Listing checks ask for the close only
+        return [request for request in self.requests if len(request[2]) > 1]
+
+
+class FakeDownload:
+    """yf.download stand-in: three daily bars for each listed ticker, last close as given."""
+
+    def __init__(self, closes):
+        self.closes = closes
+        self.calls = []
+
+    def __call__(self, tickers, progress=False, **kwargs):
+        self.calls.append(list(tickers))
+        index = pd.date_range("2024-01-01", periods=3, freq="D")
+        listed = [ticker for ticker in tickers if ticker in self.closes]
+        frame = pd.DataFrame(
+            {
+                (field, ticker): [self.closes[ticker] - 2, self.closes[ticker] - 1, self.closes[ticker]]
+                for field in ("Open", "High", "Low", "Close", "Volume")
+                for ticker in listed
+            },
+            index=index,
+        )
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns)
+        return frame
+
+
+@pytest.fixture(scope="session")
+def api_modules(tmp_path_factory):
+    """Import the API (and core.main) with its caches, outbox and history in a temporary directory."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    saved = {name: os.environ.get(name) for name in ("CACHE_DIR", "TELEGRAM_CHAT_ID", "TELEGRAM_BOT_TOKEN")}
+    os.environ.update(CACHE_DIR=str(cache_dir), TELEGRAM_CHAT_ID=os.environ.get("TELEGRAM_CHAT_ID") or "1",
+                      TELEGRAM_BOT_TOKEN=os.environ.get("TELEGRAM_BOT_TOKEN") or "token")
+    cwd = os.getcwd()
+    os.chdir(cache_dir)
+    try:
+        import api.app as app
+        import core.main as main
+    finally:
+        os.chdir(cwd)
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return app, main
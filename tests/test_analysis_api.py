@@ -0,0 +1,76 @@
+"""Tests for the analysis job endpoints (authentication and event streams)."""
+
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def api(api_modules, monkeypatch):
+    app, _ = api_modules
+    release = threading.Event()
+
+    def analysis_job(job):
+        job.set_step(1, "Analyzing")
+        release.wait(5)
+        return {"best_stocks": []}
+
+    monkeypatch.delenv("FLASK_ENV", raising=False)
+    monkeypatch.setattr(app, "analysis_job", analysis_job)
+    yield app, app.app.test_client(), release
+    release.set()
+    for job in app.job_runner.jobs():
+        wait_for(job)
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.is_active:
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+
+
+def test_api_key_is_not_accepted_in_the_query_string(api):
+    app, client, _ = api
+    for path in ("/api/analysis/latest", "/api/analysis/jobs", "/api/asset/AAPL", "/api/history/runs"):
+        assert client.get(f"{path}?api_key={app.API_KEY}").status_code == 401
+    assert client.post(f"/api/analysis/run?api_key={app.API_KEY}").status_code == 401
+
+
+def test_event_stream_accepts_only_its_jobs_stream_token(api):
+    app, client, release = api
+    started = client.post("/api/analysis/run", headers={"X-API-Key": app.API_KEY}).get_json()
+    job = app.job_runner.get(started["job_id"])
+    assert started["events_url"] == f"/api/analysis/jobs/{job.id}/events?token={started['stream_token']}"
+
+    other = app.job_runner.submit("other", lambda job: None)
+    events = f"/api/analysis/jobs/{job.id}/events"
+    assert client.get(f"{events}?api_key={app.API_KEY}").status_code == 401
+    assert client.get(f"{events}?token={other.stream_token}").status_code == 401
+    # The token is not an API key for the other endpoints
+    assert client.get(f"/api/analysis/jobs/{job.id}?token={started['stream_token']}").status_code == 401
+
+    release.set()
+    response = client.get(started["events_url"])
+    assert response.status_code == 200
+    assert "event: end" in response.get_data(as_text=True)
+
+
+def test_concurrent_runs_start_one_analysis(api):
+    app, _, _ = api
+    barrier = threading.Barrier(4)
+    responses = []
+
+    def run():
+        client = app.app.test_client()
+        barrier.wait()
+        responses.append(client.post("/api/analysis/run", headers={"X-API-Key": app.API_KEY}).get_json())
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(response["success"] for response in responses) == [False, False, False, True]
+    assert len({response["job_id"] for response in responses}) == 1
@@ -0,0 +1,102 @@
+"""Tests for the /api/asset/<symbol> route, with the scanner and Yahoo Finance stubbed."""
+
+import pytest
+
+import utils.price as price
+import utils.tradingview as tv
+from conftest import FakeDownload, FakeScanner
+from utils.cache import PersistentCache
+from utils.ohlcv import OHLCVStore
+from utils.rate_limiter import get_limiter
+from utils.resolver import ExchangeResolver
+
+
+@pytest.fixture
+def api(api_modules, tmp_path, monkeypatch):
+    app, main = api_modules
+    scanner = FakeScanner({"NASDAQ:AAPL", "BINANCE:PEPEUSDT"})
+    download = FakeDownload({"AAPL": 150.0, "PEPE-USD": 0.25})
+    monkeypatch.setattr(tv.requests, "post", scanner)
+    monkeypatch.setattr(price.yf, "download", download)
+    monkeypatch.setattr(price, "ohlcv_store", OHLCVStore(str(tmp_path / "ohlcv")))
+    monkeypatch.setattr(price, "_price_memo", {})
+    monkeypatch.setattr(main, "analysis_cache", PersistentCache(
+        cache_file=str(tmp_path / "analysis_cache.json"), ttl_policy=tv.interval_ttl))
+    monkeypatch.setattr(main, "exchange_index", ExchangeResolver(cache_file=str(tmp_path / "exchange_index.json")))
+    monkeypatch.setattr(main, "ANALYSIS_SOURCE", "tradingview")
+    monkeypatch.setattr(get_limiter("tradingview"), "wait_if_needed", lambda: None)
+    monkeypatch.setattr(get_limiter("yahoo"), "wait_if_needed", lambda: None)
+
+    client = app.app.test_client()
+
+    def get(path):
+        return client.get(path, headers={"X-API-Key": app.API_KEY})
+
+    return get, scanner, download, main
+
+
+def test_warm_cache_makes_no_upstream_calls(api):
+    get, scanner, download, _ = api
+    cold = get("/api/asset/aapl")
+    assert cold.status_code == 200
+    assert len(scanner.requests) == 2  # one listing check, one analysis
+    assert download.calls == [["AAPL"]]
+
+    warm = get("/api/asset/AAPL")
+    assert warm.status_code == 200
+    assert warm.get_json()["asset"] == cold.get_json()["asset"]
+    assert len(scanner.requests) == 2
+    assert len(download.calls) == 1
+
+    asset = warm.get_json()["asset"]
+    assert (asset["Symbol"], asset["Exchange"], asset["Asset_Type"]) == ("AAPL", "NASDAQ", "america")
+    assert asset["Current_Price"] == 150.0
+
+
+def test_stale_analyses_are_fetched_in_one_targeted_request(api):
+    get, scanner, download, main = api
+    assert get("/api/asset/AAPL").status_code == 200
+
+    # Age every cached analysis past its interval TTL
+    for entry in main.analysis_cache.cache.values():
+        entry["timestamp"] -= 30 * 86400
+    scanner.requests.clear()
+
+    assert get("/api/asset/AAPL").status_code == 200
+    # The exchange is still known: one request, this symbol only, every timeframe
+    assert len(scanner.requests) == 1
+    _, tickers, columns = scanner.requests[0]
+    assert tickers == ["NASDAQ:AAPL"]
+    assert len(columns) == len(tv.TIMEFRAMES) * len(tv.TradingView.indicators)
+    # The price is still memoised
+    assert len(download.calls) == 1
+
+
+def test_crypto_outside_top_cryptos(api):
+    get, scanner, download, main = api
+    assert "PEPE" not in main.TOP_CRYPTOS
+    # Detected as a stock by default, and not listed as one
+    assert get("/api/asset/PEPE").status_code == 404
+
+    response = get("/api/asset/PEPE?asset_type=crypto")
+    assert response.status_code == 200
+    asset = response.get_json()["asset"]
+    assert (asset["Symbol"], asset["Exchange"], asset["Asset_Type"]) == ("PEPEUSDT", "BINANCE", "crypto")
+    assert scanner.analysis_requests()[0][1] == ["BINANCE:PEPEUSDT"]
+    assert download.calls == [["PEPE-USD"]]
+
+
+def test_invalid_asset_type_is_rejected(api):
+    get, scanner, download, _ = api
+    response = get("/api/asset/AAPL?asset_type=bond")
+    assert response.status_code == 400
+    assert scanner.requests == [] and download.calls == []
+
+
+def test_unknown_symbol_is_not_found(api):
+    get, scanner, download, _ = api
+    response = get("/api/asset/NOPE")
+    assert response.status_code == 404
+    assert "NOPE" in response.get_json()["error"]
+    assert scanner.analysis_requests() == []
+    assert download.calls == []
@@ -0,0 +1,103 @@
+"""Tests for the SQLite-backed persistent cache."""
+
+import os
+import json
+import threading
+import time
+
+from api.cache import PersistentCache as APICache
+from utils.cache import PersistentCache
+
+
+def test_set_and_get_survive_restart(tmp_path):
+    cache_file = str(tmp_path / "analysis_cache.json")
+    cache = PersistentCache(cache_file=cache_file, expiry_seconds=3600)
+    cache.set(("AAPL", "NASDAQ", "america", "1d"), {"RSI": 55})
+
+    reopened = PersistentCache(cache_file=cache_file, expiry_seconds=3600)
+    assert reopened.get(("AAPL", "NASDAQ", "america", "1d")) == {"RSI": 55}
+    assert not os.path.exists(cache_file)
+
+
+def test_migrates_legacy_json_file(tmp_path):
+    cache_file = str(tmp_path / "analysis_cache.json")
+    with open(cache_file, "w") as f:
+        json.dump({"('BTCUSDT', 'BINANCE', 'crypto', '1d')": {"data": {"RSI": 40}, "timestamp": 4102444800}}, f)
+
+    cache = PersistentCache(cache_file=cache_file, expiry_seconds=3600)
+    assert cache.get(("BTCUSDT", "BINANCE", "crypto", "1d")) == {"RSI": 40}
+    assert os.path.exists(cache_file + ".migrated")
+    assert not os.path.exists(cache_file)
+
+
+def test_clear_expired_removes_rows(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    cache = PersistentCache(cache_file=cache_file, expiry_seconds=3600)
+    cache.set("old", 1)
+    cache.cache["old"]["timestamp"] -= 7200
+    cache.store.put("old", cache.cache["old"])
+    cache.set("new", 2)
+
+    cache.clear_expired()
+    assert cache.get("new") == 2
+    assert cache.store.count() == 1
+
+
+def test_get_or_set_coalesces_concurrent_misses(tmp_path):
+    cache = PersistentCache(cache_file=str(tmp_path / "cache.json"), expiry_seconds=3600)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"RSI": 50}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set("key", loader))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"RSI": 50}] * 10
+
+
+def test_per_entry_expiry_and_ttl_policy(tmp_path):
+    cache = PersistentCache(
+        cache_file=str(tmp_path / "cache.json"), expiry_seconds=3600,
+        ttl_policy=lambda key: 900 if key[-1] == "15m" else None
+    )
+    cache.set(("AAPL", "15m"), 1)
+    cache.set(("AAPL", "1W"), 2)
+    cache.set(("AAPL", "1d"), 3, expiry_seconds=60)
+    for entry in cache.cache.values():
+        entry["timestamp"] -= 1000
+
+    assert cache.get(("AAPL", "15m")) is None
+    assert cache.get(("AAPL", "1W")) == 2
+    assert cache.get(("AAPL", "1d")) is None
+
+
+def test_api_cache_honours_per_entry_expiry(tmp_path):
+    cache = APICache(cache_file=str(tmp_path / "api_cache.json"), expiry_seconds=86400)
+    cache.set("latest_analysis", {"best_stocks": []}, expiry_seconds=60)
+    cache.set("history", [])
+    for entry in cache.cache.values():
+        entry["timestamp"] -= 1000
+
+    assert cache.get("latest_analysis") is None
+    assert cache.get("history") == []
+
+
+def test_stale_while_revalidate_returns_old_value_and_refreshes(tmp_path):
+    cache = PersistentCache(cache_file=str(tmp_path / "cache.json"), expiry_seconds=60)
+    cache.set("key", "old")
+    cache.cache["key"]["timestamp"] -= 120
+
+    assert cache.get_or_set("key", lambda: "new", stale_seconds=600) == "old"
+    for _ in range(50):
+        if cache.get("key") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("key") == "new"
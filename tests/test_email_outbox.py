@@ -0,0 +1,76 @@
+"""Tests for the pooled SMTP email outbox, against a local aiosmtpd server."""
+
+import socket
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from utils.email import EmailOutbox, build_message
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    if controller.server is not None:
+        controller.stop()
+
+
+def make_outbox(controller):
+    return EmailOutbox(host=controller.hostname, port=controller.port, starttls=False, timeout=5)
+
+
+def test_messages_share_one_connection(smtp_server):
+    controller, handler = smtp_server
+    outbox = make_outbox(controller)
+    recipients = ["a@example.com", "b@example.com"]
+    futures = [
+        outbox.submit(build_message(f"Report {i}", "body", "bot@example.com", recipients), recipients)
+        for i in range(3)
+    ]
+    assert [future.result(10) for future in futures] == [True, True, True]
+    outbox.stop()
+
+    assert outbox.connections == 1
+    # One transaction per message, addressed to every recipient
+    assert len(handler.envelopes) == 3
+    assert all(envelope.rcpt_tos == recipients for envelope in handler.envelopes)
+
+
+def test_reconnects_after_the_connection_drops(smtp_server):
+    controller, handler = smtp_server
+    outbox = make_outbox(controller)
+    recipients = ["a@example.com"]
+    assert outbox.submit(build_message("First", "body", "bot@example.com", recipients), recipients).result(10)
+
+    # Restart the server on the same port: the pooled connection is now dead
+    controller.stop()
+    restarted = Controller(handler, hostname=controller.hostname, port=controller.port)
+    restarted.start()
+    try:
+        assert outbox.submit(build_message("Second", "body", "bot@example.com", recipients), recipients).result(10)
+        outbox.stop()
+    finally:
+        restarted.stop()
+
+    assert outbox.connections == 2
+    assert len(handler.envelopes) == 2
@@ -0,0 +1,81 @@
+"""Tests for the durable analysis history."""
+
+import pytest
+
+from utils.history import AnalysisHistory, parse_time
+
+
+def make_result(timestamp, aapl_score):
+    return {
+        "timestamp": timestamp,
+        "best_stocks": [{"Symbol": "AAPL", "Score": aapl_score, "Current_Price": 150.0}],
+        "top_stocks": [
+            {"Symbol": "AAPL", "Score": aapl_score, "Current_Price": 150.0, "Asset_Type": "america"},
+            {"Symbol": "MSFT", "Score": 70, "Current_Price": 300.0, "Asset_Type": "america"},
+        ],
+        "top_cryptos": [{"Symbol": "BTCUSDT", "Score": 90, "Current_Price": 50000.0, "Asset_Type": "crypto"}],
+        "wallet_stocks": [],
+        "wallet_cryptos": [{"Symbol": "ADAUSDT", "Current_Price": 0.5, "RecPriority": 3}],
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = AnalysisHistory(str(tmp_path / "history.sqlite"))
+    assert history.record(make_result("2025-01-01T08:00:00", 80), "scheduler")
+    assert history.record(make_result("2025-01-02T08:00:00", 85), "api")
+    assert history.record(make_result("2025-01-03T08:00:00", 90), "scheduler")
+    return history
+
+
+def test_runs_survive_a_restart(history):
+    reopened = AnalysisHistory(history.db_file)
+    assert reopened.count() == 3
+    # Recording the same run again is a no-op
+    assert not reopened.record(make_result("2025-01-03T08:00:00", 90), "api")
+
+    runs = reopened.runs(start=parse_time("2025-01-02"))
+    assert [(run["timestamp"], run["source"]) for run in runs] == [
+        ("2025-01-03T08:00:00", "scheduler"), ("2025-01-02T08:00:00", "api")
+    ]
+    assert reopened.get_run(runs[0]["id"]) == make_result("2025-01-03T08:00:00", 90)
+
+
+def test_symbol_and_time_range_queries(history):
+    result = history.assets(symbols=["AAPL"], end=parse_time("2025-01-02", end_of_day=True))
+    columns = result["columns"]
+    assert columns["timestamp"] == ["2025-01-01T08:00:00", "2025-01-02T08:00:00"]
+    assert columns["Score"] == [80, 85]
+    assert columns["section"] == ["top_stocks", "top_stocks"]
+    assert result["count"] == 2 and not result["truncated"]
+
+    wallet = history.assets(sections=["wallet_cryptos"], limit=2)
+    assert wallet["columns"]["Symbol"] == ["ADAUSDT", "ADAUSDT"]
+    assert wallet["columns"]["RecPriority"] == [3, 3]
+    assert wallet["truncated"]
+
+    with pytest.raises(ValueError):
+        history.assets(sections=["best_stocks"])
+
+
+def test_crypto_history_by_base_symbol(history):
+    # Crypto rows are stored under the pair; the base symbol finds them
+    result = history.assets(symbols=["BTC", "ADA"], start=parse_time("2025-01-03"))
+    assert list(zip(result["columns"]["section"], result["columns"]["Symbol"])) == [
+        ("top_cryptos", "BTCUSDT"), ("wallet_cryptos", "ADAUSDT")
+    ]
+    assert history.assets(symbols=["BTCUSDT"])["count"] == 3
+    # Only crypto sections match the pair form
+    history.record({"timestamp": "2025-01-04T08:00:00", "top_stocks": [{"Symbol": "AAPLUSDT"}]}, "api")
+    assert history.assets(symbols=["AAPL"], start=parse_time("2025-01-04"))["count"] == 0
+
+
+def test_recent_is_rebuilt_only_after_a_new_run(history):
+    recent = history.recent(2)
+    assert [result["timestamp"] for result in recent] == ["2025-01-02T08:00:00", "2025-01-03T08:00:00"]
+    assert history.recent(2) is recent
+
+    # A run recorded by another process (another connection) is picked up
+    AnalysisHistory(history.db_file).record(make_result("2025-01-04T08:00:00", 95), "api")
+    assert history.recent(2) is not recent
+    assert history.recent(2)[-1]["timestamp"] == "2025-01-04T08:00:00"
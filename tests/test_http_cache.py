@@ -0,0 +1,47 @@
+"""Tests for prepared (pre-gzipped, ETagged) JSON responses."""
+
+import gzip
+import json
+
+from flask import Flask, request
+
+from utils.http_cache import PreparedResponses, prepared_response
+
+state = {"latest": {"best_stocks": [{"Symbol": "AAPL", "Score": 90}]}}
+prepared_responses = PreparedResponses()
+app = Flask(__name__)
+
+
+@app.route("/latest")
+def latest():
+    return prepared_response(prepared_responses.get("latest", state["latest"]), request)
+
+
+def test_gzip_and_conditional_get():
+    client = app.test_client()
+    response = client.get("/latest", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == state["latest"]
+    etag = response.headers["ETag"]
+
+    response = client.get("/latest", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    # Clients without gzip get the plain body with the same ETag
+    response = client.get("/latest")
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == state["latest"]
+    assert response.headers["ETag"] == etag
+
+
+def test_body_is_built_once_per_source_object():
+    responses = PreparedResponses()
+    data = {"a": 1}
+    first = responses.get("latest", data)
+    assert responses.get("latest", data) is first
+
+    changed = responses.get("latest", {"a": 2})
+    assert changed is not first
+    assert changed.etag != first.etag
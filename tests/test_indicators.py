@@ -0,0 +1,69 @@
+"""Tests for the local NumPy indicator engine."""
+
+import numpy as np
+
+from utils.indicators import sma, ema, rma, rsi, atr, rate, compute_indicators, resample_weekly
+from utils.ohlcv import OHLCV_DTYPE
+
+
+def reference_rma(values, length):
+    """Scalar Pine Script ta.rma: SMA seed, then Wilder smoothing."""
+    out = [np.nan] * len(values)
+    for t in range(length - 1, len(values)):
+        if t == length - 1:
+            out[t] = np.mean(values[t - length + 1:t + 1])
+        else:
+            out[t] = (values[t] + (length - 1) * out[t - 1]) / length
+    return np.array(out)
+
+
+def test_vectorised_rows_match_scalar_reference():
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=(3, 120)), axis=1)
+    close[1, :40] = np.nan  # shorter history
+
+    smoothed = rma(close, 14)
+    for row in (0, 2):
+        np.testing.assert_allclose(smoothed[row], reference_rma(close[row], 14), equal_nan=True)
+    np.testing.assert_allclose(smoothed[1, 40:], reference_rma(close[1, 40:], 14), equal_nan=True)
+    assert np.isnan(smoothed[1, :53]).all()
+
+    np.testing.assert_allclose(sma(close, 5)[0, 4], close[0, :5].mean())
+    np.testing.assert_allclose(ema(close, 10)[0, 9], close[0, :10].mean())
+
+
+def test_rsi_and_atr_edge_cases():
+    rising = np.arange(1.0, 41.0)[None, :]
+    assert rsi(rising)[0, -1] == 100.0
+    assert rsi(rising[:, ::-1])[0, -1] == 0.0
+    # A flat series: Pine's ta.rsi gives 100 when down == 0, whatever up is
+    assert rsi(np.full((1, 40), 10.0))[0, -1] == 100.0
+
+    close = np.full((1, 30), 10.0)
+    assert atr(close + 1, close - 1, close)[0, -1] == 2.0
+
+
+def test_ratings_follow_tradingview_votes():
+    close = np.linspace(50, 150, 300)[None, :]
+    latest = compute_indicators(close, close, close)
+    ratings = rate(latest)
+    assert ratings["Recommend.MA"][0] == 1.0
+    assert ratings["moving_averages"][0] == "STRONG_BUY"
+
+
+def test_resample_weekly_aggregates_days():
+    # Monday 2024-01-01 .. Wednesday 2024-01-10
+    bars = np.zeros(10, dtype=OHLCV_DTYPE)
+    bars["ts"] = 1704067200 + np.arange(10) * 86400
+    bars["open"] = bars["close"] = np.arange(10.0)
+    bars["high"] = np.arange(10.0) + 1
+    bars["low"] = np.arange(10.0) - 1
+    bars["volume"] = 1
+
+    weekly = resample_weekly(bars)
+    assert list(weekly["ts"]) == [1704067200, 1704067200 + 7 * 86400]
+    assert list(weekly["open"]) == [0, 7]
+    assert list(weekly["close"]) == [6, 9]
+    assert list(weekly["high"]) == [7, 10]
+    assert list(weekly["low"]) == [-1, 6]
+    assert list(weekly["volume"]) == [7, 3]
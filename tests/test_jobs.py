@@ -0,0 +1,163 @@
+"""Tests for the background job runner."""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from utils.jobs import STREAM_TOKEN_TTL, JobRunner, in_job_context
+
+
+@pytest.fixture(autouse=True)
+def info_logging():
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    root_logger.setLevel(logging.INFO)
+    yield
+    root_logger.setLevel(level)
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.is_active:
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+
+
+def test_submit_returns_before_the_job_runs():
+    release = threading.Event()
+
+    def work(job):
+        job.set_step(2, "Working")
+        release.wait(5)
+        return {"answer": 42}
+
+    runner = JobRunner()
+    job = runner.submit("analysis", work)
+    assert runner.active("analysis") is job
+    release.set()
+    wait_for(job)
+
+    data = job.to_dict()
+    assert data["status"] == "succeeded"
+    assert data["result"] == {"answer": 42}
+    assert data["current_step"] == 2
+    assert runner.get(job.id) is job
+    assert runner.active("analysis") is None
+
+
+def test_logs_are_captured_per_job():
+    def noise():
+        logging.info("from another thread")
+
+    def work(job):
+        logging.info("from the job")
+        thread = threading.Thread(target=noise)
+        thread.start()
+        thread.join()
+        logging.warning("careful")
+
+    runner = JobRunner()
+    job = runner.submit("analysis", work)
+    wait_for(job)
+    assert [(log["message"], log["type"]) for log in job.logs] == [("from the job", "info"), ("careful", "warning")]
+
+
+def test_logs_from_the_jobs_worker_pool_are_captured():
+    def fetch(asset):
+        logging.info(f"fetched {asset}")
+        return asset
+
+    def work(job):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            # Unwrapped tasks are not attributed to the job
+            list(executor.map(fetch, ["NOISE"]))
+            return list(executor.map(in_job_context(fetch), ["AAPL", "MSFT", "BTC"]))
+
+    runner = JobRunner(max_workers=2)
+    job = runner.submit("analysis", work)
+    other = runner.submit("other", lambda job: logging.info("from the other job"))
+    wait_for(job)
+    wait_for(other)
+    assert job.result == ["AAPL", "MSFT", "BTC"]
+    assert sorted(log["message"] for log in job.logs) == ["fetched AAPL", "fetched BTC", "fetched MSFT"]
+    assert [log["message"] for log in other.logs] == ["from the other job"]
+
+
+def test_failures_are_recorded():
+    def work(job):
+        raise ValueError("no data")
+
+    runner = JobRunner()
+    job = runner.submit("analysis", work)
+    wait_for(job)
+    assert job.status == "failed"
+    assert job.error == "no data"
+    assert job.logs[-1]["type"] == "error"
+
+
+def test_events_resume_after_the_last_seen_id():
+    release = threading.Event()
+
+    def work(job):
+        job.set_step(1, "Fetching")
+        job.publish("asset", {"asset": "AAPL", "completed": 1, "total": 1, "found": True})
+        release.wait(5)
+        return {"best_stocks": []}
+
+    runner = JobRunner()
+    job = runner.submit("analysis", work)
+    first = job.events_since(0, timeout=5)
+    while len(first) < 3:
+        first = job.events_since(0, timeout=5)
+    assert [name for _, name, _ in first] == ["step", "log", "asset"]
+
+    # Nothing new yet: waits for the timeout and returns no events
+    assert job.events_since(first[-1][0], timeout=0.05) == []
+
+    release.set()
+    wait_for(job)
+    rest = job.events_since(first[-1][0])
+    assert [name for _, name, _ in rest] == ["result", "end"]
+    assert rest[0][2] == {"best_stocks": []}
+    assert rest[1][2]["status"] == "succeeded"
+
+
+def test_stream_tokens_expire_after_the_job_finished():
+    runner = JobRunner()
+    job = runner.submit("analysis", lambda job: None)
+    wait_for(job)
+    assert job.accepts_stream_token(job.stream_token)
+    assert not job.accepts_stream_token("guess")
+    assert not job.accepts_stream_token(None)
+
+    job.finished_at -= timedelta(seconds=STREAM_TOKEN_TTL + 1)
+    assert not job.accepts_stream_token(job.stream_token)
+
+
+def test_concurrent_submit_once_starts_one_job():
+    release = threading.Event()
+    barrier = threading.Barrier(8)
+    runner = JobRunner(max_workers=2)
+    submitted = []
+
+    def submit():
+        barrier.wait()
+        submitted.append(runner.submit_once("analysis", lambda job: release.wait(5)))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(started for _, started in submitted) == [False] * 7 + [True]
+    assert len({job.id for job, _ in submitted}) == 1
+    assert len(runner.jobs()) == 1
+
+    release.set()
+    wait_for(submitted[0][0])
+    job, started = runner.submit_once("analysis", lambda job: None)
+    assert started and len(runner.jobs()) == 2
@@ -0,0 +1,175 @@
+"""Tests for the Telegram notification service."""
+
+import json
+import asyncio
+import concurrent.futures
+
+import pytest
+
+import utils.notifications as notifications
+from utils.notifications import NotificationService, split_message
+from utils.rate_limiter import RateLimiter
+
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.message_id = message_id
+
+
+class FakeBot:
+    instances = []
+    send_delay = 0
+
+    def __init__(self, token):
+        self.token = token
+        self.sent = []
+        self.deleted = []
+        self.edited = []
+        self.initialized = 0
+        self.closed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        FakeBot.instances.append(self)
+
+    async def initialize(self):
+        self.initialized += 1
+
+    async def shutdown(self):
+        self.closed += 1
+
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(text)
+        return FakeMessage(len(self.sent))
+
+    async def edit_message_text(self, text, chat_id, message_id):
+        self.edited.append((message_id, text))
+
+    async def delete_message(self, chat_id, message_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        self.deleted.append(message_id)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    FakeBot.instances = []
+    limiter = RateLimiter(calls_per_second=1000, burst=10)
+    monkeypatch.setattr(notifications, "get_limiter", lambda name: limiter)
+    service = NotificationService("token", 1, str(tmp_path / "messages.json"), bot_factory=FakeBot)
+    yield service
+    service.stop()
+
+
+def test_split_message():
+    assert split_message("a" * 5000) == ["a" * 4096, "a" * 904]
+
+
+def test_messages_share_one_bot_and_keep_order(service):
+    futures = [service.submit(f"message {i}") for i in range(5)]
+    assert [future.result(5) for future in futures] == [[1], [2], [3], [4], [5]]
+    service.stop()
+
+    assert len(FakeBot.instances) == 1
+    bot = FakeBot.instances[0]
+    assert bot.sent == [f"message {i}" for i in range(5)]
+    assert bot.initialized == 1 and bot.closed == 1
+
+
+def test_old_messages_are_deleted_concurrently(service):
+    with open(service.messages_file, "w") as f:
+        json.dump([11, 12, 13, 14], f)
+
+    assert service.send("report", delete_old=True, timeout=5) == [1]
+
+    bot = FakeBot.instances[0]
+    assert sorted(bot.deleted) == [11, 12, 13, 14]
+    assert bot.max_in_flight > 1
+    assert service.load_message_ids() == [1]
+
+
+def test_report_is_edited_in_place(service):
+    assert service.submit_report(["main", "wallet"]).result(5) == [1, 2]
+    # Unchanged report: no Telegram calls at all
+    assert service.submit_report(["main", "wallet"]).result(5) == [1, 2]
+    # Only the changed message is edited
+    assert service.submit_report(["main", "wallet 2"]).result(5) == [1, 2]
+
+    bot = FakeBot.instances[0]
+    assert bot.sent == ["main", "wallet"]
+    assert bot.edited == [(2, "wallet 2")]
+    assert bot.deleted == []
+
+
+def test_report_is_resent_when_the_chunk_count_changes(service):
+    service.submit_report(["main", "wallet"]).result(5)
+    assert service.submit_report(["main", "wallet", "a" * 5000]).result(5) == [3, 4, 5, 6]
+
+    bot = FakeBot.instances[0]
+    assert sorted(bot.deleted) == [1, 2]
+    assert bot.edited == []
+    assert service.load_message_ids() == [3, 4, 5, 6]
+
+
+def test_failed_initialization_is_retried_by_the_next_job(service):
+    # Fails at startup and for the first job
+    failures = [ConnectionError("network down"), ConnectionError("network down")]
+
+    class FlakyBot(FakeBot):
+        async def initialize(self):
+            if failures:
+                raise failures.pop()
+            await super().initialize()
+
+    service.bot_factory = FlakyBot
+    # Fails like any delivery, so the outbox retries it
+    with pytest.raises(ConnectionError):
+        service.submit("first").result(5)
+    assert service.send("second", timeout=5) == [1]
+    assert FakeBot.instances[-1].sent == ["second"]
+
+
+def test_unconfigured_service_is_a_no_op(tmp_path):
+    service = NotificationService("", None, str(tmp_path / "messages.json"), bot_factory=FakeBot)
+    try:
+        assert service.send("hello", timeout=5) == []
+        assert service.submit_report(["report"]).result(5) == []
+    finally:
+        service.stop()
+
+
+def test_jobs_are_cancelled_when_their_caller_stops_waiting(service, monkeypatch):
+    monkeypatch.setattr(FakeBot, "send_delay", 0.2)
+    running = service.submit("a" * 5000)
+    queued = service.submit("queued")
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        service.result(queued, timeout=0.05)
+    assert queued.cancelled()
+    with pytest.raises(concurrent.futures.TimeoutError):
+        service.result(running, timeout=0.1)
+    with pytest.raises(concurrent.futures.CancelledError):
+        running.result(5)
+
+    # Interrupted during its first chunk: nothing went out, nothing is sent later
+    service.stop()
+    assert FakeBot.instances[0].sent == []
+    assert service.load_entries() == []
+
+
+def test_other_messages_do_not_break_the_in_place_report_edit(service):
+    assert service.submit_report(["main", "wallet"]).result(5) == [1, 2]
+    assert service.send("Error during analysis", timeout=5) == [3]
+    assert service.submit_report(["main", "wallet 2"]).result(5) == [1, 2]
+
+    bot = FakeBot.instances[0]
+    assert bot.edited == [(2, "wallet 2")]
+    assert bot.deleted == []
+    assert service.load_message_ids() == [1, 2, 3]
+
+    # A resent report replaces the other messages too
+    service.submit_report(["main"]).result(5)
+    assert sorted(bot.deleted) == [1, 2, 3]
+    assert service.load_message_ids() == [4]
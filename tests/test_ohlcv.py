@@ -0,0 +1,65 @@
+"""Tests for the local memory-mapped OHLCV store."""
+
+import os
+import time
+
+import numpy as np
+
+from utils.ohlcv import OHLCV_DTYPE, OHLCVStore
+
+DAY = 86400
+START = 1704067200  # 2024-01-01
+
+
+def make_bars(days, close=None):
+    bars = np.zeros(len(days), dtype=OHLCV_DTYPE)
+    bars["ts"] = [START + day * DAY for day in days]
+    bars["close"] = close if close is not None else [100.0 + day for day in days]
+    return bars
+
+
+def test_append_writes_only_new_bars(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    assert store.append("aapl", make_bars(range(3))) == 3
+    # Bars 0-1 are held already; 2 is the open bar, rewritten with 3-4
+    assert store.append("AAPL", make_bars(range(5))) == 3
+    bars = store.read("AAPL")
+    assert list(bars["ts"]) == [START + day * DAY for day in range(5)]
+    assert store.last_timestamp("AAPL") == START + 4 * DAY
+    assert os.path.getsize(tmp_path / "1d" / "AAPL.bin") == 5 * OHLCV_DTYPE.itemsize
+
+
+def test_open_last_bar_is_overwritten_in_place(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", make_bars(range(3)))
+    assert store.append("AAPL", make_bars([2], close=[150.0])) == 1
+    bars = store.read("AAPL")
+    assert len(bars) == 3
+    assert list(bars["close"]) == [100.0, 101.0, 150.0]
+
+
+def test_read_slices_a_time_range(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", make_bars(range(10)))
+    bars = store.read("AAPL", start=START + 2 * DAY, end=START + 5 * DAY)
+    assert list(bars["close"]) == [102.0, 103.0, 104.0]
+    # A view of the file, not a copy
+    assert isinstance(bars, np.memmap)
+    assert len(store.read("MSFT")) == 0
+    assert store.last_bar("MSFT") is None
+
+
+def test_freshness_follows_the_file_mtime(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    assert not store.is_fresh("AAPL")
+    store.append("AAPL", make_bars(range(3)))
+    assert store.is_fresh("AAPL", max_age=300)
+
+    path = tmp_path / "1d" / "AAPL.bin"
+    old = time.time() - 600
+    os.utime(path, (old, old))
+    assert not store.is_fresh("AAPL", max_age=300)
+
+    # A refresh with nothing new still marks the symbol as refreshed
+    assert store.append("AAPL", make_bars([0, 1])) == 0
+    assert store.is_fresh("AAPL", max_age=300)
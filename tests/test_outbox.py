@@ -0,0 +1,131 @@
+"""Tests for the durable notification outbox."""
+
+import time
+
+from utils.outbox import NotificationOutbox, backoff_delay
+
+
+class FlakyHandler:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.delivered = []
+
+    def __call__(self, payload):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("boom")
+        self.delivered.append(payload)
+
+
+def make_outbox(tmp_path, handler, **kwargs):
+    outbox = NotificationOutbox(str(tmp_path / "outbox.sqlite"), {"telegram": handler}, base_delay=0, **kwargs)
+    # Deliver synchronously in the tests instead of on the dispatcher thread
+    outbox.start = lambda: None
+    return outbox
+
+
+def test_backoff_doubles_up_to_the_cap():
+    assert [backoff_delay(n, base_delay=30, max_delay=200) for n in range(1, 6)] == [30, 60, 120, 200, 200]
+
+
+def test_same_key_is_delivered_once(tmp_path):
+    handler = FlakyHandler()
+    outbox = make_outbox(tmp_path, handler)
+    assert outbox.enqueue("telegram", {"text": "report"}, "report:1")
+    assert not outbox.enqueue("telegram", {"text": "report"}, "report:1")
+    outbox.deliver_due()
+    outbox.deliver_due()
+    assert handler.delivered == [{"text": "report"}]
+    assert outbox.counts() == {"sent": 1}
+
+
+def test_failures_are_retried_then_dead_lettered(tmp_path):
+    handler = FlakyHandler(failures=2)
+    outbox = make_outbox(tmp_path, handler, max_attempts=5)
+    outbox.enqueue("telegram", {"text": "a"}, "a")
+    for _ in range(3):
+        outbox.deliver_due()
+    assert handler.delivered == [{"text": "a"}]
+
+    handler.failures = 5
+    outbox.enqueue("telegram", {"text": "b"}, "b")
+    for _ in range(5):
+        outbox.deliver_due()
+    assert outbox.counts() == {"sent": 1, "dead": 1}
+    assert outbox.dead_letters()[0]["attempts"] == 5
+
+
+def test_retry_waits_for_the_backoff(tmp_path):
+    handler = FlakyHandler(failures=1)
+    outbox = NotificationOutbox(str(tmp_path / "outbox.sqlite"), {"telegram": handler}, base_delay=60)
+    outbox.start = lambda: None
+    outbox.enqueue("telegram", {"text": "a"}, "a")
+    assert outbox.deliver_due() == 1
+    # The retry is scheduled a minute out, so nothing is due now
+    assert outbox.deliver_due() == 0
+    assert outbox.counts() == {"pending": 1}
+
+
+def test_pending_notifications_survive_a_restart(tmp_path):
+    outbox = make_outbox(tmp_path, FlakyHandler())
+    outbox.enqueue("telegram", {"text": "a"}, "a")
+
+    handler = FlakyHandler()
+    restarted = make_outbox(tmp_path, handler)
+    restarted.deliver_due()
+    assert handler.delivered == [{"text": "a"}]
+    assert not restarted.enqueue("telegram", {"text": "a"}, "a")
+
+
+def test_newer_report_supersedes_a_pending_one(tmp_path):
+    handler = FlakyHandler()
+    outbox = make_outbox(tmp_path, handler, supersede=["telegram"])
+    outbox.enqueue("telegram", {"text": "old"}, "report:1")
+    outbox.enqueue("telegram", {"text": "new"}, "report:2")
+    outbox.deliver_due()
+    assert handler.delivered == [{"text": "new"}]
+    assert outbox.counts() == {"sent": 1, "superseded": 1}
+
+
+def test_two_dispatchers_on_one_file_deliver_once(tmp_path):
+    handler = FlakyHandler()
+    other = make_outbox(tmp_path, handler)
+
+    def deliver(payload):
+        # The other dispatcher runs while this one is mid-delivery
+        assert other.deliver_due() == 0
+        handler(payload)
+
+    outbox = NotificationOutbox(str(tmp_path / "outbox.sqlite"), {"telegram": deliver}, base_delay=0)
+    outbox.start = lambda: None
+    outbox.enqueue("telegram", {"text": "report"}, "report:1")
+    assert outbox.deliver_due() == 1
+    assert other.deliver_due() == 0
+    assert handler.delivered == [{"text": "report"}]
+    assert outbox.counts() == {"sent": 1}
+
+
+def test_expired_lease_returns_to_pending_on_start(tmp_path):
+    outbox = make_outbox(tmp_path, FlakyHandler())
+    outbox.enqueue("telegram", {"text": "a"}, "a")
+    # A dispatcher claimed the row and died before settling it
+    assert outbox._claim(1)
+    outbox._update(1, lease_until=time.time() - 1)
+    assert outbox.counts() == {"sending": 1}
+
+    handler = FlakyHandler()
+    restarted = make_outbox(tmp_path, handler)
+    assert restarted.counts() == {"pending": 1}
+    restarted.deliver_due()
+    assert handler.delivered == [{"text": "a"}]
+
+
+def test_dispatcher_thread_delivers_in_the_background(tmp_path):
+    handler = FlakyHandler()
+    outbox = NotificationOutbox(str(tmp_path / "outbox.sqlite"), {"telegram": handler})
+    outbox.enqueue("telegram", {"text": "a"}, "a")
+    deadline = time.time() + 5
+    while not handler.delivered and time.time() < deadline:
+        time.sleep(0.01)
+    outbox.stop()
+    assert handler.delivered == [{"text": "a"}]
@@ -0,0 +1,64 @@
+"""Tests for batched, memoised price fetching."""
+
+import pytest
+
+import utils.price as price
+from conftest import FakeDownload
+from utils.ohlcv import OHLCVStore
+from utils.rate_limiter import get_limiter
+
+
+@pytest.fixture
+def download(tmp_path, monkeypatch):
+    download = FakeDownload({"AAPL": 150.0, "BTC-USD": 50000.0})
+    monkeypatch.setattr(price.yf, "download", download)
+    monkeypatch.setattr(price, "ohlcv_store", OHLCVStore(str(tmp_path)))
+    monkeypatch.setattr(price, "_price_memo", {})
+    monkeypatch.setattr(get_limiter("yahoo"), "wait_if_needed", lambda: None)
+    return download
+
+
+def test_prices_are_fetched_in_one_batch(download):
+    prices = price.get_current_prices([("AAPL", "america"), ("BTCUSDT", "crypto")])
+    assert prices == {"AAPL": 150.0, "BTCUSDT": 50000.0}
+    assert download.calls == [["AAPL", "BTC-USD"]]
+
+
+def test_prices_are_memoised(download, monkeypatch):
+    price.get_current_prices([("AAPL", "america")])
+    assert price.get_current_price("AAPL", "america") == 150.0
+    assert len(download.calls) == 1
+
+    # A new process starts with an empty memo but a freshly refreshed store
+    monkeypatch.setattr(price, "_price_memo", {})
+    assert price.get_current_prices([("AAPL", "america")]) == {"AAPL": 150.0}
+    assert len(download.calls) == 1
+
+
+def test_missing_ticker_falls_back_to_tradingview_close(download):
+    prices = price.get_current_prices(
+        [("AAPL", "america"), ("NOPE", "america")],
+        tv_indicators={"NOPE": {"close": 12.5}, "AAPL": {"close": 1.0}}
+    )
+    assert prices == {"AAPL": 150.0, "NOPE": 12.5}
+    assert download.calls == [["AAPL", "NOPE"]]
+    assert price.get_current_price("OTHER", "america") is None
+
+
+def test_failed_downloads_are_remembered_briefly(download, monkeypatch):
+    def outage(tickers, progress=False, **kwargs):
+        download.calls.append(list(tickers))
+        raise ConnectionError("Yahoo down")
+
+    monkeypatch.setattr(price.yf, "download", outage)
+    assert price.get_current_prices([("AAPL", "america"), ("BTCUSDT", "crypto")]) == {"AAPL": None, "BTCUSDT": None}
+    # The wallet path asks again symbol by symbol: no new downloads
+    assert price.get_current_price("AAPL", "america") is None
+    assert price.get_current_price("BTCUSDT", "crypto") is None
+    assert len(download.calls) == 1
+
+    monkeypatch.setattr(price.yf, "download", download)
+    for yf_symbol, (value, fetched_at) in list(price._price_memo.items()):
+        price._price_memo[yf_symbol] = (value, fetched_at - price.MISSING_PRICE_TTL)
+    assert price.get_current_price("AAPL", "america") == 150.0
+    assert download.calls[-1] == ["AAPL"]
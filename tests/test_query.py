@@ -0,0 +1,71 @@
+"""Tests for analysis result queries."""
+
+import pytest
+
+from utils.query import ColumnarResult, ColumnarResults, QueryError, parse_query, run_query
+
+RESULT = {
+    "timestamp": "2025-01-01T08:00:00",
+    "top_stocks": [
+        {"Symbol": "AAPL", "Score": 80, "Current_Price": 150.0, "Asset_Type": "america"},
+        {"Symbol": "MSFT", "Score": 95, "Current_Price": 300.0, "Asset_Type": "america"},
+        {"Symbol": "NVDA", "Score": 60, "Current_Price": 100.0, "Asset_Type": "america"},
+    ],
+    "top_cryptos": [
+        {"Symbol": "BTC", "Score": 90, "Current_Price": 50000.0, "Asset_Type": "crypto"},
+    ],
+    "wallet_cryptos": [
+        {"Symbol": "ADA", "Current_Price": 0.5, "RecPriority": 3},
+    ],
+}
+
+
+def query(**args):
+    return run_query(ColumnarResult(RESULT), parse_query(args))
+
+
+def test_no_query_parameters():
+    assert parse_query({"api_key": "x"}) is None
+
+
+def test_projection_filter_and_sort():
+    result = query(fields="Symbol,Score", min_score="70", sort="-Score")
+    assert result["top_stocks"] == [{"Symbol": "MSFT", "Score": 95}, {"Symbol": "AAPL", "Score": 80}]
+    assert result["top_cryptos"] == [{"Symbol": "BTC", "Score": 90}]
+    # Rows without a score do not pass min_score
+    assert result["wallet_cryptos"] == []
+
+    result = query(asset_type="crypto", fields="Symbol")
+    assert result["top_stocks"] == []
+    assert result["top_cryptos"] == [{"Symbol": "BTC"}]
+    assert result["wallet_cryptos"] == [{"Symbol": "ADA"}]
+
+
+def test_cursor_pagination():
+    first = query(sections="top_stocks", sort="Symbol", fields="Symbol", limit="2")
+    assert first["top_stocks"] == [{"Symbol": "AAPL"}, {"Symbol": "MSFT"}]
+    assert first["counts"] == {"top_stocks": 3}
+
+    second = query(sections="top_stocks", sort="Symbol", fields="Symbol", limit="2", cursor=first["next_cursor"])
+    assert second["top_stocks"] == [{"Symbol": "NVDA"}]
+    assert second["next_cursor"] is None
+
+    # A cursor from an older analysis is rejected
+    newer = ColumnarResult(dict(RESULT, timestamp="2025-01-02T08:00:00"))
+    with pytest.raises(QueryError):
+        run_query(newer, parse_query({"limit": "2", "cursor": first["next_cursor"]}))
+
+
+def test_invalid_parameters():
+    with pytest.raises(QueryError):
+        parse_query({"asset_type": "bonds"})
+    with pytest.raises(QueryError):
+        parse_query({"limit": "0"})
+    with pytest.raises(QueryError):
+        query(fields="Nope")
+
+
+def test_columnar_form_is_built_once_per_result():
+    results = ColumnarResults()
+    assert results.get("latest", RESULT) is results.get("latest", RESULT)
+    assert results.get("latest", dict(RESULT)) is not results.get("latest", RESULT)
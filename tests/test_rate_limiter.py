@@ -0,0 +1,54 @@
+"""Tests for the token bucket rate limiter."""
+
+import time
+import asyncio
+import threading
+
+from utils.rate_limiter import RateLimiter, AdaptiveRateLimiter, rate_limited
+
+
+def test_concurrent_callers_share_the_budget():
+    limiter = RateLimiter(calls_per_second=20, burst=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.wait_if_needed) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One call from the initial token, nine more at 20/s
+    assert time.monotonic() - start >= 9 / 20 - 0.02
+
+
+def test_burst_is_not_delayed():
+    limiter = RateLimiter(calls_per_second=1, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait_if_needed()
+    assert time.monotonic() - start < 0.1
+
+
+def test_async_functions_are_rate_limited():
+    @rate_limited(calls_per_second=20)
+    async def call():
+        return time.monotonic()
+
+    async def run():
+        return [await call() for _ in range(3)]
+
+    times = asyncio.run(run())
+    assert times[-1] - times[0] >= 2 / 20 - 0.02
+
+
+def test_adaptive_limiter_increases_additively_and_decreases_multiplicatively():
+    limiter = AdaptiveRateLimiter(calls_per_second=2, min_rate=0.5, max_rate=3, increase=0.5, decrease=0.5)
+    limiter.record_success()
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.current_rate == 3
+
+    limiter.record_throttle("HTTP status code: 429")
+    assert limiter.current_rate == 1.5
+    limiter.record_throttle("timeout")
+    limiter.record_throttle("timeout")
+    assert limiter.current_rate == 0.5
+    assert limiter.metrics() == {"rate": 0.5, "successes": 3, "throttles": 3}
@@ -0,0 +1,82 @@
+"""Tests for report rendering."""
+
+import dataclasses
+from datetime import datetime
+
+import pytest
+
+from utils.report import format_asset_line, render_section, exclude_symbols, build_report
+from utils.results import AssetResult
+
+
+TOP = {
+    "Symbol": ["AAPL", "MSFT"],
+    "Daily Recommendation": ["BUY", "STRONG_BUY"],
+    "Current Price": [100.0, None],
+    "Take Profit": [130.0, None],
+    "Score": [80, 75],
+    "Short Probability": [40, 70],
+    "Mid Probability": [50, 60],
+    "Long Probability": [80, 75],
+    "Recommended Horizon": ["Long", "Short"],
+}
+
+
+def test_section_lines_match_single_row_formatting():
+    lines = render_section("Top", TOP, "Nothing")
+    assert lines[:2] == ["Top", ""]
+    assert lines[2] == (
+        "• AAPL: `Rec=BUY` | 📈 `Curr=$100.00` | 🎯 `TP=$130.00` | `Score=80`"
+        "\n   ➜ Short: 40% | Mid: 50% | Long: 80% | Recommended: Long-term"
+    )
+    assert lines[4] == format_asset_line({name: values[1] for name, values in TOP.items()})
+    assert "Curr=$0.00" in lines[4]
+
+
+def test_wallet_rows_and_empty_sections():
+    wallet = {"Symbol": ["BTCUSDT"], "Daily Recommendation": ["SELL"], "Current Price": [50000.0]}
+    assert render_section("Wallet", wallet, "Nothing")[2] == "• BTCUSDT: `Rec=SELL` | 📈 `Curr=$50,000.00`"
+    assert render_section("Wallet", {}, "Nothing") == ["Wallet", "", "Nothing", ""]
+
+
+def test_bad_value_only_hides_its_row():
+    columns = {"Symbol": ["OK", "BAD"], "Daily Recommendation": ["BUY", "BUY"], "Current Price": [1.0, "x"]}
+    lines = render_section("S", columns, "Nothing")
+    assert lines[2].startswith("• OK:")
+    assert lines[4] == "• BAD: Error displaying data"
+
+
+def test_exclude_symbols():
+    others = exclude_symbols(TOP, {"AAPL"})
+    assert others["Symbol"] == ["MSFT"]
+    assert others["Score"] == [75]
+
+
+def test_report_is_rendered_once_into_every_view():
+    best = AssetResult("AAPL", "NASDAQ", "america", daily_recommendation="BUY", score=80, current_price=100.0,
+                       take_profit=130.0, short_probability=40, mid_probability=50, long_probability=80,
+                       recommended_horizon="Long")
+    other = AssetResult("MSFT", "NASDAQ", "america", score=70, short_probability=1, mid_probability=2,
+                        long_probability=70, recommended_horizon="Long")
+    wallet = AssetResult("BTCUSDT", "BINANCE", "crypto", source="Wallet", daily_recommendation="<SELL>")
+    results = {
+        "best_stocks": [best], "top_stocks": [best, other], "best_cryptos": [], "top_cryptos": [],
+        "wallet_stocks": [], "wallet_cryptos": [wallet],
+    }
+
+    report = build_report(results, created_at=datetime(2024, 1, 2, 3, 4, 5))
+
+    main_message, wallet_message = report.telegram_messages
+    other_section = main_message[main_message.index("🏢 Other Top Stocks"):]
+    assert "MSFT" in other_section and "AAPL" not in other_section
+    assert "BTCUSDT" in wallet_message
+    assert report.subject == "📊 Daily Market Analysis 📊"
+    assert "&lt;SELL&gt;" in report.email_html
+
+    data = report.to_dict()
+    assert data["timestamp"] == "2024-01-02T03:04:05"
+    assert data["best_stocks"][0]["Take_Profit"] == 130.0
+    assert data["wallet_cryptos"][0]["Daily_Recommendation"] == "<SELL>"
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        report.subject = "changed"
@@ -0,0 +1,93 @@
+"""Tests for the persistent symbol -> exchange index."""
+
+import time
+
+import pytest
+
+import utils.resolver as resolver
+from utils.resolver import ExchangeResolver
+
+DAY = 86400
+
+
+class FakeListings:
+    def __init__(self, listed):
+        self.listed = set(listed)
+        self.calls = []
+        self.error = None
+
+    def __call__(self, screener, tickers):
+        self.calls.append((screener, list(tickers)))
+        if self.error is not None:
+            raise self.error
+        return {ticker for ticker in tickers if ticker in self.listed}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def listings(monkeypatch):
+    listings = FakeListings({"NYSE:KO", "KRAKEN:DEGENUSDT"})
+    monkeypatch.setattr(resolver, "find_listings", listings)
+    return listings
+
+
+def make_resolver(tmp_path):
+    return ExchangeResolver(cache_file=str(tmp_path / "exchange_index.json"))
+
+
+def test_resolved_symbols_are_reused_for_30_days(tmp_path, clock, listings):
+    index = make_resolver(tmp_path)
+    assert index.resolve_many([("KO", "america"), ("DEGEN", "crypto")]) == {
+        ("KO", "america"): ("KO", "NYSE"),
+        ("DEGEN", "crypto"): ("DEGENUSDT", "KRAKEN"),
+    }
+    # One query per screener, every candidate exchange in it
+    assert listings.calls == [
+        ("america", ["NASDAQ:KO", "NYSE:KO", "AMEX:KO"]),
+        ("crypto", ["BINANCE:DEGENUSDT", "COINBASE:DEGENUSDT", "KRAKEN:DEGENUSDT"]),
+    ]
+
+    clock[0] += 29 * DAY
+    assert make_resolver(tmp_path).resolve("KO", "america") == ("KO", "NYSE")
+    assert len(listings.calls) == 2
+
+    clock[0] += 2 * DAY
+    assert make_resolver(tmp_path).resolve("KO", "america") == ("KO", "NYSE")
+    assert len(listings.calls) == 3
+
+
+def test_negative_entries_expire_after_a_day(tmp_path, clock, listings):
+    index = make_resolver(tmp_path)
+    assert index.resolve("NOPE", "america") == (None, None)
+    assert index.resolve("NOPE", "america") == (None, None)
+    assert len(listings.calls) == 1
+
+    # Listed since: found once the negative entry expired
+    listings.listed.add("NASDAQ:NOPE")
+    clock[0] += DAY + 1
+    assert index.resolve("NOPE", "america") == ("NOPE", "NASDAQ")
+    assert len(listings.calls) == 2
+
+
+def test_outage_does_not_record_negative_entries(tmp_path, clock, listings):
+    index = make_resolver(tmp_path)
+    listings.error = ConnectionError("scanner down")
+    assert index.resolve("KO", "america") == (None, None)
+
+    # Backed off: later lookups do not probe the scanner one symbol at a time
+    listings.error = None
+    assert index.resolve("KO", "america") == (None, None)
+    assert index.resolve("MSFT", "america") == (None, None)
+    assert len(listings.calls) == 1
+    # Other screeners are still queried
+    assert index.resolve("DEGEN", "crypto") == ("DEGENUSDT", "KRAKEN")
+
+    clock[0] += resolver.OUTAGE_BACKOFF
+    assert index.resolve("KO", "america") == ("KO", "NYSE")
+    assert len(listings.calls) == 3
@@ -0,0 +1,28 @@
+"""Tests for the compact asset result types."""
+
+import pytest
+
+from utils.results import AssetResult, IndicatorMatrix, WALLET_COLUMNS, to_frame
+
+
+def test_indicator_matrix_round_trip():
+    matrix = IndicatorMatrix.from_dicts([{"close": 10.0, "RSI": 55.5, "unknown": 1.0}, None, {"ATR": 2.5, "EMA20": None}])
+    assert matrix.values.shape[0] == 3
+    assert matrix.row_dict(0) == {"RSI": 55.5, "close": 10.0}
+    assert matrix.row_dict(1) == {}
+    assert matrix.get(2, "ATR") == 2.5
+    assert matrix.get(2, "EMA20") is None
+    assert list(matrix.column("close")[:1]) == [10.0]
+
+
+def test_asset_result_is_slotted_and_presented_at_the_edge():
+    matrix = IndicatorMatrix.from_dicts([{"close": 10.0}])
+    result = AssetResult("AAPL", "NASDAQ", "america", source="Wallet", current_price=10.0, matrix=matrix, row=0)
+    with pytest.raises(AttributeError):
+        result.extra = 1
+    assert result.indicators == {"close": 10.0}
+
+    frame = to_frame([result], WALLET_COLUMNS)
+    assert list(frame.columns) == list(WALLET_COLUMNS)
+    assert frame.iloc[0]["Symbol"] == "AAPL"
+    assert to_frame([]).empty
@@ -0,0 +1,71 @@
+"""Tests for the vectorised batch scorer."""
+
+import random
+
+import pytest
+from tradingview_ta import Interval
+
+from utils.scoring import evaluate_asset, score_assets, unscorable_intervals, HORIZONS
+
+RECOMMENDATIONS = ["STRONG_BUY", "BUY", "NEUTRAL", "SELL", "STRONG_SELL", "ERROR", "N/A"]
+
+
+def random_analysis(rng):
+    if rng.random() < 0.1:
+        return {"error": "Exchange or symbol not found."}
+    analysis = {
+        "recommendation": rng.choice(RECOMMENDATIONS),
+        "moving_averages": rng.choice(RECOMMENDATIONS),
+        # Half-point RSI values hit the int() truncation boundaries
+        "RSI": rng.choice([rng.uniform(0, 100), rng.randint(0, 200) / 2]),
+        "MACD_hist": rng.choice([0, rng.uniform(-5, 5)]),
+        "indicators": {},
+    }
+    if rng.random() < 0.7:
+        analysis["indicators"]["ATR"] = rng.choice([0.5, 1, 1.5, 2, 2.5, rng.uniform(0, 4)])
+    return analysis
+
+
+def test_batch_scores_match_evaluate_asset():
+    rng = random.Random(42)
+    intervals = [Interval.INTERVAL_15_MINUTES, Interval.INTERVAL_1_HOUR, Interval.INTERVAL_1_DAY, Interval.INTERVAL_1_WEEK]
+    analyses = [{interval: random_analysis(rng) for interval in intervals} for _ in range(2000)]
+
+    scores = score_assets(analyses)
+
+    for i, per_interval in enumerate(analyses):
+        short, mid, daily, weekly = (per_interval[interval] for interval in intervals)
+        expected = {
+            "Short": evaluate_asset(short, None) if "error" not in short else 0,
+            "Mid": evaluate_asset(mid, None) if "error" not in mid else 0,
+            "Long": evaluate_asset(daily, weekly) if "error" not in daily else 0,
+        }
+        for horizon in HORIZONS:
+            assert scores[f"{horizon} Probability"][i] == expected[horizon]
+        assert scores["Score"][i] == expected["Long"]
+        assert scores["Recommended Horizon"][i] == max(expected, key=expected.get)
+
+
+def test_empty_universe():
+    scores = score_assets([])
+    assert len(scores["Score"]) == 0
+    assert len(scores["Recommended Horizon"]) == 0
+
+
+def test_missing_rsi_is_not_scored_as_neutral():
+    analysis = {"recommendation": "BUY", "moving_averages": "BUY", "RSI": None, "MACD_hist": 1.0, "indicators": {}}
+    complete = dict(analysis, RSI=50.0)
+    intervals = [Interval.INTERVAL_15_MINUTES, Interval.INTERVAL_1_HOUR, Interval.INTERVAL_1_DAY, Interval.INTERVAL_1_WEEK]
+    analyses = {interval: complete for interval in intervals}
+    analyses[Interval.INTERVAL_1_DAY] = analysis
+
+    # evaluate_asset cannot score it, so the asset is reported as an error
+    with pytest.raises(TypeError):
+        evaluate_asset(analysis)
+    assert unscorable_intervals(analyses) == [Interval.INTERVAL_1_DAY]
+    assert unscorable_intervals({interval: complete for interval in intervals}) == []
+
+    # The batch scorer gives it 0, like an interval that failed, not an RSI of 50
+    scores = score_assets([analyses])
+    assert scores["Long Probability"][0] == 0
+    assert scores["Short Probability"][0] == evaluate_asset(complete)
@@ -0,0 +1,107 @@
+"""Tests for the batched TradingView scanner requests."""
+
+import pytest
+from tradingview_ta import Interval
+
+import utils.tradingview as tv
+from conftest import FakeScanner
+from utils.rate_limiter import get_limiter
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key, (None, None))[0]
+
+    def set(self, key, value, expiry_seconds=None):
+        self.entries[key] = (value, expiry_seconds)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(get_limiter("tradingview"), "wait_if_needed", lambda: None)
+
+
+def install(monkeypatch, scanner):
+    monkeypatch.setattr(tv.requests, "post", scanner)
+    return scanner
+
+
+def test_scan_returns_one_analysis_per_listed_ticker(monkeypatch):
+    scanner = install(monkeypatch, FakeScanner({"NASDAQ:AAPL"}))
+    analyses = tv._scan("america", ["nasdaq:aapl", "NYSE:NOPE"], [Interval.INTERVAL_1_DAY])
+
+    url, tickers, columns = scanner.requests[0]
+    assert url.endswith("/america/scan")
+    assert tickers == ["NASDAQ:AAPL", "NYSE:NOPE"]
+    # Daily columns have no suffix
+    assert "RSI" in columns and not any("|" in column for column in columns)
+    assert list(analyses) == ["NASDAQ:AAPL"]
+    assert analyses["NASDAQ:AAPL"][Interval.INTERVAL_1_DAY].indicators["RSI"] == 47.0
+
+
+def test_fetch_grouped_chunks_requests_and_marks_unknown_tickers(monkeypatch):
+    scanner = install(monkeypatch, FakeScanner({"NASDAQ:AAPL", "NASDAQ:MSFT"}))
+    tickers = {
+        "NASDAQ:AAPL": ("AAPL", "NASDAQ"),
+        "NASDAQ:MSFT": ("MSFT", "NASDAQ"),
+        "NYSE:NOPE": ("NOPE", "NYSE"),
+    }
+    cache = DictCache()
+    results = tv._fetch_grouped("america", tickers, [Interval.INTERVAL_1_DAY], cache, batch_size=2)
+
+    assert [len(request[1]) for request in scanner.requests] == [2, 1]
+    assert results["NASDAQ:MSFT"][Interval.INTERVAL_1_DAY]["RSI"] == 47.0
+    assert results["NYSE:NOPE"][Interval.INTERVAL_1_DAY]["error"] == tv.NOT_FOUND_ERROR
+    assert cache.get(tv.make_key("AAPL", "NASDAQ", "america", Interval.INTERVAL_1_DAY))["symbol"] == "AAPL"
+
+
+def test_request_failures_are_returned_but_not_cached(monkeypatch):
+    install(monkeypatch, FakeScanner({"NASDAQ:AAPL"}, status_code=500))
+    cache = DictCache()
+    results = tv._fetch_grouped(
+        "america", {"NASDAQ:AAPL": ("AAPL", "NASDAQ")}, [Interval.INTERVAL_1_DAY], cache, batch_size=10
+    )
+    assert "500" in results["NASDAQ:AAPL"][Interval.INTERVAL_1_DAY]["error"]
+    assert cache.entries == {}
+
+
+def test_multi_interval_response_is_split_per_interval(monkeypatch):
+    scanner = install(monkeypatch, FakeScanner({"NASDAQ:AAPL"}))
+    cache = DictCache()
+    results = tv.fetch_multi_interval_batch(
+        [("aapl", "NASDAQ", "america"), ("NOPE", "NYSE", "america")], tv.TIMEFRAMES, cache=cache
+    )
+
+    # One request for both symbols and all timeframes, columns side by side
+    assert len(scanner.requests) == 1
+    assert len(scanner.requests[0][2]) == len(tv.TIMEFRAMES) * len(tv.TradingView.indicators)
+    aapl = results[("AAPL", "NASDAQ", "america")]
+    assert {interval: aapl[interval]["RSI"] for interval in tv.TIMEFRAMES} == {
+        Interval.INTERVAL_15_MINUTES: 42.0,
+        Interval.INTERVAL_1_HOUR: 44.0,
+        Interval.INTERVAL_1_DAY: 47.0,
+        Interval.INTERVAL_1_WEEK: 48.0,
+    }
+    assert all(aapl[interval]["timeframe"] == interval for interval in tv.TIMEFRAMES)
+
+    # Results use the interval TTL; misses only the short NOT_FOUND_TTL
+    daily = tv.make_key("AAPL", "NASDAQ", "america", Interval.INTERVAL_1_DAY)
+    missing = tv.make_key("NOPE", "NYSE", "america", Interval.INTERVAL_1_DAY)
+    assert cache.entries[daily][1] is None
+    assert cache.entries[missing] == (tv.error_result("NOPE", "NYSE", tv.NOT_FOUND_ERROR), tv.NOT_FOUND_TTL)
+
+    # Everything is cached now, so nothing is requested again
+    tv.fetch_multi_interval_batch([("AAPL", "NASDAQ", "america")], tv.TIMEFRAMES, cache=cache)
+    assert len(scanner.requests) == 1
+
+
+def test_local_analyses_have_their_own_cache_keys():
+    tradingview = tv.make_key("aapl", "NASDAQ", "america", Interval.INTERVAL_1_DAY)
+    local = tv.make_key("aapl", "NASDAQ", "america", Interval.INTERVAL_1_DAY, source="local")
+    # TradingView keys keep their format, so existing cache entries stay valid
+    assert tradingview == ("AAPL", "NASDAQ", "america", Interval.INTERVAL_1_DAY)
+    assert local != tradingview
+    assert tv.interval_ttl(local) == tv.interval_ttl(tradingview) == tv.INTERVAL_TTLS[Interval.INTERVAL_1_DAY]